@@ -20,6 +20,8 @@
 class Action(object):
     '''this class represent an action that must be performed by the server'''
 
+    __slots__ = ('id_', 'args')
+
     def __init__(self, id_, args=None):
         '''class constructor'''
         self.id_ = id_
@@ -19,12 +19,81 @@
 
 import status
 
+class GroupList(list):
+    '''the list of group ids of a contact, tells the contact manager of the
+    contact when it changes so it can update its indexes'''
+
+    __slots__ = ('contact',)
+
+    def __init__(self, contact, groups=()):
+        '''class constructor'''
+        list.__init__(self, groups)
+        self.contact = contact
+
+    def _changed(self):
+        '''update the indexes of the contact manager if any'''
+        manager = self.contact._manager
+
+        if manager is not None:
+            manager._groups_changed(self.contact)
+
+    def append(self, gid):
+        list.append(self, gid)
+        self._changed()
+
+    def extend(self, gids):
+        list.extend(self, gids)
+        self._changed()
+
+    def insert(self, index, gid):
+        list.insert(self, index, gid)
+        self._changed()
+
+    def remove(self, gid):
+        list.remove(self, gid)
+        self._changed()
+
+    def pop(self, *args):
+        gid = list.pop(self, *args)
+        self._changed()
+        return gid
+
+    def __setitem__(self, index, gid):
+        list.__setitem__(self, index, gid)
+        self._changed()
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._changed()
+
+    def __setslice__(self, start, stop, gids):
+        list.__setslice__(self, start, stop, gids)
+        self._changed()
+
+    def __delslice__(self, start, stop):
+        list.__delslice__(self, start, stop)
+        self._changed()
+
+    def __iadd__(self, gids):
+        list.extend(self, gids)
+        self._changed()
+        return self
+
 class Contact(object):
     '''a class that represent a contact'''
 
+    # there is one instance for each contact on the list, without a __dict__
+    # they take less memory
+    __slots__ = ('account', 'identifier', 'nick', 'message', 'media',
+        '_status', 'alias', 'blocked', 'picture', '_groups', 'cid', '_attrs',
+        '_manager')
+
     def __init__(self, account, identifier=None, nick='', message=None,
         _status=status.OFFLINE, alias='', blocked=False, cid=None):
         '''class contructor'''
+        # the contact manager that has this contact on its indexes, set by
+        # the manager when the contact is added
+        self._manager = None
         self.account = account
         self.identifier = identifier or '0'
         self.nick = nick or self.account
@@ -32,15 +101,58 @@ class Contact(object):
         # call it
         self.message = message or ''
         self.media = ''
-        self.status = _status
+        self._status = _status
         self.alias = alias
         self.blocked = blocked
         self.picture = ''
-        self.groups = []
+        self._groups = GroupList(self)
         self.cid = cid
 
-        # extra atributes (use contact.attrs.get("attr", "default"))
-        self.attrs = {}
+        # extra atributes (use contact.attrs.get("attr", "default")),
+        # created the first time they are used
+        self._attrs = None
+
+    def _get_attrs(self):
+        '''return the dict of extra attributes'''
+        if self._attrs is None:
+            self._attrs = {}
+
+        return self._attrs
+
+    def _set_attrs(self, attrs):
+        '''set the dict of extra attributes'''
+        self._attrs = attrs
+
+    attrs = property(fget=_get_attrs, fset=_set_attrs)
+
+    def _get_status(self):
+        '''return the status of the contact'''
+        return self._status
+
+    def _set_status(self, status_):
+        '''set the status of the contact and update the indexes of the
+        contact manager'''
+        old_status = self._status
+        self._status = status_
+
+        if self._manager is not None and old_status != status_:
+            self._manager._status_changed(self, old_status)
+
+    status = property(fget=_get_status, fset=_set_status)
+
+    def _get_groups(self):
+        '''return the list of group ids of the contact'''
+        return self._groups
+
+    def _set_groups(self, groups):
+        '''set the list of group ids of the contact and update the indexes
+        of the contact manager'''
+        self._groups = GroupList(self, groups)
+
+        if self._manager is not None:
+            self._manager._groups_changed(self)
+
+    groups = property(fget=_get_groups, fset=_set_groups)
 
     def dict(self):
         '''return a dict representing the object'''
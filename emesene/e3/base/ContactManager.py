@@ -22,14 +22,134 @@ import validator
 
 from Contact import Contact
 
+def display_name_key(contact):
+    '''the key used to sort the contacts'''
+    return contact.display_name
+
+class ContactDict(dict):
+    '''a dict with accounts as keys and contacts as values that adds and
+    removes the contacts from the indexes of the contact manager'''
+
+    def __init__(self, manager):
+        '''class constructor'''
+        dict.__init__(self)
+        self.manager = manager
+
+    def __setitem__(self, account, contact):
+        old = self.get(account, None)
+
+        if old is not None:
+            self.manager._remove_index(old)
+
+        dict.__setitem__(self, account, contact)
+        self.manager._add_index(contact)
+
+    def __delitem__(self, account):
+        contact = self[account]
+        dict.__delitem__(self, account)
+        self.manager._remove_index(contact)
+
+    def pop(self, account, *default):
+        if account in self:
+            contact = self[account]
+            del self[account]
+            return contact
+
+        return dict.pop(self, account, *default)
+
+    def popitem(self):
+        (account, contact) = dict.popitem(self)
+        self.manager._remove_index(contact)
+        return (account, contact)
+
+    def setdefault(self, account, contact=None):
+        if account not in self:
+            self[account] = contact
+
+        return self[account]
+
+    def update(self, *args, **kwargs):
+        for (account, contact) in dict(*args, **kwargs).iteritems():
+            self[account] = contact
+
+    def clear(self):
+        for contact in self.values():
+            self.manager._remove_index(contact)
+
+        dict.clear(self)
+
 class ContactManager(object):
+    '''keeps the contacts of the session and indexes of the contacts by
+    status and by group that are updated when a contact is added or
+    removed from contacts or its status or groups change'''
+
     def __init__(self, account):
-        self.contacts = {}
+        # status as key and a set of contacts as value
+        self.by_status = dict((stat, set()) for stat in status.ORDERED)
+        # group id as key and a set of contacts as value
+        self.by_group = {}
+        self.no_group = set()
+        # contact as key and the tuple of group ids it's indexed on as value
+        self._indexed_groups = {}
+
+        self.contacts = ContactDict(self)
         self.reverse = {}
         self.pending = {}
 
         self.me = Contact(account)
 
+    def _add_index(self, contact):
+        '''add contact to the indexes'''
+        contact._manager = self
+        self.by_status.setdefault(contact.status, set()).add(contact)
+        self._indexed_groups[contact] = ()
+        self._groups_changed(contact)
+
+    def _remove_index(self, contact):
+        '''remove contact from the indexes'''
+        if contact._manager is self:
+            contact._manager = None
+
+        self.by_status.get(contact.status, set()).discard(contact)
+        self.no_group.discard(contact)
+
+        for gid in self._indexed_groups.pop(contact, ()):
+            self._discard_from_group(gid, contact)
+
+    def _status_changed(self, contact, old_status):
+        '''move contact to the index of its new status'''
+        self.by_status.get(old_status, set()).discard(contact)
+        self.by_status.setdefault(contact.status, set()).add(contact)
+
+    def _groups_changed(self, contact):
+        '''move contact to the indexes of its current groups'''
+        old_groups = self._indexed_groups.get(contact, ())
+        new_groups = tuple(contact.groups)
+
+        for gid in old_groups:
+            if gid not in new_groups:
+                self._discard_from_group(gid, contact)
+
+        for gid in new_groups:
+            self.by_group.setdefault(gid, set()).add(contact)
+
+        if new_groups:
+            self.no_group.discard(contact)
+        else:
+            self.no_group.add(contact)
+
+        self._indexed_groups[contact] = new_groups
+
+    def _discard_from_group(self, gid, contact):
+        '''remove contact from the index of the group gid'''
+        contacts = self.by_group.get(gid, None)
+
+        if contacts is not None:
+            contacts.discard(contact)
+
+            if not contacts:
+                del self.by_group[gid]
+
     def exists(self, account):
         '''check if the account is on self.contacts, return True if exists'''
         if account in self.contacts:
@@ -44,8 +164,7 @@ class ContactManager(object):
     # actions on our contact
     def get_no_group(self):
         '''return a list of contacts that dont belong to any group'''
-        return [contact for contact in self.contacts.values() \
-            if not contact.groups]
+        return list(self.no_group)
 
     def get_contacts(self, accounts):
         '''return a list of contact objects from a list of accounts
@@ -61,15 +180,18 @@ class ContactManager(object):
         The contacts are sorted inside the status by display_name.
         if contacts is None, then use the internal list of contacts
         contacts should be a list of contact objects'''
-        sorted_dict = {}
-        contacts = contacts or self.contacts.values()
+        if contacts:
+            sorted_dict = dict((stat, []) for stat in status.ORDERED)
 
-        for stat in status.ORDERED:
-            sorted_dict[stat] = [contact for contact in contacts \
-                if contact.status == stat]
+            for contact in contacts:
+                if contact.status in sorted_dict:
+                    sorted_dict[contact.status].append(contact)
+        else:
+            sorted_dict = dict((stat, list(self.by_status.get(stat, ())))
+                for stat in status.ORDERED)
 
-            sorted_dict[stat].sort(cmp=lambda x, y: cmp(x.display_name,
-                y.display_name))
+        for contacts in sorted_dict.itervalues():
+            contacts.sort(key=display_name_key)
 
         return sorted_dict
 
@@ -82,14 +204,12 @@ class ContactManager(object):
         sorted_dict = {}
 
         for group in groups:
-            contacts = [contact for contact in self.contacts.values() \
-                if group in contact.groups]
+            contacts = list(self.by_group.get(group, ()))
 
             if sort_by_status:
                 sorted_dict[group] = self.get_sorted_list_by_status(contacts)
             else:
-                contacts.sort(cmp=lambda x, y: cmp(x.display_name,
-                    y.display_name))
+                contacts.sort(key=display_name_key)
                 sorted_dict[group] = contacts
 
         return sorted_dict
@@ -196,19 +316,30 @@ class ContactManager(object):
 
     def get_online_list(self, contacts=None):
         '''return a list of non offline contacts'''
-        contacts = contacts or self.contacts.values()
+        if contacts:
+            return [contact for contact in contacts \
+                    if contact.status != status.OFFLINE]
+
+        online = []
 
-        return [contact for contact in contacts \
-                if contact.status != status.OFFLINE]
+        for (stat, contacts) in self.by_status.items():
+            if stat != status.OFFLINE:
+                online.extend(contacts)
 
-    def get_online_total_count(self, contacts):
+        return online
+
+    def get_online_total_count(self, contacts=None):
         '''return a tuple with two values, the first is the number of
         non offline contacts on the list, the secont is the total number
-        of contacts'''
-        total = len(contacts)
-        online = len([contact for contact in contacts \
-            if contact.status != status.OFFLINE])
+        of contacts, if contacts is None count all the contacts'''
+        if contacts is None:
+            total = len(self.contacts)
+            offline = len(self.by_status.get(status.OFFLINE, ()))
+        else:
+            total = len(contacts)
+            offline = len([contact for contact in contacts \
+                if contact.status == status.OFFLINE])
 
-        return (online, total)
+        return (total - offline, total)
 
 
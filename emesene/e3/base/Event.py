@@ -20,6 +20,8 @@
 class Event(object):
     '''an object that represents an event'''
 
+    __slots__ = ('id_', 'args')
+
     def __init__(self, id_, *args):
         '''class constructor'''
         self.id_ = id_
@@ -20,12 +20,15 @@
 class Group(object):
     '''a class representing a group'''
     (ONLINE, OFFLINE, NONE, STANDARD) = range(4)
+
+    __slots__ = ('name', 'identifier', 'contacts', 'type')
+
     def __init__(self, name, identifier=None, contacts=None, type_=None):
         '''class constructor'''
         self.name = name
         self.identifier = identifier or '0'
         self.contacts = contacts or []
-        self.type = type_ or Group.STANDARD
+        self.type = type_ if type_ is not None else Group.STANDARD
 
     def dict(self):
         '''return a dict representing the object'''
@@ -32,6 +32,9 @@ import e3
 class Account(object):
     '''a class to store account data'''
 
+    __slots__ = ('id', 'id_account', 'account', 'status', 'nick', 'message',
+        'path', 'cid', 'groups')
+
     def __init__(self, id_, id_account, account, status, nick='', message='',
         path='', cid=None):
         '''constructor'''
@@ -66,6 +69,8 @@ class Account(object):
 class Group(object):
     '''a class that represents a group of contacts'''
 
+    __slots__ = ('id', 'name', 'gid', 'enabled', 'accounts')
+
     def __init__(self, id_, name, gid, enabled):
         '''constructor'''
         self.id = id_
@@ -82,6 +87,8 @@ class Logger(object):
     '''a class to log activity on an IM'''
 
     COMMIT_LIMIT = 20
+    # WAL lets the LoggerReader connections query while we write
+    JOURNAL_MODE = 'WAL'
 
     EVENTS = ('nick change', 'status change', 'message change', 'image change',
         'message', 'message-error')
@@ -179,6 +186,28 @@ class Logger(object):
         );
     '''
 
+    # composite indexes used by get_event, get_sent_messages, get_chats and
+    # get_chats_between, the second one covers the reversed direction of
+    # the (src, dest) OR on the chat queries
+    CREATE_INDEXES = (
+        '''
+        CREATE INDEX IF NOT EXISTS idx_fact_event_src_dest
+        ON fact_event(id_event, id_src_acc, id_dest_acc, tmstp);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_fact_event_dest_src
+        ON fact_event(id_event, id_dest_acc, id_src_acc, tmstp);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_d_info_account
+        ON d_info(id_account);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_last_account_account
+        ON last_account(account);
+        ''',
+    )
+
     INSERT_TIME = '''
         INSERT INTO d_time(id_time, year, month, day, wday, hour, minute,
         seconds) VALUES(NULL, ?, ?, ?, ?, ?, ?, ?);
@@ -293,6 +322,72 @@ class Logger(object):
         ORDER BY tmstp LIMIT ?;
     '''
 
+    # keyset pagination over (tmstp, id_time), the last column is only used
+    # to build the cursor of the next page
+    SELECT_CHATS_PAGE = '''
+        SELECT f.status, f.tmstp, f.payload, i.nick, a.account, f.id_time
+        FROM fact_event f, d_info i, d_account a
+        WHERE f.id_event=? and
+            ((f.id_src_acc=? and id_dest_acc=?) or
+            (f.id_dest_acc=? and id_src_acc=?)) and
+            f.id_src_info = i.id_info and f.id_src_acc = a.id_account and
+            f.tmstp >= ? and f.tmstp <= ? and
+            (f.tmstp > ? or (f.tmstp = ? and f.id_time > ?))
+        ORDER BY f.tmstp, f.id_time LIMIT ?;
+    '''
+
+    SELECT_CHATS_PAGE_BACKWARDS = '''
+        SELECT f.status, f.tmstp, f.payload, i.nick, a.account, f.id_time
+        FROM fact_event f, d_info i, d_account a
+        WHERE f.id_event=? and
+            ((f.id_src_acc=? and id_dest_acc=?) or
+            (f.id_dest_acc=? and id_src_acc=?)) and
+            f.id_src_info = i.id_info and f.id_src_acc = a.id_account and
+            f.tmstp >= ? and f.tmstp <= ? and
+            (f.tmstp < ? or (f.tmstp = ? and f.id_time < ?))
+        ORDER BY f.tmstp DESC, f.id_time DESC LIMIT ?;
+    '''
+
+    # full text index of the payload of message events, the text is not
+    # duplicated, it's read from fact_event using id_time as docid
+    CREATE_FACT_EVENT_FTS = '''
+        CREATE VIRTUAL TABLE fact_event_fts
+        USING fts4(content="fact_event", payload);
+    '''
+
+    SELECT_FACT_EVENT_FTS = '''
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name='fact_event_fts';
+    '''
+
+    INSERT_FACT_EVENT_FTS = '''
+        INSERT INTO fact_event_fts(docid, payload) VALUES(?, ?);
+    '''
+
+    BACKFILL_FACT_EVENT_FTS = '''
+        INSERT INTO fact_event_fts(docid, payload)
+        SELECT id_time, payload FROM fact_event WHERE id_event=?;
+    '''
+
+    SEARCH_MESSAGES = '''
+        SELECT f.status, f.tmstp, f.payload, i.nick, a.account
+        FROM fact_event_fts s, fact_event f, d_info i, d_account a
+        WHERE fact_event_fts MATCH ? and f.id_time = s.docid and
+            f.id_event=? and (f.id_src_acc=? or f.id_dest_acc=?) and
+            f.id_src_info = i.id_info and f.id_src_acc = a.id_account
+        ORDER BY f.tmstp DESC LIMIT ?;
+    '''
+
+    # used if the sqlite library was built without fts support
+    SEARCH_MESSAGES_LIKE = '''
+        SELECT f.status, f.tmstp, f.payload, i.nick, a.account
+        FROM fact_event f, d_info i, d_account a
+        WHERE f.payload LIKE ? ESCAPE '\\' and
+            f.id_event=? and (f.id_src_acc=? or f.id_dest_acc=?) and
+            f.id_src_info = i.id_info and f.id_src_acc = a.id_account
+        ORDER BY f.tmstp DESC LIMIT ?;
+    '''
+
     def __init__(self, path, db_name="base.db"):
         '''constructor'''
         self.path = path
@@ -305,8 +400,12 @@ class Logger(object):
         full_path = os.path.join(path, db_name)
         self.connection = sqlite.connect(full_path)
         self.cursor = self.connection.cursor()
+        self.execute('PRAGMA journal_mode=%s;' % (Logger.JOURNAL_MODE,))
+        self.execute('PRAGMA synchronous=NORMAL;')
 
         self._count = 0
+        self._batch = False
+        self.fts = False
 
         try:
             self._create()
@@ -316,6 +415,8 @@ class Logger(object):
             self._load_accounts()
             self._load_account_by_group()
 
+        self._migrate()
+
     def _create(self):
         '''create the database'''
         self.execute(Logger.CREATE_D_TIME)
@@ -331,6 +432,35 @@ class Logger(object):
             id_event = self.insert_event(event)
             self.events[event] = id_event
 
+    def _migrate(self):
+        '''bring the schema of an already existing database up to date, all
+        the steps must be safe to run on every start'''
+        for query in Logger.CREATE_INDEXES:
+            self.execute(query)
+
+        self._create_fts()
+        self.connection.commit()
+
+    def _create_fts(self):
+        '''create the full text index of messages if it doesn't exist and
+        fill it with the messages already logged, set self.fts to False if
+        fts is not available'''
+        self.execute(Logger.SELECT_FACT_EVENT_FTS)
+
+        if self.cursor.fetchone() is not None:
+            self.fts = True
+            return
+
+        try:
+            self.execute(Logger.CREATE_FACT_EVENT_FTS)
+        except sqlite.OperationalError, e:
+            log.warning('full text search not available: ' + str(e))
+            self.fts = False
+            return
+
+        self.execute(Logger.BACKFILL_FACT_EVENT_FTS, (self.events['message'],))
+        self.fts = True
+
     def _load_accounts(self):
         '''load the accounts from the last_account table and store them in
         a dict'''
@@ -473,10 +603,15 @@ class Logger(object):
         self.execute(Logger.INSERT_FACT_EVENT,
             (id_time, id_event, id_src_info, id_dest_info, id_src_acc,
                 id_dest_acc, status, unicode(payload), timestamp))
+        id_fact = self.cursor.lastrowid
+
+        if self.fts and id_event == self.events.get('message', None):
+            self.execute(Logger.INSERT_FACT_EVENT_FTS,
+                (id_fact, unicode(payload)))
 
         self._stat()
 
-        return self.cursor.lastrowid
+        return id_fact
 
     def insert_last_account(self, id_info, id_account, account, status, nick,
         message, path):
@@ -525,7 +660,11 @@ class Logger(object):
 
     def _stat(self):
         '''called internally each time a transaction is made, here we control
-        how often a commit is made'''
+        how often a commit is made, inside a batch the commit is delayed
+        until end_batch is called'''
+
+        if self._batch:
+            return
 
         if self._count >= Logger.COMMIT_LIMIT:
             t1 = time.time()
@@ -535,6 +674,17 @@ class Logger(object):
 
         self._count += 1
 
+    def begin_batch(self):
+        '''start grouping the following writes in one transaction, nothing
+        is commited until end_batch is called'''
+        self._batch = True
+
+    def end_batch(self):
+        '''commit all the writes made since begin_batch'''
+        self._batch = False
+        self.connection.commit()
+        self._count = 0
+
     def execute(self, query, args=()):
         '''execute the query with optional args'''
         #log.debug(query + str(args))
@@ -656,6 +806,108 @@ class Logger(object):
 
         return self.cursor.fetchall()
 
+    def get_chats_page(self, src, dest, page_size, cursor=None,
+            backwards=True, from_t=None, to_t=None):
+        '''return a tuple (rows, cursor) with at most page_size chats between
+        src and dest, rows have the same format as get_chats and are always
+        in chronological order.
+
+        if backwards is True the page contains the chats older than cursor
+        (or the newest ones if cursor is None), otherwise the chats newer
+        than cursor (or the oldest ones). the returned cursor is passed to
+        get the next page in the same direction, it's None when there are no
+        more pages. from_t and to_t optionally limit the range of timestamps.
+        return None if src or dest doesn't exist'''
+        id_event = self.events.get('message', None)
+
+        if src not in self.accounts or dest not in self.accounts:
+            return None
+
+        id_src = self.accounts[src].id_account
+        id_dest = self.accounts[dest].id_account
+
+        if from_t is None:
+            from_t = float('-inf')
+
+        if to_t is None:
+            to_t = float('inf')
+
+        if backwards:
+            query = Logger.SELECT_CHATS_PAGE_BACKWARDS
+
+            if cursor is None:
+                cursor = (float('inf'), 0)
+        else:
+            query = Logger.SELECT_CHATS_PAGE
+
+            if cursor is None:
+                cursor = (float('-inf'), 0)
+
+        tmstp, id_time = cursor
+
+        self.execute(query, (id_event, id_src, id_dest, id_src, id_dest,
+            from_t, to_t, tmstp, tmstp, id_time, page_size))
+
+        rows = self.cursor.fetchall()
+
+        if len(rows) < page_size:
+            next_cursor = None
+        else:
+            next_cursor = (rows[-1][1], rows[-1][5])
+
+        if backwards:
+            rows.reverse()
+
+        return ([row[:5] for row in rows], next_cursor)
+
+    def iter_chats(self, src, dest, page_size, backwards=True, from_t=None,
+            to_t=None):
+        '''iterate over all the chats between src and dest yielding pages of
+        page_size chats, only one page is in memory at a time, see
+        get_chats_page for the meaning of the arguments'''
+        cursor = None
+
+        while True:
+            result = self.get_chats_page(src, dest, page_size, cursor,
+                backwards, from_t, to_t)
+
+            if result is None:
+                return
+
+            rows, cursor = result
+
+            if rows:
+                yield rows
+
+            if cursor is None:
+                return
+
+    def search_messages(self, account, query, limit):
+        '''return the last # messages sent or received by account that
+        contain all the words in query (or the whole query if fts is not
+        available), where # is the limit value, rows have the same format
+        as get_chats, newest first'''
+        id_event = self.events.get('message', None)
+        words = query.split()
+
+        if account not in self.accounts or not words:
+            return None
+
+        id_account = self.accounts[account].id_account
+
+        if self.fts:
+            match = ' '.join('"%s"' % (word.replace('"', ''),)
+                for word in words)
+            self.execute(Logger.SEARCH_MESSAGES, (unicode(match), id_event,
+                id_account, id_account, limit))
+        else:
+            pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace(
+                '_', '\\_')
+            self.execute(Logger.SEARCH_MESSAGES_LIKE, (u'%' + pattern + u'%',
+                id_event, id_account, id_account, limit))
+
+        return self.cursor.fetchall()
+
     def add_groups(self, groups):
         '''add all groups to the database'''
         existing = set(self.groups.keys())
@@ -719,8 +971,43 @@ class Logger(object):
                 local_account.groups.remove(gid)
                 self.delete_account_by_group(local_account.id_account, local_group.id)
 
+class LoggerReader(Logger):
+    '''a read only connection to the database of a Logger, used to answer
+    the get_* queries from threads other than the one that writes, the
+    account, event and group caches are shared with the Logger'''
+
+    def __init__(self, logger):
+        '''constructor'''
+        self.path = logger.path
+        self.db_name = logger.db_name
+
+        self.events = logger.events
+        self.groups = logger.groups
+        self.accounts = logger.accounts
+
+        full_path = os.path.join(self.path, self.db_name)
+        self.connection = sqlite.connect(full_path)
+        self.cursor = self.connection.cursor()
+        self.execute('PRAGMA query_only=ON;')
+
+        self._count = 0
+        self._batch = False
+        self.fts = logger.fts
+
 class LoggerProcess(threading.Thread):
-    '''a process that exposes a thread safe api to log events of a session'''
+    '''a process that exposes a thread safe api to log events of a session,
+    writes are made by this thread and get_* queries are answered
+    concurrently by a pool of LoggerReader threads'''
+
+    # max number of queued write actions done in one transaction
+    BATCH_SIZE = 200
+    # max seconds to wait for more write actions before commiting a batch
+    BATCH_TIME = 0.5
+    # number of threads answering get_* queries
+    READERS = 2
+
+    WRITE_ACTIONS = ('log', 'add_groups', 'add_contacts',
+        'add_contact_by_group')
 
     def __init__(self, path, db_name="base.db"):
         '''constructor'''
@@ -731,33 +1018,41 @@ class LoggerProcess(threading.Thread):
         self.db_name = db_name
         self.logger = None
         self.input = Queue.Queue()
+        self.read_input = Queue.Queue()
         self.output = Queue.Queue()
 
         self.actions = {}
+        self.readers = []
 
     def run(self):
         '''main method'''
         data = None
         self.logger = Logger(self.path, self.db_name)
 
-        self.actions['get_event'] = self.logger.get_event
-        self.actions['get_nicks'] = self.logger.get_nicks
-        self.actions['get_messages'] = self.logger.get_messages
-        self.actions['get_status'] = self.logger.get_status
-        self.actions['get_images'] = self.logger.get_images
-        self.actions['get_sent_messages'] = self.logger.get_sent_messages
-        self.actions['get_chats'] = self.logger.get_chats
-        self.actions['get_chats_between'] = self.logger.get_chats_between
         self.actions['add_groups'] = self.logger.add_groups
         self.actions['add_contacts'] = self.logger.add_contacts
         self.actions['add_contact_by_group'] = self.logger.add_contact_by_group
 
+        for i in range(LoggerProcess.READERS):
+            reader = threading.Thread(target=self._read_loop)
+            reader.setDaemon(True)
+            reader.start()
+            self.readers.append(reader)
+
         while True:
             try:
                 data = self.input.get(True)
+
+                if data[0] in LoggerProcess.WRITE_ACTIONS:
+                    data = self._process_batch(data)
+
+                    if data is None:
+                        continue
+
                 quit = self._process(data)
 
                 if quit:
+                    self._stop_readers()
                     self.logger.close()
                     #log.debug('closing logger thread')
                     break
@@ -765,6 +1060,60 @@ class LoggerProcess(threading.Thread):
             except Queue.Empty:
                 pass
 
+    def _read_loop(self):
+        '''main method of the reader threads'''
+        reader = LoggerReader(self.logger)
+
+        while True:
+            data = self.read_input.get(True)
+
+            if data is None:
+                break
+
+            action, args = data
+            self._call(reader, action, args)
+
+        reader.close()
+
+    def _stop_readers(self):
+        '''stop the reader threads once they answered the pending queries'''
+        for reader in self.readers:
+            self.read_input.put(None)
+
+        for reader in self.readers:
+            reader.join()
+
+        self.readers = []
+
+    def _process_batch(self, data):
+        '''do data and the write actions queued after it in one transaction,
+        stops when BATCH_SIZE or BATCH_TIME is reached or when an action that
+        is not a write is found, in that case the action is returned so the
+        caller can process it, otherwise return None'''
+        count = 0
+        limit = time.time() + LoggerProcess.BATCH_TIME
+        self.logger.begin_batch()
+
+        try:
+            while data is not None and data[0] in LoggerProcess.WRITE_ACTIONS:
+                self._process(data)
+                count += 1
+                data = None
+
+                remaining = limit - time.time()
+
+                if count >= LoggerProcess.BATCH_SIZE or remaining <= 0:
+                    break
+
+                try:
+                    data = self.input.get(True, remaining)
+                except Queue.Empty:
+                    break
+        finally:
+            self.logger.end_batch()
+
+        return data
+
     def _process(self, data):
         '''process the received data'''
         action, args = data
@@ -774,22 +1123,36 @@ class LoggerProcess(threading.Thread):
             self.logger.add_event(event, status, payload, src, dest)
         elif action == 'quit':
             return True
+        elif action == 'read':
+            # the writes queued before the query are commited at this point
+            self.read_input.put(args)
         elif action in self.actions:
-            try:
-                f_args = args[:-1]
-                callback = args[-1]
-                result = self.actions[action](*f_args)
-
-                if callback:
-                    self.output.put((action, result, callback))
-            except Exception, e:
-                log.error('error calling action %s on LoggerProcess: %s' %
-                    (action, e))
+            self._call(self.logger, action, args)
         else:
             log.error('invalid action %s on LoggerProcess' % (action,))
 
         return False
 
+    def _call(self, logger, action, args):
+        '''call the method named action on logger, if the last argument
+        is a callback put the result on the output queue'''
+        try:
+            f_args = args[:-1]
+            callback = args[-1]
+            result = getattr(logger, action)(*f_args)
+
+            if callback:
+                self.output.put((action, result, callback))
+        except Exception, e:
+            log.error('error calling action %s on LoggerProcess: %s' %
+                (action, e))
+
+    def _put_read(self, action, args):
+        '''queue a query for the reader threads, it goes through this thread
+        first so it's answered after the writes queued before it are
+        commited'''
+        self.input.put(('read', (action, args)))
+
     def check(self, sync=False):
         '''call this method from the main thread if you dont want to have
         problems with threads, it will extract the results and call the
@@ -822,43 +1185,86 @@ class LoggerProcess(threading.Thread):
     def get_event(self, account, event, limit, callback):
         '''return the last # events of account, if event or account doesnt
         exist return None'''
-        self.input.put(('get_event', (account, event, limit, callback)))
+        self._put_read('get_event', (account, event, limit, callback))
 
     def get_nicks(self, account, limit, callback):
         '''return the last # nicks from account, where # is the limit value'''
-        self.input.put(('get_nicks', (account, limit, callback)))
+        self._put_read('get_nicks', (account, limit, callback))
 
     def get_messages(self, account, limit, callback):
         '''return the last # messages from account, where # is the limit value
         '''
-        self.input.put(('get_messages', (account, limit, callback)))
+        self._put_read('get_messages', (account, limit, callback))
 
     def get_status(self, account, limit, callback):
         '''return the last # status from account, where # is the limit value
         '''
-        self.input.put(('get_status', (account, limit, callback)))
+        self._put_read('get_status', (account, limit, callback))
 
     def get_images(self, account, limit, callback):
         '''return the last # images from account, where # is the limit value
         '''
-        self.input.put(('get_images', (account, limit, callback)))
+        self._put_read('get_images', (account, limit, callback))
 
     def get_sent_messages(self, src, dest, limit, callback):
         '''return the last # sent from src to dest , where # is the limit value
         '''
-        self.input.put(('get_sent_messages', (src, dest, limit, callback)))
+        self._put_read('get_sent_messages', (src, dest, limit, callback))
 
     def get_chats(self, src, dest, limit, callback):
         '''return the last # sent from src to dest or from dest to src ,
         where # is the limit value
         '''
-        self.input.put(('get_chats', (src, dest, limit, callback)))
+        self._put_read('get_chats', (src, dest, limit, callback))
 
     def get_chats_between(self, src, dest, from_t, to_t, limit, callback):
         '''return the last # sent from src to dest or from dest to src ,
         between two timestamps from_t and to_t, where # is the limit value
         '''
-        self.input.put(('get_chats_between', (src, dest, from_t, to_t, limit, callback)))
+        self._put_read('get_chats_between', (src, dest, from_t, to_t, limit, callback))
+
+    def search_messages(self, account, query, limit, callback):
+        '''return the last # messages sent or received by account that
+        contain all the words in query, where # is the limit value
+        '''
+        self._put_read('search_messages', (account, query, limit, callback))
+
+    def get_chats_page(self, src, dest, page_size, cursor, backwards,
+            from_t, to_t, callback):
+        '''call callback with a tuple (rows, cursor) containing at most
+        page_size chats between src and dest older (if backwards is True) or
+        newer than cursor, pass the returned cursor to get the next page,
+        see Logger.get_chats_page
+        '''
+        self._put_read('get_chats_page', (src, dest, page_size, cursor,
+            backwards, from_t, to_t, callback))
+
+    def iter_chats(self, src, dest, page_size, backwards, from_t, to_t,
+            callback):
+        '''call callback once for each page of page_size chats between src
+        and dest, and once more with an empty list when there are no more
+        pages, the next page is queried when callback returns so only one
+        page is in memory at a time
+        '''
+        def page_callback(result):
+            '''pass the page to callback and query the next one'''
+            if result is None:
+                callback([])
+                return
+
+            rows, cursor = result
+
+            if rows:
+                callback(rows)
+
+            if cursor is None:
+                callback([])
+            else:
+                self.get_chats_page(src, dest, page_size, cursor, backwards,
+                    from_t, to_t, page_callback)
+
+        self.get_chats_page(src, dest, page_size, None, backwards, from_t,
+            to_t, page_callback)
 
     def add_groups(self, groups):
         '''add all groups to the database'''
@@ -20,6 +20,8 @@ class Message(object):
     '''a class that represent a msn message'''
     (TYPE_MESSAGE, TYPE_TYPING, TYPE_NUDGE, TYPE_P2P, TYPE_UNK, TYPE_FLNMSG) = range(6)
 
+    __slots__ = ('type', 'body', 'account', 'timestamp', 'style')
+
     def __init__(self, type_, body, account, style=None, timestamp=None):
         self.type = type_
         self.body = body
@@ -39,6 +41,9 @@ class Message(object):
 class Style(object):
     '''a class that represents the style of a message'''
 
+    __slots__ = ('font', 'size', 'color', 'bold', 'italic', 'underline',
+        'strike')
+
     def __init__(self, font='Arial', color=None, bold=False, italic=False,
         underline=False, strike=False, size_=None):
         self.font = font
@@ -90,6 +95,8 @@ class Style(object):
 class Color(object):
     '''a class representing a RGBA color'''
 
+    __slots__ = ('red', 'green', 'blue', 'alpha')
+
     def __init__(self, red=0, green=0, blue=0, alpha=0):
         '''class contructor'''
 
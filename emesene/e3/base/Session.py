@@ -82,8 +82,9 @@ class Session(object):
     account = property(fset=_set_account, fget=_get_account)
 
     def add_event(self, id_, *args):
-        '''add an event to the events queue'''
+        '''add an event to the events queue and notify the gui'''
         self.events.put(Event(id_, *args))
+        self.signals.notify()
 
     def add_action(self, id_, *args):
         '''add an action to the action queue'''
@@ -2,6 +2,7 @@
 
 from AvatarCache import AvatarCache
 from EmoticonCache import EmoticonCache
+from ThumbnailCache import ThumbnailCache
 
 class CacheManager(object):
     '''a cache manager class
@@ -17,6 +18,7 @@ class CacheManager(object):
 
         self.avatars = {}
         self.emoticons = {}
+        self.thumbnails = None
 
     def get_avatar_cache(self, account):
         '''return an AvatarCache instance for account
@@ -38,3 +40,11 @@ class CacheManager(object):
         self.emoticons[account] = EmoticonCache(self.base_path, account)
         return self.emoticons[account]
 
+    def get_thumbnail_cache(self):
+        '''return the ThumbnailCache instance shared by all the accounts
+        if the cache doesn't exist create it
+        '''
+        if self.thumbnails is None:
+            self.thumbnails = ThumbnailCache(self.base_path)
+
+        return self.thumbnails
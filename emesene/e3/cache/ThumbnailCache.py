@@ -0,0 +1,211 @@
+'''a module to define a cache class for scaled down avatars
+'''
+import os
+import re
+import tempfile
+import threading
+
+import Cache
+
+class ThumbnailCache(Cache.Cache):
+    '''a class to maintain a cache of avatars scaled to the sizes used by
+    the gui, the thumbnails are stored by the hash of the content of the
+    avatar so a changed avatar never uses an old thumbnail, when there are
+    more than max_items the least recently used are removed
+    '''
+
+    MAX_ITEMS = 1000
+    # fraction of max_items kept when the old thumbnails are removed, so
+    # the directory isn't listed on each insert
+    PRUNE_FACTOR = 0.8
+
+    # the name of the avatars stored on AvatarCache is the hash of the file
+    HASH_RE = re.compile('^[0-9a-f]{40}$')
+    NAME_RE = re.compile('^([0-9a-f]{40})_(\d+)x(\d+)$')
+
+    def __init__(self, config_path, max_items=MAX_ITEMS):
+        '''constructor
+        config_path -- the path where the base configuration is located
+        max_items -- the maximum number of thumbnails stored
+        '''
+        Cache.Cache.__init__(self, config_path, 'thumbnails', True)
+        self.max_items = max_items
+        # the number of thumbnails on the directory, counted on the first
+        # insert
+        self.count = None
+        self.lock = threading.Lock()
+
+    def get_hash(self, path):
+        '''return the hash of the content of the avatar on path, None if
+        it can't be read
+        '''
+        name = os.path.basename(path)
+
+        if ThumbnailCache.HASH_RE.match(name):
+            return name
+
+        return Cache.get_file_path_hash(path)
+
+    def get_path(self, hash_, size):
+        '''return the path of the thumbnail of hash_ with size (width,
+        height), the file may not exist
+        '''
+        return os.path.join(self.path, '%s_%dx%d' % ((hash_,) + tuple(size)))
+
+    def lookup(self, path, size):
+        '''return a tuple (hash, thumbnail path) for the avatar on path, the
+        thumbnail path is None if there is no thumbnail of that size yet
+        '''
+        hash_ = self.get_hash(path)
+
+        if hash_ is None:
+            return None, None
+
+        thumbnail = self.get_path(hash_, size)
+
+        try:
+            # the modification time is the last use
+            os.utime(thumbnail, None)
+        except OSError:
+            return hash_, None
+
+        return hash_, thumbnail
+
+    def parse(self):
+        '''return a list of tuples (hash, (width, height)) of the thumbnails
+        on the cache directory
+        '''
+        items = []
+
+        for name in os.listdir(self.path):
+            match = ThumbnailCache.NAME_RE.match(name)
+
+            if match:
+                hash_, width, height = match.groups()
+                items.append((hash_, (int(width), int(height))))
+
+        return items
+
+    def list(self):
+        '''return a list of tuples (hash, (width, height)) of the elements
+        on cache
+        '''
+        return self.parse()
+
+    def insert(self, item):
+        '''insert a new item into the cache
+        return the path of the thumbnail on success None otherwise
+        item -- a tuple (hash, (width, height), data) where data is the
+        content of the scaled image
+        '''
+        hash_, size, data = item
+
+        if not ThumbnailCache.HASH_RE.match(hash_):
+            return None
+
+        # write to a temporary file and rename it so other threads never
+        # read a partial thumbnail
+        handle, temp_path = tempfile.mkstemp(dir=self.path)
+        path = self.get_path(hash_, size)
+
+        try:
+            try:
+                os.write(handle, data)
+            finally:
+                os.close(handle)
+
+            exists = os.path.exists(path)
+            os.rename(temp_path, path)
+        except (OSError, IOError):
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+            raise
+
+        if not exists:
+            self._added()
+
+        return path
+
+    def _added(self):
+        '''count a new thumbnail, remove the least recently used ones if
+        there are more than max_items'''
+        self.lock.acquire()
+
+        try:
+            if self.count is None:
+                self.count = len(self.parse())
+            else:
+                self.count += 1
+
+            if self.count > self.max_items:
+                self._prune(int(self.max_items *
+                    ThumbnailCache.PRUNE_FACTOR))
+        finally:
+            self.lock.release()
+
+    def prune(self, max_items):
+        '''remove the least recently used thumbnails until there are at
+        most max_items, return the number of thumbnails removed
+        '''
+        self.lock.acquire()
+
+        try:
+            return self._prune(max_items)
+        finally:
+            self.lock.release()
+
+    def _prune(self, max_items):
+        '''prune without taking the lock'''
+        items = []
+
+        for hash_, size in self.parse():
+            path = self.get_path(hash_, size)
+
+            try:
+                items.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+
+        items.sort()
+        removed = 0
+
+        for mtime, path in items[:max(0, len(items) - max_items)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        self.count = len(items) - removed
+        return removed
+
+    def remove(self, item):
+        '''remove all the thumbnails of an avatar
+        return True if some thumbnail was removed False otherwise
+        item -- the hash of the avatar
+        '''
+        removed = False
+
+        for hash_, size in self.list():
+            if hash_ == item:
+                os.remove(self.get_path(hash_, size))
+                removed = True
+
+        if removed:
+            # counted again on the next insert
+            self.count = None
+
+        return removed
+
+    def __contains__(self, name):
+        '''return True if name is in cache, False otherwise
+        name -- the hash of an avatar
+        '''
+        for hash_, size in self.list():
+            if hash_ == name:
+                return True
+
+        return False
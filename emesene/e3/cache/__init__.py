@@ -1,3 +1,4 @@
 from AvatarCache import AvatarCache
 from CacheManager import CacheManager
 from EmoticonCache import EmoticonCache
+from ThumbnailCache import ThumbnailCache
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+#    This file is part of emesene.
+#
+#    emesene is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    emesene is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with emesene; if not, write to the Free Software
+#    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import threading
+
+class _OrderedDict(object):
+    '''the part of collections.OrderedDict used by LRUCache, for python
+    versions older than 2.7, the order is kept on a doubly linked list'''
+
+    def __init__(self):
+        '''class constructor'''
+        # key as key and the link [previous, next, key, value] as value
+        self.links = {}
+        self.root = []
+        self.root[:] = [self.root, self.root, None, None]
+
+    def __len__(self):
+        '''return the number of items'''
+        return len(self.links)
+
+    def __contains__(self, key):
+        '''return True if key is on the dict'''
+        return key in self.links
+
+    def __setitem__(self, key, value):
+        '''set the value of key, a new key is added at the end'''
+        link = self.links.get(key, None)
+
+        if link is None:
+            last = self.root[0]
+            link = [last, self.root, key, value]
+            last[1] = self.root[0] = self.links[key] = link
+        else:
+            link[3] = value
+
+    def pop(self, key, default=None):
+        '''remove key and return its value, default if it's not there'''
+        link = self.links.pop(key, None)
+
+        if link is None:
+            return default
+
+        link[0][1] = link[1]
+        link[1][0] = link[0]
+        return link[3]
+
+    def popitem(self, last=True):
+        '''remove and return the last (key, value), or the first if last
+        is False'''
+        if not self.links:
+            raise KeyError('dictionary is empty')
+
+        if last:
+            key = self.root[0][2]
+        else:
+            key = self.root[1][2]
+
+        return (key, self.pop(key))
+
+    def clear(self):
+        '''remove all the items'''
+        self.links.clear()
+        self.root[:] = [self.root, self.root, None, None]
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = _OrderedDict
+
+class LRUCache(object):
+    '''a dict like object that keeps the total size of its values under
+    max_size removing the least recently used items, the size of each value
+    is calculated with sizeof, if not given each item has size 1 so max_size
+    is the number of items'''
+
+    def __init__(self, max_size=100, sizeof=None):
+        '''class constructor'''
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+
+        # key as key and a tuple (value, size) as value, the last item is
+        # the most recently used
+        self.items = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        '''return the number of items on the cache'''
+        return len(self.items)
+
+    def __contains__(self, key):
+        '''return True if key is on the cache, doesn't count as a use'''
+        return key in self.items
+
+    def get(self, key, default=None):
+        '''return the value of key and mark it as recently used, default
+        if key is not on the cache'''
+        self.lock.acquire()
+
+        try:
+            item = self.items.pop(key, None)
+
+            if item is None:
+                self.misses += 1
+                return default
+
+            self.items[key] = item
+            self.hits += 1
+            return item[0]
+        finally:
+            self.lock.release()
+
+    def put(self, key, value):
+        '''add value to the cache with key, remove the least recently used
+        items if the cache gets bigger than max_size, a value bigger than
+        max_size is not stored'''
+        size = self.sizeof(value)
+
+        self.lock.acquire()
+
+        try:
+            self._remove(key)
+
+            if size > self.max_size:
+                return
+
+            self.items[key] = (value, size)
+            self.size += size
+            self._shrink()
+        finally:
+            self.lock.release()
+
+    def remove(self, key):
+        '''remove key from the cache if it's there'''
+        self.lock.acquire()
+
+        try:
+            self._remove(key)
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        '''remove all the items from the cache'''
+        self.lock.acquire()
+
+        try:
+            self.items.clear()
+            self.size = 0
+        finally:
+            self.lock.release()
+
+    def set_max_size(self, max_size):
+        '''change the maximum size of the cache, remove items if needed'''
+        self.lock.acquire()
+
+        try:
+            self.max_size = max_size
+            self._shrink()
+        finally:
+            self.lock.release()
+
+    def stats(self):
+        '''return a dict with the counters of the cache'''
+        return dict(hits=self.hits, misses=self.misses,
+            evictions=self.evictions, items=len(self.items), size=self.size,
+            max_size=self.max_size)
+
+    def _remove(self, key):
+        '''remove key without taking the lock'''
+        item = self.items.pop(key, None)
+
+        if item is not None:
+            self.size -= item[1]
+
+    def _shrink(self):
+        '''remove the least recently used items until the size is under
+        max_size'''
+        while self.size > self.max_size and self.items:
+            size = self.items.popitem(last=False)[1][1]
+            self.size -= size
+            self.evictions += 1
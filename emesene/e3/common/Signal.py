@@ -16,72 +16,162 @@
 #    along with emesene; if not, write to the Free Software
 #    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
+import time
+import weakref
 import functools
+import traceback
+
 import logging
 log = logging.getLogger('e3.common.Signal')
 
-import weakref
-import traceback
-
 class Signal(object):
     '''an object that represents a signal a callback can subscribe
-    to the signal, when emited all the callbacks are called until the end or
-    until one callback returns False'''
+    to the signal, when emited all the callbacks are called in the order they
+    subscribed, the callbacks are weak references so subscribing doesn't keep
+    the objects alive'''
+
+    # when True the calls of each callback are counted and timed, see
+    # set_profiling
+    profiling = False
+    # callback name as key and a list [calls, total time, max time] as value
+    stats = {}
 
     def __init__(self):
         '''constructor'''
-        self._subscribers = {}
+        # a tuple of (key, ref, function, args, kwargs, name), it's replaced
+        # on each subscription so emit doesn't need to copy it
+        self._subscribers = ()
 
     def subscribe(self, callback, *args, **kwargs):
         '''subscribe to the signal, when the signal is emited, callback will be
-        called
+        called with the arguments of emit followed by args and kwargs,
+        subscribing again the same callback replaces its arguments
         '''
-        self._subscribers[WeakMethod(callback)] = (args, kwargs)
+        key = _get_key(callback)
+
+        if hasattr(callback, 'im_func'):
+            entry = (key, weakref.ref(callback.im_self), callback.im_func,
+                args, kwargs, format_callback_name(callback))
+        else:
+            entry = (key, weakref.ref(callback), None, args, kwargs,
+                format_callback_name(callback))
+
+        subscribers = list(self._subscribers)
+
+        for (index, current) in enumerate(subscribers):
+            if current[0] == key:
+                subscribers[index] = entry
+                break
+        else:
+            subscribers.append(entry)
+
+        self._subscribers = tuple(subscribers)
 
     def unsubscribe(self, callback):
-        '''remove the callback from the subscribers dict, raise KeyError if
-        the callback is not registered (made this way to avoid abuse of the api)
-        '''
-        if callback in self._subscribers:
-            del(self._subscribers[callback])
+        '''remove the callback from the subscribers if it's there'''
+        key = _get_key(callback)
+        self._subscribers = tuple(entry for entry in self._subscribers
+            if entry[0] != key)
 
     def emit(self, *args, **kwargs):
-        '''emit the signal with args and kwargs, if a callback returns False
-        then the remaining callbacks are not called
+        '''emit the signal with args and kwargs, the callbacks of objects
+        that don't exist anymore are removed after the emission
         '''
-        to_remove = []
+        dead = False
+        profiling = Signal.profiling
 
-        for callback, cargs in self._subscribers.items():
-            cargs, ckwargs = cargs
-            args += cargs
-            kwargs.update(ckwargs)
+        for (key, ref, func, cargs, ckwargs, name) in self._subscribers:
+            target = ref()
 
-            if callback is None:
-                print "callback is None in emit"
+            if target is None:
+                dead = True
                 continue
 
+            if cargs:
+                call_args = args + cargs
+            else:
+                call_args = args
+
+            if ckwargs:
+                call_kwargs = kwargs.copy()
+                call_kwargs.update(ckwargs)
+            else:
+                call_kwargs = kwargs
+
+            if profiling:
+                start = time.time()
+
             try:
-                if callback(*args, **kwargs) == False:
-                    break
-            except TypeError:
-                to_remove.append(callback)
-                traceback.print_exc()
+                if func is None:
+                    target(*call_args, **call_kwargs)
+                else:
+                    func(target, *call_args, **call_kwargs)
             except Exception, error:
                 log.warning('Signal handler (%s) error: %s' %
-                        (format_callback_name(callback), str(error)))
+                        (name, str(error)))
                 traceback.print_exc()
 
-        for item in to_remove:
-            del self._subscribers[item]
+            if profiling:
+                _record(name, time.time() - start)
+
+        if dead:
+            self._subscribers = tuple(entry for entry in self._subscribers
+                if entry[1]() is not None)
+
+    @classmethod
+    def set_profiling(cls, profiling=True):
+        '''enable or disable the timing of the callbacks of all the signals'''
+        cls.profiling = profiling
+
+    @classmethod
+    def get_stats(cls):
+        '''return a list of tuples (name, calls, total time, max time) of
+        the callbacks called while profiling, slowest first'''
+        stats = [(name, calls, total, max_time)
+            for (name, (calls, total, max_time)) in cls.stats.items()]
+        stats.sort(key=lambda item: item[2], reverse=True)
+
+        return stats
+
+    @classmethod
+    def log_stats(cls, limit=20):
+        '''log the stats of the slowest callbacks if profiling is enabled'''
+        if not cls.profiling:
+            return
+
+        for (name, calls, total, max_time) in cls.get_stats()[:limit]:
+            log.info('%s: %d calls, %.3fs total, %.3fs max' % (name, calls,
+                total, max_time))
+
+def _get_key(callback):
+    '''return the value used to compare callbacks, bound methods are
+    different objects each time they are accessed'''
+    if hasattr(callback, 'im_func'):
+        return (id(callback.im_self), callback.im_func)
+
+    return (id(callback), None)
+
+def _record(name, elapsed):
+    '''add a call of the callback name to the stats'''
+    stats = Signal.stats.get(name, None)
+
+    if stats is None:
+        Signal.stats[name] = [1, elapsed, elapsed]
+    else:
+        stats[0] += 1
+        stats[1] += elapsed
+
+        if elapsed > stats[2]:
+            stats[2] = elapsed
 
 def format_callback_name(func):
     '''return a pretty representation for a function name
     '''
-    if type(func) == WeakMethodBound:
-        return func.f.__name__ + "." + func.f.__name__
-    else:
+    if hasattr(func, 'im_func'):
         return func.im_class.__name__ + "." + func.__name__
 
+    return getattr(func, '__name__', repr(func))
+
 def extend(func):
     '''allow the extention of a method'''
 
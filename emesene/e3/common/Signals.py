@@ -17,31 +17,128 @@
 #    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 import Queue
+import threading
 
 import Signal
 
 class Signals(object):
     '''a class that conversats e3 signals into gui.Signal'''
 
+    # max number of events converted on each call to _handle_events
+    BATCH_SIZE = 100
+    # events that are merged when more than one is pending on the same
+    # batch, the value is the number of arguments that identify it (for
+    # example account and attribute), only the first one is emitted so the
+    # handlers receive the oldest old value
+    COALESCE = {'contact attr changed': 2}
+
     def __init__(self, events, event_queue):
         self.events = events
         self.event_queue = event_queue
         self.event_names = tuple(sorted(events))
+        self._coalesce = {}
+
+        for (event, nargs) in Signals.COALESCE.iteritems():
+            if event in self.event_names:
+                self._coalesce[self.event_names.index(event)] = nargs
+
+        # see set_notifier
+        self._notifier = None
+        self._scheduled = False
+        self._lock = threading.Lock()
 
         for event in events:
             event = event.replace(' ', '_')
             setattr(self, event, Signal.Signal())
 
+    def set_notifier(self, notifier):
+        '''set a callable that schedules a call to _dispatch_events on the
+        main loop of the gui (for example with idle_add), it's called from
+        the thread that adds the event and only if a call is not already
+        scheduled. if None the gui must poll _handle_events'''
+        self._notifier = notifier
+
+        if notifier is not None and not self.event_queue.empty():
+            self.notify()
+
+    def notify(self):
+        '''called each time an event is added to the queue'''
+        notifier = self._notifier
+
+        if notifier is None:
+            return
+
+        self._lock.acquire()
+
+        try:
+            if self._scheduled:
+                return
+
+            self._scheduled = True
+        finally:
+            self._lock.release()
+
+        notifier()
+
+    def _dispatch_events(self):
+        '''convert the events on the queue in batches, called on the main
+        loop of the gui when the notifier scheduled it, return True if it
+        must be called again because there are events left'''
+        self._lock.acquire()
+        self._scheduled = False
+        self._lock.release()
+
+        if not self._handle_batch():
+            return False
+
+        self._lock.acquire()
+
+        try:
+            if self._scheduled:
+                # an event added meanwhile already scheduled another call
+                return False
+
+            self._scheduled = True
+            return True
+        finally:
+            self._lock.release()
+
     def _handle_events(self):
-        '''convert Event object on the queue to gui.Signal'''
-        while True:
+        '''convert Event object on the queue to gui.Signal, at most
+        BATCH_SIZE on each call'''
+        self._handle_batch()
+        return True
+
+    def _handle_batch(self):
+        '''convert at most BATCH_SIZE events merging the ones in COALESCE,
+        return True if the limit was reached and there may be events left'''
+        events = []
+        seen = set()
+        full = True
+
+        for i in xrange(Signals.BATCH_SIZE):
             try:
                 event = self.event_queue.get(False)
-
-                if event.id_ < len(self.event_names):
-                    event_name = self.event_names[event.id_].replace(' ', '_')
-                    signal = getattr(self, event_name)
-                    signal.emit(*event.args)
             except Queue.Empty:
+                full = False
                 break
-        return True
+
+            nargs = self._coalesce.get(event.id_, None)
+
+            if nargs is not None:
+                key = (event.id_,) + tuple(event.args[:nargs])
+
+                if key in seen:
+                    continue
+
+                seen.add(key)
+
+            events.append(event)
+
+        for event in events:
+            if event.id_ < len(self.event_names):
+                event_name = self.event_names[event.id_].replace(' ', '_')
+                signal = getattr(self, event_name)
+                signal.emit(*event.args)
+
+        return full
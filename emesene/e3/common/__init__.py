@@ -30,6 +30,7 @@ from Signal import Signal
 from Signals import Signals
 from ConfigDir import ConfigDir
 from RingBuffer import RingBuffer
+from LRUCache import LRUCache
 from MessageFormatter import MessageFormatter
 
 
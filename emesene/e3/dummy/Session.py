@@ -1,20 +1,16 @@
 import Worker
 import e3
 import extension
+import metadata
 
 class Session(e3.Session):
     '''a specialization of e3.Session'''
-    NAME = 'Dummy session'
-    DESCRIPTION = 'Session to test the client (no connection)'
-    AUTHOR = 'Mariano Guerra'
-    WEBSITE = 'www.emesene.org'
-
-    SERVICES = {
-        "dummy": {
-            "host": "dummy.server.com",
-            "port": "1337"
-        }
-    }
+    NAME = metadata.NAME
+    DESCRIPTION = metadata.DESCRIPTION
+    AUTHOR = metadata.AUTHOR
+    WEBSITE = metadata.WEBSITE
+
+    SERVICES = metadata.SERVICES
 
     def __init__(self, id_=None, account=None):
         '''constructor'''
@@ -1,2 +1,2 @@
-from Worker import Worker
-from Session import Session
+'''the dummy backend, its modules are imported when the session is used,
+importing the package only gives access to the metadata'''
@@ -0,0 +1,14 @@
+'''the metadata of the dummy session, it doesn't import anything so it can
+be read without loading the backend'''
+
+NAME = 'Dummy session'
+DESCRIPTION = 'Session to test the client (no connection)'
+AUTHOR = 'Mariano Guerra'
+WEBSITE = 'www.emesene.org'
+
+SERVICES = {
+    "dummy": {
+        "host": "dummy.server.com",
+        "port": "1337"
+    }
+}
@@ -1,23 +1,15 @@
 from Worker import Worker
 import e3
+import metadata
 
 class Session(e3.Session):
     '''a specialization of e3.Session'''
-    NAME = 'Jabber session'
-    DESCRIPTION = 'Session to connect to the Jabber network'
-    AUTHOR = 'Mariano Guerra'
-    WEBSITE = 'www.emesene.org'
-
-    SERVICES = {
-        "gtalk": {
-            "host": "talk.google.com",
-            "port": "5223"
-        },
-        "facebook": {
-            "host": "chat.facebook.com",
-            "port": "5222"
-        }
-    }
+    NAME = metadata.NAME
+    DESCRIPTION = metadata.DESCRIPTION
+    AUTHOR = metadata.AUTHOR
+    WEBSITE = metadata.WEBSITE
+
+    SERVICES = metadata.SERVICES
 
     def __init__(self, id_=None, account=None):
         '''constructor'''
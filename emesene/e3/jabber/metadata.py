@@ -0,0 +1,18 @@
+'''the metadata of the jabber session, it doesn't import anything so it
+can be read without loading the backend'''
+
+NAME = 'Jabber session'
+DESCRIPTION = 'Session to connect to the Jabber network'
+AUTHOR = 'Mariano Guerra'
+WEBSITE = 'www.emesene.org'
+
+SERVICES = {
+    "gtalk": {
+        "host": "talk.google.com",
+        "port": "5223"
+    },
+    "facebook": {
+        "host": "chat.facebook.com",
+        "port": "5222"
+    }
+}
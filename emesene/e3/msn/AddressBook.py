@@ -0,0 +1,269 @@
+'''defines a snapshot of the address book stored on disk to request only the
+changes on the next login'''
+
+import os
+import re
+import threading
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+import logging
+log = logging.getLogger('msn.AddressBook')
+
+# the last change sent to get the full lists
+FULL_CHANGE = '0001-01-01T00:00:00.0000000-08:00'
+
+# the fields of the contacts used by the requesters
+CONTACT_FIELDS = ('contactId', 'CID', 'passportName', 'displayName',
+    'isMessengerUser', 'isMobileIMEnabled', 'hasSpace', 'contactType')
+
+def get_last_change(body, tag):
+    '''return the most recent timestamp on the tags named tag of the body
+    of a response, None if there is none, all the timestamps on a response
+    have the same format so they can be compared as strings'''
+    changes = re.findall('<%s>([^<]+)</%s>' % (tag, tag), body)
+
+    if changes:
+        return max(changes)
+
+    return None
+
+class AddressBook(object):
+    '''the memberships, contacts and groups of an account as they were the
+    last time they were received from the server with the timestamp of the
+    last change of each list, the dicts have the same format than the items
+    returned by the membership and dynamic items parsers'''
+
+    VERSION = 1
+
+    def __init__(self, path):
+        '''class constructor'''
+        self.path = path
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        '''forget everything, the next requests will get the full lists'''
+        self.membership_change = None
+        self.contacts_change = None
+        # account as key and a dict with the roles, the nick and the cid as
+        # value
+        self.members = {}
+        # the roles in the order the server sent them
+        self.roles = []
+        # contact id as key and a dict with the fields on CONTACT_FIELDS
+        # plus the groupIds and the alias as value
+        self.contacts = {}
+        # group id as key and name as value
+        self.groups = {}
+        # a tuple (cid, nick) of our own contact
+        self.me = (None, None)
+
+    def load(self):
+        '''load the snapshot from disk, return True if it was loaded'''
+        if not os.path.isfile(self.path):
+            return False
+
+        try:
+            handle = file(self.path)
+
+            try:
+                content = json.load(handle)
+            finally:
+                handle.close()
+
+            if content.get('version') != AddressBook.VERSION:
+                return False
+
+            self.membership_change = _to_str(content['membership_change'])
+            self.contacts_change = _to_str(content['contacts_change'])
+            self.members = _to_str(content['members'])
+            self.roles = _to_str(content['roles'])
+            self.contacts = _to_str(content['contacts'])
+            self.groups = _to_str(content['groups'])
+            self.me = tuple(_to_str(content['me']))
+        except Exception, exception:
+            log.warning("couldn't load address book %s: %s" % (self.path,
+                str(exception)))
+            self.clear()
+            return False
+
+        return True
+
+    def save(self):
+        '''write the snapshot to disk'''
+        content = dict(version=AddressBook.VERSION,
+            membership_change=self.membership_change,
+            contacts_change=self.contacts_change, members=self.members,
+            roles=self.roles, contacts=self.contacts, groups=self.groups,
+            me=list(self.me))
+
+        temp_path = self.path + '.tmp'
+
+        self.lock.acquire()
+
+        try:
+            handle = file(temp_path, 'w')
+
+            try:
+                json.dump(content, handle, separators=(',', ':'))
+            finally:
+                handle.close()
+
+            # rename doesn't replace the file on windows
+            if os.name == 'nt' and os.path.exists(self.path):
+                os.remove(self.path)
+
+            os.rename(temp_path, self.path)
+        except (IOError, OSError), exception:
+            log.warning("couldn't save address book %s: %s" % (self.path,
+                str(exception)))
+        finally:
+            self.lock.release()
+
+    def update_memberships(self, memberships, last_change, delta):
+        '''merge the memberships received from the server, if delta is
+        False they replace the ones on the snapshot'''
+        if not delta:
+            self.members = {}
+            self.roles = []
+
+        for membership in memberships:
+            role = membership['MemberRole']
+
+            if role not in self.roles:
+                self.roles.append(role)
+
+            for member in membership['Members']:
+                if 'PassportName' not in member:
+                    continue
+
+                email = member['PassportName'].lower()
+                current = self.members.get(email, None)
+
+                if member.get('Deleted', 'false') == 'true':
+                    if current is not None and role in current['roles']:
+                        current['roles'].remove(role)
+
+                        if not current['roles']:
+                            del self.members[email]
+
+                    continue
+
+                if current is None:
+                    current = dict(roles=[])
+                    self.members[email] = current
+
+                if role not in current['roles']:
+                    current['roles'].append(role)
+
+                for key in ('DisplayName', 'CID'):
+                    if key in member:
+                        current[key] = member[key]
+
+        if last_change:
+            self.membership_change = last_change
+
+    def get_memberships(self):
+        '''return a list of memberships with the format returned by the
+        membership parser'''
+        roles = {}
+
+        for (email, member) in self.members.iteritems():
+            data = dict(PassportName=email)
+
+            for key in ('DisplayName', 'CID'):
+                if key in member:
+                    data[key] = member[key]
+
+            for role in member['roles']:
+                roles.setdefault(role, []).append(data)
+
+        return [dict(MemberRole=role, Members=roles[role])
+            for role in self.roles if role in roles]
+
+    def update_contacts(self, groups, contacts, last_change, delta):
+        '''merge the groups and contacts received from the server, if delta
+        is False they replace the ones on the snapshot'''
+        if not delta:
+            self.groups = {}
+            self.contacts = {}
+
+        for group in groups:
+            if 'groupId' not in group:
+                continue
+
+            if group.get('fDeleted', 'false') == 'true':
+                self.groups.pop(group['groupId'], None)
+            else:
+                self.groups[group['groupId']] = group.get('name', '')
+
+        for contact in contacts:
+            if 'contactId' not in contact:
+                continue
+
+            contact_id = contact['contactId']
+
+            if contact.get('contactType', None) == 'Me':
+                self.me = (contact.get('CID', self.me[0]),
+                    contact.get('displayName', self.me[1]))
+
+            if contact.get('fDeleted', 'false') == 'true' or \
+                    contact.get('isMessengerUser', None) != 'true' or \
+                    'passportName' not in contact:
+                self.contacts.pop(contact_id, None)
+                continue
+
+            data = dict((key, contact[key]) for key in CONTACT_FIELDS
+                if key in contact)
+            data['groupIds'] = list(contact.get('groupIds', []))
+
+            for ann in contact.get('Annotations', []):
+                if ann.get('Name', None) == 'AB.NickName':
+                    data['alias'] = ann['Value']
+                    break
+
+            self.contacts[contact_id] = data
+
+        if last_change:
+            self.contacts_change = last_change
+
+    def get_groups(self):
+        '''return a list of groups with the format returned by the dynamic
+        items parser'''
+        return [dict(groupId=gid, name=name)
+            for (gid, name) in self.groups.iteritems()]
+
+    def get_contacts(self):
+        '''return a list of contacts with the format returned by the
+        dynamic items parser'''
+        contacts = []
+
+        for data in self.contacts.itervalues():
+            contact = dict(data)
+            contact['groupIds'] = list(data['groupIds'])
+            contact['Annotations'] = []
+            alias = contact.pop('alias', None)
+
+            if alias is not None:
+                contact['Annotations'].append(dict(Name='AB.NickName',
+                    Value=alias))
+
+            contacts.append(contact)
+
+        return contacts
+
+def _to_str(obj):
+    '''convert the unicode strings returned by json to utf-8 strings like
+    the ones returned by the xml parsers'''
+    if isinstance(obj, unicode):
+        return obj.encode('utf-8')
+    elif isinstance(obj, list):
+        return [_to_str(item) for item in obj]
+    elif isinstance(obj, dict):
+        return dict((_to_str(key), _to_str(value))
+            for (key, value) in obj.iteritems())
+
+    return obj
@@ -0,0 +1,74 @@
+'''defines an object that splits the data received from the msn server in
+Command objects'''
+
+import common
+import Command
+
+class CommandParser(object):
+    '''accumulates the data received from the server on a buffer and splits
+    it in Command objects, reading the payload of the commands listed on
+    common.PAYLOAD_CMDS'''
+
+    def __init__(self):
+        '''class constructor'''
+        self.buffer = bytearray()
+        # a command that is waiting for its payload and the payload size
+        self.command = None
+        self.size = 0
+
+    def feed(self, data):
+        '''add data to the buffer, return a list with the commands that are
+        complete, the incomplete data is kept until the next call'''
+        self.buffer.extend(data)
+        commands = []
+        start = 0
+        length = len(self.buffer)
+
+        while True:
+            if self.command is not None:
+                if length - start < self.size:
+                    break
+
+                end = start + self.size
+                self.command.payload = str(self.buffer[start:end])
+                commands.append(self.command)
+                self.command = None
+                start = end
+                continue
+
+            end = self.buffer.find('\n', start)
+
+            if end == -1:
+                break
+
+            command = Command.Command.parse(str(self.buffer[start:end + 1]))
+            start = end + 1
+            size = self._payload_size(command)
+
+            if size is None:
+                commands.append(command)
+            else:
+                self.command = command
+                self.size = size
+
+        if start:
+            del self.buffer[:start]
+
+        return commands
+
+    def _payload_size(self, command):
+        '''return the size of the payload of command, None if the command
+        has no payload'''
+        if command.command not in common.PAYLOAD_CMDS:
+            return None
+
+        position = common.PAYLOAD_POSITION[command.command]
+
+        try:
+            if position == -1:
+                return int(command.tid)
+            else:
+                return int(command.params[position])
+        except (ValueError, IndexError):
+            # For commands such as ADL and RML
+            return None
@@ -16,9 +16,12 @@ class Conversation(threading.Thread):
     STATUS_ERROR) = range(5)
 
     def __init__(self, session, cid, host, port, account,
-        session_id, p2p_input, auth_id=None, proxy=None, use_http=False):
+        session_id, p2p_input, auth_id=None, proxy=None, use_http=False,
+        reactor=None):
         '''class constructor, create a socket and connect it to the specified
-        server'''
+        server, if reactor is not None the socket is handled by it and the
+        commands are processed on the reactor thread, so no thread is
+        started for the conversation'''
         threading.Thread.__init__(self)
         self.setDaemon(True)
 
@@ -28,6 +31,12 @@ class Conversation(threading.Thread):
         else:
             self.proxy = proxy
 
+        if self.proxy.use_proxy or self.use_http:
+            # the http sockets have their own thread
+            self.reactor = None
+        else:
+            self.reactor = reactor
+
         self.cid = cid
         self.host = host
         self.port = port
@@ -86,6 +95,29 @@ class Conversation(threading.Thread):
         else:
             self._on_unknown_command(message)
 
+    def start(self):
+        '''start the thread of the conversation, on reactor mode only the
+        socket is started'''
+        if self.reactor is None:
+            threading.Thread.start(self)
+        else:
+            self.socket.start()
+
+    def quit(self):
+        '''close the conversation'''
+        if self.reactor is None:
+            self.command_queue.put('quit')
+        else:
+            self._close()
+
+    def _on_socket_data(self, data):
+        '''called from the reactor thread with each command received or 0 if
+        the connection was closed'''
+        if type(data) == int and data == 0:
+            self._close()
+        else:
+            self._process(data)
+
     def run(self):
         '''the main method of the thread'''
         self.socket.start()
@@ -315,6 +347,9 @@ class Conversation(threading.Thread):
         if self.proxy.use_proxy or self.use_http:
             socket = MsnHttpSocket(host, port, dest_type='SB', proxy=self.proxy)
         else:
-            socket = MsnSocket(host, port)
+            socket = MsnSocket(host, port, self.reactor)
+
+            if self.reactor is not None:
+                socket.handler = self._on_socket_data
 
         return socket
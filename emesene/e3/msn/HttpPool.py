@@ -0,0 +1,182 @@
+'''defines a pool of persistent http connections shared by the soap requests
+and the passport login'''
+
+import time
+import socket
+import select
+import httplib
+import threading
+
+import logging
+log = logging.getLogger('msn.HttpPool')
+
+class HttpPool(object):
+    '''keeps the connections to each host open after a request so the next
+    request to the same host doesn't need a new tcp connection and tls
+    handshake, a connection is used by one thread at a time and is closed
+    after being idle for IDLE_TIMEOUT seconds'''
+
+    # seconds a connection can stay unused on the pool
+    IDLE_TIMEOUT = 60
+    # seconds to wait on connect, send and each read before failing
+    TIMEOUT = 30
+    # max idle connections kept for each host
+    MAX_IDLE = 4
+    # errors raised sending on a connection the server closed, the server
+    # didn't get the request so it can be sent again
+    STALE_ERRORS = (httplib.CannotSendRequest, socket.error)
+
+    def __init__(self, timeout=TIMEOUT):
+        '''class constructor'''
+        self.timeout = timeout
+        # (host, port) as key and a list of tuples (connection, last use)
+        # as value, the last item is the most recently used
+        self.idle = {}
+        self.lock = threading.Lock()
+
+        self.created = 0
+        self.reused = 0
+
+    def request(self, method, host, port, path, body, headers):
+        '''send the request and return a tuple (status, reason, body), if
+        sending on a reused connection fails because the server closed it
+        the request is sent again on a new one, once the request was sent
+        the errors are raised since the server may have processed it'''
+        key = (host, port)
+        conn = self._get(key)
+
+        if conn is not None:
+            try:
+                conn.request(method, path, body, headers)
+            except HttpPool.STALE_ERRORS, exception:
+                log.debug('stale connection to %s:%d (%s), reconnecting' % (
+                    host, port, str(exception)))
+                conn.close()
+                conn = None
+
+        if conn is None:
+            conn = self._connect(host, port)
+
+            try:
+                conn.request(method, path, body, headers)
+            except Exception:
+                conn.close()
+                raise
+
+        try:
+            result = self._read(conn)
+        except Exception:
+            conn.close()
+            raise
+
+        self._put(key, conn, result[3])
+
+        return result[:3]
+
+    def clear(self):
+        '''close all the idle connections'''
+        self.lock.acquire()
+
+        try:
+            idle = self.idle
+            self.idle = {}
+        finally:
+            self.lock.release()
+
+        for connections in idle.itervalues():
+            for (conn, last_use) in connections:
+                conn.close()
+
+    def stats(self):
+        '''return a dict with the counters of the pool'''
+        return dict(created=self.created, reused=self.reused,
+            idle=sum(len(connections) for connections in self.idle.values()))
+
+    def _connect(self, host, port):
+        '''create a new connection to host'''
+        self.created += 1
+
+        if port == 443:
+            return httplib.HTTPSConnection(host, port, timeout=self.timeout)
+
+        return httplib.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _read(self, conn):
+        '''read the whole response of the request sent on conn, return a
+        tuple (status, reason, body, keep) where keep is True if the
+        connection can be used again'''
+        response = conn.getresponse()
+        data = response.read()
+
+        return (response.status, response.reason, data,
+            not response.will_close)
+
+    def _is_closed(self, conn):
+        '''return True if the server closed the idle connection conn, an
+        idle connection is only readable when the server closed it'''
+        if conn.sock is None:
+            return True
+
+        try:
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (select.error, socket.error):
+            return True
+
+    def _get(self, key):
+        '''return the most recently used idle connection to key, None if
+        there is none, the expired ones are closed'''
+        now = time.time()
+        expired = []
+        conn = None
+
+        self.lock.acquire()
+
+        try:
+            connections = self.idle.get(key, [])
+
+            while connections:
+                (candidate, last_use) = connections.pop()
+
+                if now - last_use > HttpPool.IDLE_TIMEOUT:
+                    # the older ones expired too
+                    expired.append(candidate)
+                    expired.extend(item[0] for item in connections)
+                    del connections[:]
+                elif self._is_closed(candidate):
+                    expired.append(candidate)
+                else:
+                    conn = candidate
+                    self.reused += 1
+                    break
+        finally:
+            self.lock.release()
+
+        for candidate in expired:
+            candidate.close()
+
+        return conn
+
+    def _put(self, key, conn, keep):
+        '''return conn to the pool if keep is True, close it otherwise'''
+        if not keep:
+            conn.close()
+            return
+
+        self.lock.acquire()
+
+        try:
+            connections = self.idle.setdefault(key, [])
+            connections.append((conn, time.time()))
+
+            if len(connections) > HttpPool.MAX_IDLE:
+                (conn, last_use) = connections.pop(0)
+            else:
+                conn = None
+        finally:
+            self.lock.release()
+
+        if conn is not None:
+            conn.close()
+
+# the pool used by all the sessions
+pool = HttpPool()
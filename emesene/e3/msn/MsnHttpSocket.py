@@ -4,8 +4,7 @@ import urllib2
 import threading
 
 import e3
-import common
-import Command
+from CommandParser import CommandParser
 
 import logging
 log = logging.getLogger('msn.MsnHttpSocket')
@@ -55,6 +54,7 @@ class MsnHttpSocket(threading.Thread):
         
         self.input = Queue.Queue()
         self.output = Queue.Queue()
+        self.parser = CommandParser()
         self.setDaemon(True)
 
     def send(self, data):
@@ -167,24 +167,5 @@ class MsnHttpSocket(threading.Thread):
     def parse_response_body(self, data):
         '''parse the response body'''
         if data:
-            tail = data
-            # to limit the number of loops if the data we receive is corrupted
-            limit = 0
-
-            while tail != '' and limit < 20:
-                limit += 1
-                head, tail = tail.split('\r\n', 1)
-
-                command = Command.Command.parse(head + '\r\n')
-
-                if command.command in common.PAYLOAD_CMDS:
-                    position = common.PAYLOAD_POSITION[command.command]
-
-                    if position == -1:
-                        size = int(command.tid)
-                    else:
-                        size = int(command.params[position])
-
-                    command.payload, tail = tail[:size], tail[size:]
-
+            for command in self.parser.feed(data):
                 self.output.put(command)
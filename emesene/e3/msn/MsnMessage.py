@@ -6,6 +6,8 @@ import e3
 class Message(e3.Message):
     '''a class that represent a msn message'''
 
+    __slots__ = ('dest',)
+
     def __init__(self, type_, body, account, style=None, dest=''):
         if not isinstance(body, basestring):
             body = ''
@@ -119,6 +121,8 @@ class Message(e3.Message):
 class Style(e3.Style):
     '''a class that represents the style of a message'''
 
+    __slots__ = ()
+
     def __init__(self, font='Arial', color=None, bold=False, italic=False,
         underline=False, strike=False):
         e3.Style.__init__(self, font, color, bold, italic,
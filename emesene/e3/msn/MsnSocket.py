@@ -1,8 +1,7 @@
 '''defines an object that handles msn commands received from a socket'''
 
-import common
 import Socket
-import Command
+from CommandParser import CommandParser
 
 import logging
 log = logging.getLogger('msn.MsnSocket')
@@ -11,11 +10,13 @@ class MsnSocket(Socket.Socket):
     '''a socket object specialized to be used to connecto with the msn network
     '''
 
-    def __init__(self, host='messenger.hotmail.com', port=1863, *args, **kwds):
+    def __init__(self, host='messenger.hotmail.com', port=1863, reactor=None,
+            *args, **kwds):
         '''class constructor, args is there to be compatible with 
         MsnHttpSocket constructor'''
-        Socket.Socket.__init__(self, host, port)
+        Socket.Socket.__init__(self, host, port, reactor)
         self.tid = 1
+        self.parser = CommandParser()
 
     def send_command(self, command, params=None, payload=None):
         '''send command to the socket appending the tid and incrementing it, 
@@ -38,26 +39,16 @@ class MsnSocket(Socket.Socket):
         self.tid += 1
     
     def _receive(self):
-        '''receive data from the socket'''
-        data = self._readline()
-        # if we got something add it to the output queue
-        if data:
-            command = Command.Command.parse(data)
-
-            if command.command in common.PAYLOAD_CMDS:
-                position = common.PAYLOAD_POSITION[command.command]
-                
-                try:
-                    if position == -1:
-                        size = int(command.tid)
-                    else:
-                        size = int(command.params[position])
-                    command.payload = self.receive_fixed_size(size)
-                except ValueError:
-                    # For commands such as ADL and RML
-                    pass
-
-            self.output.put(command)
+        '''receive data from the socket, put the complete commands on the
+        output queue'''
+        data = self._recv()
+
+        if data is None:
             return True
-        return False
+        elif not data:
+            return False
+
+        for command in self.parser.feed(data):
+            self.deliver(command)
 
+        return True
@@ -0,0 +1,253 @@
+'''defines a thread that handles the send and receive operations of many
+sockets'''
+
+import select
+import threading
+
+from Socket import wakeup_pair
+
+import logging
+log = logging.getLogger('msn.Reactor')
+
+class Poller(object):
+    '''waits until some of the registered file descriptors can be read or
+    written, uses epoll if available and select otherwise'''
+
+    def __init__(self):
+        '''class constructor'''
+        if hasattr(select, 'epoll'):
+            self.epoll = select.epoll()
+        else:
+            self.epoll = None
+
+        # file descriptor as key and True if we want to write as value
+        self.fds = {}
+
+    def register(self, fd, write=False):
+        '''wait until fd can be read, and written if write is True, can be
+        called again to change write'''
+        if self.epoll is not None:
+            mask = select.EPOLLIN
+
+            if write:
+                mask |= select.EPOLLOUT
+
+            if fd in self.fds:
+                self.epoll.modify(fd, mask)
+            else:
+                self.epoll.register(fd, mask)
+
+        self.fds[fd] = write
+
+    def unregister(self, fd):
+        '''stop waiting for fd'''
+        if fd not in self.fds:
+            return
+
+        del self.fds[fd]
+
+        if self.epoll is not None:
+            self.epoll.unregister(fd)
+
+    def poll(self):
+        '''block until some file descriptor is ready, return a list of
+        tuples (fd, readable, writable)'''
+        if self.epoll is not None:
+            ready = []
+
+            for fd, mask in self.epoll.poll():
+                # errors and hangups are reported as readable so the recv
+                # call finds them
+                readable = bool(mask & (select.EPOLLIN | select.EPOLLERR |
+                    select.EPOLLHUP))
+                writable = bool(mask & select.EPOLLOUT)
+                ready.append((fd, readable, writable))
+
+            return ready
+
+        readers = self.fds.keys()
+        writers = [fd for (fd, write) in self.fds.iteritems() if write]
+        (iwtd, owtd) = select.select(readers, writers, [])[:2]
+
+        return [(fd, fd in iwtd, fd in owtd) for fd in set(iwtd + owtd)]
+
+class Reactor(threading.Thread):
+    '''a thread that waits on all the registered sockets at once and reads
+    and writes them when they are ready, it replaces the thread of each
+    Socket created with this reactor, so the number of threads doesn't
+    depend on the number of open conversations'''
+
+    def __init__(self):
+        '''class constructor'''
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+
+        self.poller = Poller()
+        # file descriptor as key and Socket as value and the reverse, the
+        # file descriptor can't be asked to a closed socket
+        self.sockets = {}
+        self.fds = {}
+        # sockets that were not connected yet
+        self.connecting = set()
+
+        # sockets added and sockets with new input from other threads
+        self.lock = threading.Lock()
+        self.added = []
+        self.notified = set()
+        self.running = True
+
+        self.wakeup_reader, self.wakeup_writer = wakeup_pair()
+        self.poller.register(self.wakeup_reader.fileno())
+
+    def add(self, sock):
+        '''start the connection of sock and handle it on this thread'''
+        self.lock.acquire()
+
+        try:
+            self.added.append(sock)
+        finally:
+            self.lock.release()
+
+        self.wakeup()
+
+    def notify(self, sock):
+        '''called when something was added to the input queue of sock'''
+        self.lock.acquire()
+
+        try:
+            self.notified.add(sock)
+        finally:
+            self.lock.release()
+
+        self.wakeup()
+
+    def quit(self):
+        '''close the thread and all the sockets'''
+        self.running = False
+        self.wakeup()
+
+    def wakeup(self):
+        '''wake up the thread if it's waiting for the sockets'''
+        try:
+            self.wakeup_writer.send('x')
+        except Exception:
+            # the buffer is full, the thread will wake up anyway
+            pass
+
+    def run(self):
+        '''main method of the thread'''
+        wakeup_fd = self.wakeup_reader.fileno()
+
+        while self.running:
+            for (fd, readable, writable) in self.poller.poll():
+                if fd == wakeup_fd:
+                    self._clear_wakeup()
+                    self._update()
+                    continue
+
+                sock = self.sockets.get(fd, None)
+
+                if sock is None:
+                    continue
+
+                try:
+                    self._handle(sock, readable, writable)
+                except Exception:
+                    log.exception('error handling socket')
+                    self._remove(sock)
+
+        log.debug('closing reactor thread')
+
+        for sock in self.sockets.values():
+            self._remove(sock)
+
+        self.wakeup_reader.close()
+        self.wakeup_writer.close()
+
+    def _clear_wakeup(self):
+        '''read all the wake up notifications'''
+        try:
+            while self.wakeup_reader.recv(1024):
+                pass
+        except Exception:
+            pass
+
+    def _update(self):
+        '''register the sockets added and get the input of the notified
+        sockets'''
+        self.lock.acquire()
+
+        try:
+            added = self.added
+            notified = self.notified
+            self.added = []
+            self.notified = set()
+        finally:
+            self.lock.release()
+
+        for sock in added:
+            sock.connect()
+            fd = sock.fileno()
+            self.sockets[fd] = sock
+            self.fds[sock] = fd
+            self.connecting.add(sock)
+            self.poller.register(fd, True)
+
+            # the data sent before the socket was added was notified when
+            # it wasn't registered yet, queue it to send on connection
+            if not sock._get_input():
+                sock.running = False
+
+        for sock in notified:
+            if sock not in self.fds:
+                continue
+
+            if not sock._get_input():
+                sock.running = False
+
+            self._check(sock)
+
+    def _handle(self, sock, readable, writable):
+        '''read or write sock according to its state'''
+        if sock in self.connecting:
+            # a failed connection may be reported only as an error
+            if not (readable or writable):
+                return
+
+            self.connecting.remove(sock)
+
+            if not sock.connected():
+                self._remove(sock)
+                return
+
+        if readable and not sock._receive():
+            # nothing received, socket closed
+            self._remove(sock)
+            return
+
+        if writable and sock.pending and not sock._flush():
+            self._remove(sock)
+            return
+
+        self._check(sock)
+
+    def _check(self, sock):
+        '''close sock if it was asked to quit and everything was sent,
+        otherwise wait to write only if there is data pending'''
+        if sock in self.connecting:
+            return
+
+        if not sock.running and not sock.pending:
+            self._remove(sock)
+        else:
+            self.poller.register(self.fds[sock], bool(sock.pending))
+
+    def _remove(self, sock):
+        '''stop handling sock and close it'''
+        fd = self.fds.pop(sock, None)
+        self.connecting.discard(sock)
+
+        if fd is not None:
+            self.poller.unregister(fd)
+            del self.sockets[fd]
+            sock.close()
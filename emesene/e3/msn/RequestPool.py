@@ -0,0 +1,187 @@
+'''defines a pool of threads that run the soap requests by priority'''
+
+import time
+import Queue
+import threading
+
+import logging
+log = logging.getLogger('msn.RequestPool')
+
+class RequestPool(object):
+    '''runs the tasks submitted on at most max_workers threads, the tasks
+    with lower priority value run first and the ones with the same priority
+    in the order they were submitted, the threads are started when needed
+    and exit after being idle for IDLE_TIMEOUT seconds, a task that waited
+    on the queue more than max_wait seconds can be failed instead of run'''
+
+    (INTERACTIVE, NORMAL, BULK) = range(3)
+
+    WORKERS = 4
+    IDLE_TIMEOUT = 30
+    # seconds a task can wait on the queue before it expires
+    MAX_WAIT = 60
+
+    def __init__(self, max_workers=WORKERS, max_wait=MAX_WAIT):
+        '''class constructor'''
+        self.max_workers = max_workers
+        self.max_wait = max_wait
+
+        self.queue = Queue.PriorityQueue()
+        # keeps the order of the tasks with the same priority
+        self.count = 0
+        self.lock = threading.Lock()
+        self.workers = 0
+        self.idle = 0
+        # tasks submitted that no thread took yet, unlike the size of the
+        # queue it changes with idle under the lock
+        self.pending = 0
+
+        # name as key and a dict with the counters of the tasks with that
+        # name as value
+        self.metrics = {}
+
+    def submit(self, task, priority=NORMAL, name=None, on_expired=None):
+        '''run task (a callable without arguments) on some thread, if
+        on_expired is not None and the task waited on the queue more than
+        max_wait seconds on_expired is called instead, so the task can fail
+        instead of running too late'''
+        if name is None:
+            name = getattr(task, '__name__', 'task')
+
+        self.lock.acquire()
+
+        try:
+            self.count += 1
+            self.queue.put((priority, self.count, name, task, time.time(),
+                on_expired))
+
+            self.pending += 1
+            # start a thread for each task that an idle thread won't take
+            start = self.pending > self.idle and \
+                self.workers < self.max_workers
+
+            if start:
+                self.workers += 1
+        finally:
+            self.lock.release()
+
+        if start:
+            worker = threading.Thread(target=self._work)
+            worker.setDaemon(True)
+            worker.start()
+
+    def set_max_workers(self, max_workers):
+        '''change the number of threads, the extra threads exit when they
+        finish their current task'''
+        self.lock.acquire()
+
+        try:
+            extra = self.workers - max_workers
+            self.max_workers = max_workers
+        finally:
+            self.lock.release()
+
+        for i in range(extra):
+            self.queue.put((-1, 0, None, None, 0, None))
+
+    def queue_depth(self):
+        '''return the number of tasks waiting for a thread'''
+        return self.queue.qsize()
+
+    def stats(self):
+        '''return a dict with the state of the pool and a dict with the
+        count, the total and max time waiting on the queue and running and
+        the number of expired tasks of each name'''
+        self.lock.acquire()
+
+        try:
+            requests = dict((name, dict(counters))
+                for (name, counters) in self.metrics.iteritems())
+
+            return dict(queued=self.queue.qsize(), workers=self.workers,
+                idle=self.idle, max_workers=self.max_workers,
+                requests=requests)
+        finally:
+            self.lock.release()
+
+    def _work(self):
+        '''main method of the threads'''
+        while True:
+            self.lock.acquire()
+            self.idle += 1
+            self.lock.release()
+
+            try:
+                (priority, count, name, task, queued, on_expired) = \
+                    self.queue.get(True, RequestPool.IDLE_TIMEOUT)
+                timeout = False
+            except Queue.Empty:
+                task = None
+                timeout = True
+
+            self.lock.acquire()
+            self.idle -= 1
+
+            if task is not None:
+                self.pending -= 1
+
+            if timeout:
+                # a task submitted after the timeout counted on this thread
+                exit = self.queue.empty()
+            else:
+                exit = task is None
+
+            if exit:
+                self.workers -= 1
+
+            self.lock.release()
+
+            if exit:
+                break
+            elif task is None:
+                continue
+
+            started = time.time()
+            expired = on_expired is not None and \
+                started - queued > self.max_wait
+
+            if expired:
+                log.warning('%s expired after waiting %.3fs' % (name,
+                    started - queued))
+                task = on_expired
+
+            try:
+                task()
+            except Exception:
+                log.exception('error running ' + name)
+
+            self._record(name, started - queued, time.time() - started,
+                expired)
+
+    def _record(self, name, wait, run, expired=False):
+        '''add the times of a task to the metrics'''
+        self.lock.acquire()
+
+        try:
+            counters = self.metrics.get(name, None)
+
+            if counters is None:
+                counters = dict(count=0, wait=0.0, max_wait=0.0, run=0.0,
+                    max_run=0.0, expired=0)
+                self.metrics[name] = counters
+
+            counters['count'] += 1
+            counters['wait'] += wait
+            counters['run'] += run
+            counters['max_wait'] = max(counters['max_wait'], wait)
+            counters['max_run'] = max(counters['max_run'], run)
+
+            if expired:
+                counters['expired'] += 1
+        finally:
+            self.lock.release()
+
+        log.debug('%s waited %.3fs and ran in %.3fs' % (name, wait, run))
+
+# the pool used by all the sessions
+pool = RequestPool()
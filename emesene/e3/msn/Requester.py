@@ -1,8 +1,8 @@
-'''defines objects that make requests to the server on a thread'''
+'''defines objects that make requests to the server on a pool of threads'''
 
+import socket
 import urllib
 import httplib
-import threading
 
 from uuid import uuid4
 
@@ -13,6 +13,9 @@ import e3
 
 import common
 import challenge
+from HttpPool import pool as http_pool
+from RequestPool import RequestPool, pool as request_pool
+from AddressBook import FULL_CHANGE, get_last_change
 
 from Command import Command
 
@@ -73,14 +76,32 @@ class Response(object):
     def __str__(self):
         return "%s - %s\n%s" % (self.status, self.reason, self.body)
 
-class BaseRequester(threading.Thread):
-    '''the base class to build requester threads'''
+class BaseRequester(object):
+    '''the base class to build requesters, start runs them on the shared
+    request pool, the user actions run before the login and bulk requests'''
+
+    # user actions by default, the requests made on login and in bulk
+    # override it
+    PRIORITY = RequestPool.INTERACTIVE
 
     def __init__(self, session):
         '''class constructor'''
-        threading.Thread.__init__(self)
         self.session = session
 
+    def start(self):
+        '''run the request on the request pool'''
+        request_pool.submit(self.run, self.PRIORITY, self.__class__.__name__,
+            self.expired)
+
+    def run(self):
+        '''override this to make the requests'''
+        pass
+
+    def expired(self):
+        '''called instead of run when the request waited too long on the
+        request pool, override this to report the failure'''
+        log.warning('request %s expired' % (self.__class__.__name__,))
+
     def make_request(self, request):
         '''send the soap request to the server'''
         headers = {
@@ -95,23 +116,20 @@ class BaseRequester(threading.Thread):
             'Cache-Control': 'no-cache',
         }
 
-        conn = None
-
-        if request.port == 443:
-            conn = httplib.HTTPSConnection(request.host, request.port)
-        else:
-            conn = httplib.HTTPConnection(request.host, request.port)
-
-        conn.request('POST', request.path, request.body, headers)
-        conn_response = conn.getresponse()
+        try:
+            (status, reason, body) = http_pool.request('POST', request.host,
+                request.port, request.path, request.body, headers)
+        except (socket.error, httplib.HTTPException), exception:
+            # timeouts and dropped connections are handled as failed
+            # responses
+            log.warning('request %s failed: %s' % (request.action,
+                str(exception)))
+            return Response('', 0, str(exception))
 
-        response = Response(conn_response.read(), conn_response.status,
-            conn_response.reason)
-
-        return response
+        return Response(body, status, reason)
 
 class Requester(BaseRequester):
-    '''a class that makes a soap request on a thread'''
+    '''a class that makes a soap request on the request pool'''
 
     def __init__(self, session, action, host, port, path, body):
         '''class constructor, session is the session object'''
@@ -121,8 +139,7 @@ class Requester(BaseRequester):
         self.request = Request(action, host, port, path, body)
 
     def run(self):
-        '''main method of the thread, make the request and handle the response
-        '''
+        '''make the request and handle the response'''
         log.debug('running request ' + self.request.action)
         response = self.make_request(self.request)
         self.handle_response(self.request, response)
@@ -132,6 +149,11 @@ class Requester(BaseRequester):
         '''override this to do something with the response'''
         pass
 
+    def expired(self):
+        '''handle the request as failed'''
+        log.warning('request %s expired' % (self.request.action,))
+        self.handle_response(self.request, Response('', 0, 'expired'))
+
 class TwoStageRequester(BaseRequester):
     '''a class that does two request sequentially, if the first request fails
     then the second request doesn't run, if the second request fails
@@ -173,6 +195,11 @@ class TwoStageRequester(BaseRequester):
 
         log.debug('request finished')
 
+    def expired(self):
+        '''handle the first request as failed'''
+        log.warning('request %s expired' % (self.first_req.action,))
+        self._on_first_failed(Response('', 0, 'expired'))
+
     def _on_first_succeed(self, response):
         '''handle the first request if succeeded'''
         pass
@@ -191,24 +218,47 @@ class TwoStageRequester(BaseRequester):
 
 class Membership(Requester):
     '''make the request to get the membership list'''
-    def __init__(self, session, command_queue, on_login, started_from_cache):
+
+    PRIORITY = RequestPool.NORMAL
+
+    def __init__(self, session, command_queue, on_login, started_from_cache,
+        address_book=None):
         '''command_queue is a reference to a queue that is used
         by the worker to get commands that other threads need to be
         sent, if on_login is true, then some commands need to be
-        sent in order to inform the server about our contacts'''
+        sent in order to inform the server about our contacts, if
+        address_book has the memberships only the changes since then
+        are requested'''
+        self.delta = address_book is not None and \
+            address_book.membership_change is not None
+
+        if self.delta:
+            body = XmlManager.get('membership', get_key(session), 'true',
+                address_book.membership_change)
+        else:
+            body = XmlManager.get('membership', get_key(session), 'false',
+                FULL_CHANGE)
+
         Requester.__init__(self, session,
           'http://www.msn.com/webservices/AddressBook/FindMembership',
-          'contacts.msn.com', 443, '/abservice/SharingService.asmx',
-          XmlManager.get('membership', get_key(session)))
+          'contacts.msn.com', 443, '/abservice/SharingService.asmx', body)
 
         self.command_queue = command_queue
         self.on_login = on_login
         self.started_from_cache = started_from_cache
+        self.address_book = address_book
 
     def handle_response(self, request, response):
         '''handle the response'''
         if response.status == 200:
             parser = XmlParser.MembershipParser(response.body)
+            memberships = parser.memberships
+
+            if self.address_book is not None:
+                self.address_book.update_memberships(memberships,
+                    get_last_change(response.body, 'LastChange'), self.delta)
+                memberships = self.address_book.get_memberships()
+
             self.session.contacts.pending = {}
             self.session.contacts.reverse = {}
             pending = self.session.contacts.pending
@@ -216,7 +266,7 @@ class Membership(Requester):
             contacts = self.session.contacts.contacts
             new_accounts = []
 
-            for membership in parser.memberships:
+            for membership in memberships:
                 role = membership['MemberRole']
 
                 for member in membership['Members']:
@@ -262,34 +312,72 @@ class Membership(Requester):
                     del contacts[email]
 
             DynamicItems(self.session, self.command_queue,
-                self.on_login, self.started_from_cache).start()
+                self.on_login, self.started_from_cache,
+                self.address_book).start()
+        elif self.delta:
+            # the changes may be too old, ask for the full list
+            log.debug('error requesting membership changes %d' % (
+                response.status,))
+            self.address_book.membership_change = None
+            Membership(self.session, self.command_queue, self.on_login,
+                self.started_from_cache, self.address_book).start()
         else:
-            log.debug('error requesting membership ' + response.status)
+            log.debug('error requesting membership %d' % (response.status,))
             log.debug(response.body)
 
 
 class DynamicItems(Requester):
     '''make the request to get the dynamic items'''
-    def __init__(self, session, command_queue, on_login, started_from_cache):
+
+    PRIORITY = RequestPool.NORMAL
+
+    def __init__(self, session, command_queue, on_login, started_from_cache,
+        address_book=None):
         '''command_queue is a reference to a queue that is used
         by the worker to get commands that other threads need to be
         sent, if on_login is true, then some commands need to be
-        sent in order to inform the server about our contacts'''
+        sent in order to inform the server about our contacts, if
+        address_book has the contacts only the changes since then
+        are requested'''
+        self.delta = address_book is not None and \
+            address_book.contacts_change is not None
+
+        if self.delta:
+            body = XmlManager.get('dynamicitems', get_key(session), 'true',
+                address_book.contacts_change)
+        else:
+            body = XmlManager.get('dynamicitems', get_key(session), 'false',
+                FULL_CHANGE)
+
         Requester.__init__(self, session,
           'http://www.msn.com/webservices/AddressBook/ABFindAll',
-          'contacts.msn.com', 443, '/abservice/abservice.asmx',
-          XmlManager.get('dynamicitems', get_key(session)))
+          'contacts.msn.com', 443, '/abservice/abservice.asmx', body)
 
         self.command_queue = command_queue
         self.on_login = on_login
         self.started_from_cache = started_from_cache
+        self.address_book = address_book
 
     def handle_response(self, request, response):
         '''handle the response'''
         if response.status == 200:
             parser = XmlParser.DynamicParser(response.body)
+            groups = parser.groups
+            contacts = parser.contacts
+
+            if self.address_book is not None:
+                self.address_book.update_contacts(groups, contacts,
+                    get_last_change(response.body, 'lastChange'), self.delta)
+                groups = self.address_book.get_groups()
+                contacts = self.address_book.get_contacts()
+
+                # groups removed since the cache was saved
+                for group_id in self.session.groups.keys():
+                    if group_id not in self.address_book.groups:
+                        del self.session.groups[group_id]
+
             # Retrieve groups
-            for group_dict in parser.groups:
+            for group_dict in groups:
                 group_id = group_dict['groupId']
                 group_name = group_dict['name']
 
@@ -300,7 +388,7 @@ class DynamicItems(Requester):
                         e3.Group(group_name, group_id)
 
             # Retrieve contacts
-            for contact_dict in parser.contacts:
+            for contact_dict in contacts:
                 if 'isMessengerUser' in contact_dict \
                   and 'passportName' in contact_dict \
                   and contact_dict['isMessengerUser'] == 'true':
@@ -342,16 +430,27 @@ class DynamicItems(Requester):
 
             log.debug('dynamic finished')
 
-            self.session.contacts.me.identifier = \
-                response.body.split('<contactType>Me</contactType>')\
-                [1].split('</CID>')[0].split('<CID>')[1].strip()
-
-            # get our nick
-            try:
-                nick = response.body.split('<contactType>Me</contactType>')\
-                    [1].split('</displayName>')[0].split('<displayName>')[1]
-                nick = common.unescape(nick)
-            except IndexError:
+            if self.address_book is not None:
+                (identifier, nick) = self.address_book.me
+                self.address_book.save()
+            else:
+                identifier = response.body.split(
+                    '<contactType>Me</contactType>')[1].split('</CID>')[0]\
+                    .split('<CID>')[1]
+
+                # get our nick
+                try:
+                    nick = response.body.split(
+                        '<contactType>Me</contactType>')[1]\
+                        .split('</displayName>')[0].split('<displayName>')[1]
+                    nick = common.unescape(nick)
+                except IndexError:
+                    nick = None
+
+            if identifier:
+                self.session.contacts.me.identifier = identifier.strip()
+
+            if not nick:
                 nick = self.session.contacts.me.account
 
             if not self.session.contacts.me.nick or \
@@ -386,6 +485,13 @@ class DynamicItems(Requester):
 
             GetProfile(self.session, self.session.contacts.me.identifier).start()
 
+        elif self.delta:
+            # the changes may be too old, ask for the full list
+            log.debug('error requesting dynamic items changes %d' % (
+                response.status,))
+            self.address_book.contacts_change = None
+            DynamicItems(self.session, self.command_queue, self.on_login,
+                self.started_from_cache, self.address_book).start()
         else:
             log.debug('error requestion dynamic items')
 
@@ -843,6 +949,9 @@ class SendOIM(Requester):
 
 class RetriveOIM(Requester):
     '''make the request to retrive an oim'''
+
+    PRIORITY = RequestPool.BULK
+
     def __init__(self, session, oim_data, msg_queue):
         '''command_queue is a reference to a queue that is used
         by the worker to get commands that other threads need to
@@ -871,6 +980,9 @@ class RetriveOIM(Requester):
 
 class RetriveTooLarge(Requester):
     '''make the request to get oims from a soap request'''
+
+    PRIORITY = RequestPool.BULK
+
     def __init__(self, session, msg_queue):
         '''Return the mail data using soap if there are too many OIMs'''
         t, p = session.extras['messenger.msn.com']['security'][2:].split('&p=')
@@ -891,6 +1003,9 @@ class RetriveTooLarge(Requester):
 
 class DeleteOIM(Requester):
     '''make the request to delete an oim'''
+
+    PRIORITY = RequestPool.BULK
+
     def __init__(self, session, oid, msg_queue):
         '''Delete a viewed oim'''
         t, p = session.extras['messenger.msn.com']['security'][2:].split('&p=')
@@ -911,6 +1026,9 @@ class DeleteOIM(Requester):
 
 class GetProfile(Requester):
     '''make a request to get the nick and personal message'''
+
+    PRIORITY = RequestPool.NORMAL
+
     def __init__(self, session, cid):
         '''constructor'''
         key = get_key(session, 'storage.msn.com', False)
@@ -2,130 +2,255 @@
 in a thread'''
 
 import Queue
+import errno
 import socket
 import select
-import StringIO
 import threading
 
 import logging
 log = logging.getLogger('msn.Socket')
 
+def wakeup_pair():
+    '''return a pair of connected sockets (reader, writer) used to wake up a
+    thread blocked on select, socketpair is not available on windows so a
+    connection on the loopback interface is used there'''
+    if hasattr(socket, 'socketpair'):
+        reader, writer = socket.socketpair()
+    else:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        writer.connect(server.getsockname())
+        reader = server.accept()[0]
+        server.close()
+
+    reader.setblocking(0)
+    writer.setblocking(0)
+
+    return reader, writer
+
 class Socket(threading.Thread):
     '''a socket that runs on a thread, it reads the data and put it on the 
     output queue, the data to be sent is added to the input queue'''
 
-    def __init__(self, host, port):
-        '''class constructor'''
+    # max bytes read from the socket on each call
+    RECV_SIZE = 16384
+
+    def __init__(self, host, port, reactor=None):
+        '''class constructor, if reactor is not None the socket is handled
+        by the reactor thread instead of its own'''
         threading.Thread.__init__(self)
 
         self.host = host
         self.port = port
+        self.reactor = reactor
+        # if set it's called with each item received instead of putting it
+        # on the output queue
+        self.handler = None
+        # set to False when a quit is requested in reactor mode
+        self.running = True
 
         self.input = Queue.Queue()
         self.output = Queue.Queue()
+        # received data that doesn't form a complete line yet
+        self.buffer = bytearray()
+        # data taken from the input queue that wasn't sent yet
+        self.pending = ''
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        if reactor is None:
+            # written by send to wake up the thread when it's waiting on select
+            self.wakeup_reader, self.wakeup_writer = wakeup_pair()
+        else:
+            self.wakeup_reader = self.wakeup_writer = None
+
         self.setDaemon(True)
 
+    def start(self):
+        '''start the thread, or register on the reactor in reactor mode'''
+        if self.reactor is None:
+            threading.Thread.start(self)
+        else:
+            self.reactor.add(self)
+
     def send(self, data):
-        '''add data to the input queue'''
+        '''add data to the input queue and wake up the thread'''
         self.input.put(data)
 
+        if self.reactor is None:
+            self.wakeup()
+        else:
+            self.reactor.notify(self)
+
+    def wakeup(self):
+        '''wake up the thread if it's waiting on select'''
+        try:
+            self.wakeup_writer.send('x')
+        except socket.error:
+            # the buffer is full, the thread will wake up anyway
+            pass
+
     def quit(self):
         '''close the thread'''
         self.send('quit')
 
     def run(self):
-        '''the main method of the socket, wait until there is something to 
-        send or there is something to read, if there is something to send, get 
-        it from the input Queue, wait until we can send it and send it, if 
-        there is something to read, read it and put it on the output queue'''
+        '''the main method of the socket, wait until there is something to
+        read, something was added to the input queue or the pending data can
+        be sent. the data read is put on the output queue, all the data
+        queued is sent together'''
         self.socket.connect((self.host, self.port))
-        input_ = None
+        running = True
 
-        while True:
-            # see if we can send or read something
-            (iwtd, owtd) = select.select([self], [self], [])[:2]
+        while running or self.pending:
+            if self.pending:
+                writers = [self.socket]
+            else:
+                writers = []
+
+            (iwtd, owtd) = select.select([self.socket, self.wakeup_reader],
+                writers, [])[:2]
 
-            # if we can read, we try to read
-            if iwtd:
+            if self.socket in iwtd:
                 if not self._receive():
                     # nothing received, socket closed
                     break
-                # do not write until everything is read
-                continue
 
-            try:
-                input_ = self.input.get(True, 0.3)
+            if self.wakeup_reader in iwtd:
+                self._clear_wakeup()
+                running = self._get_input() and running
 
-                if input_ == 'quit':
-                    break
-            except Queue.Empty:
-                # nothing to send
-                continue
-
-            if owtd and input_:
-                # try to get something to send, wait 0.3 seconds
-                try:
-                    self.socket.send(input_)
-                    log.debug('>>> ' + str(input_))
-                except socket.error:
-                    self._on_socket_error()
-                    break
+            if owtd and not self._flush():
+                break
 
         log.debug('closing socket thread')
+        self.close()
+
+    def close(self):
+        '''close the socket and the wakeup sockets'''
         self.socket.close()
 
+        if self.wakeup_reader is not None:
+            self.wakeup_reader.close()
+            self.wakeup_writer.close()
+
+    def connect(self):
+        '''start a non blocking connection, used on reactor mode, the socket
+        is writable when the connection is made'''
+        self.socket.setblocking(0)
+        self.socket.connect_ex((self.host, self.port))
+
+    def connected(self):
+        '''called by the reactor when the socket is writable for the first
+        time, return False if the connection failed'''
+        error = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+        if error:
+            log.debug('connection failed: ' + errno.errorcode.get(error, ''))
+            self._on_socket_error()
+            return False
+
+        return True
+
+    def deliver(self, data):
+        '''pass data received from the socket to the handler or put it on
+        the output queue'''
+        if self.handler is None:
+            self.output.put(data)
+        else:
+            self.handler(data)
+
+    def _clear_wakeup(self):
+        '''read all the wake up notifications'''
+        try:
+            while self.wakeup_reader.recv(1024):
+                pass
+        except socket.error:
+            pass
+
+    def _get_input(self):
+        '''move all the data on the input queue to self.pending so it's sent
+        on as few calls as possible, return False if quit was requested'''
+        chunks = [self.pending]
+
+        try:
+            while True:
+                input_ = self.input.get(False)
+
+                if input_ == 'quit':
+                    self.pending = ''.join(chunks)
+                    return False
+
+                chunks.append(input_)
+        except Queue.Empty:
+            pass
+
+        self.pending = ''.join(chunks)
+        return True
+
+    def _flush(self):
+        '''send as much of the pending data as possible, return False if the
+        socket was closed'''
+        try:
+            sent = self.socket.send(self.pending)
+        except socket.error, error:
+            if error.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return True
+
+            self._on_socket_error()
+            return False
+
+        log.debug('>>> ' + self.pending[:sent])
+        self.pending = self.pending[sent:]
+        return True
+
     def fileno(self):
         '''method that is used by select'''
         return self.socket.fileno()
 
     def _receive(self):
-        '''receive data from the socket'''
-        data = self._readline()
-        # if we got something add it to the output queue
-        if data:
-            log.debug('<<< ' + data)
-            self.output.put(data)
-            return True
-        return False
+        '''receive data from the socket, put the complete lines on the
+        output queue'''
+        data = self._recv()
 
-    def _readline(self):
-        '''read until new line'''
-        output = StringIO.StringIO()
+        if data is None:
+            return True
+        elif not data:
+            return False
 
-        try:
-            chunk = self.socket.recv(1)
-        except socket.error:
-            self._on_socket_error()
-            return None
+        self.buffer.extend(data)
+        start = 0
 
-        while chunk != '\n' and chunk != '':
-            output.write(chunk)
-            try:
-                chunk = self.socket.recv(1)
-            except socket.error:
-                self._on_socket_error()
+        while True:
+            end = self.buffer.find('\n', start)
 
-        if chunk == '\n':
-            output.write(chunk)
+            if end == -1:
+                break
 
-        output.seek(0)
-        return output.read()
+            line = str(self.buffer[start:end + 1])
+            log.debug('<<< ' + line)
+            self.deliver(line)
+            start = end + 1
 
-    def receive_fixed_size(self, size):
-        '''receive a fixed size of bytes, return it as string'''
-        output = StringIO.StringIO()
+        if start:
+            del self.buffer[:start]
 
-        while output.len < size:
-            try:
-                output.write(self.socket.recv(size - output.len))
-            except socket.error:
-                self._on_socket_error()
+        return True
 
-        output.seek(0)
+    def _recv(self):
+        '''read up to RECV_SIZE bytes from the socket, return an empty
+        string if the socket was closed or None if there is nothing to read
+        on a non blocking socket'''
+        try:
+            return self.socket.recv(Socket.RECV_SIZE)
+        except socket.error, error:
+            if error.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return None
 
-        return output.read()
+            self._on_socket_error()
+            return ''
 
     def _on_socket_error(self):
         '''send a message that the socket was closed'''
-        self.output.put(0)
+        self.deliver(0)
@@ -3,7 +3,6 @@
 import time
 import Queue
 import urllib
-import httplib
 import urlparse
 
 import e3
@@ -14,6 +13,10 @@ import challenge
 import Requester
 import XmlManager
 import Conversation
+from Reactor import Reactor
+from AddressBook import AddressBook
+from HttpPool import pool as http_pool
+from RequestPool import RequestPool, pool as request_pool
 from MsnSocket import MsnSocket
 from MsnHttpSocket import MsnHttpSocket
 
@@ -66,6 +69,11 @@ class Worker(e3.Worker):
         else:
             self.proxy = proxy
         self.use_http = use_http
+        # handles the sockets if reactor mode is enabled, see _get_reactor
+        self.reactor = None
+        # max number of soap requests running at the same time
+        request_pool.set_max_workers(session.config.get_or_set(
+            'i_msn_soap_workers', RequestPool.WORKERS))
 
         self.socket = self._get_socket()
         self.in_login = False
@@ -107,9 +115,22 @@ class Worker(e3.Worker):
         if self.proxy.use_proxy or self.use_http:
             socket = MsnHttpSocket(host, port, dest_type='NS', proxy=self.proxy)
         else:
-            socket = MsnSocket(host, port)
+            socket = MsnSocket(host, port, self._get_reactor())
         return socket
 
+    def _get_reactor(self):
+        '''return the reactor that handles all the sockets if reactor mode
+        is enabled on the config (b_msn_reactor), None otherwise'''
+        if self.proxy.use_proxy or self.use_http or \
+                not self.session.config.get_or_set('b_msn_reactor', False):
+            return None
+
+        if self.reactor is None:
+            self.reactor = Reactor()
+            self.reactor.start()
+
+        return self.reactor
+
     def _set_handlers(self):
         '''set a dict with the action id as key and the handler as value'''
         # login message handlers
@@ -180,12 +201,18 @@ class Worker(e3.Worker):
 
                 if action.id_ == e3.Action.ACTION_QUIT:
                     log.debug('closing thread')
-                    self.socket.input.put('quit')
+                    self.socket.send('quit')
                     self.session.logger.quit()
                     self.msg_manager.quit()
 
                     for (cid, conversation) in self.conversations.iteritems():
-                        conversation.command_queue.put('quit')
+                        conversation.quit()
+
+                    if self.reactor is not None:
+                        self.reactor.quit()
+
+                    http_pool.clear()
+                    log.debug('soap requests: ' + str(request_pool.stats()))
 
                     for (pid, transfer) in self.transfers.iteritems():
                         transfer.add_action(e3.Action.ACTION_QUIT)
@@ -250,16 +277,14 @@ class Worker(e3.Worker):
             # send the SOAP request
             for i in range(3):
                 try:
-
-                    conn = httplib.HTTPSConnection(server, 443)
-                    conn.request('POST', url, template, headers)
-                    response = conn.getresponse()
+                    response = http_pool.request('POST', server, 443, url,
+                        template, headers)
                     break
                 except Exception, exception:
                     pass
 
             if response:
-                data = response.read()
+                data = response[2]
                 log.debug(data)
             else:
                 self.session.add_event(e3.Event.EVENT_LOGIN_FAILED,
@@ -432,7 +457,19 @@ class Worker(e3.Worker):
         self._set_status(self.session.account.status)
         started_from_cache = self._start_from_cache()
         Requester.Membership(self.session, self.command_queue,
-            True, started_from_cache).start()
+            True, started_from_cache, self._get_address_book()).start()
+
+    def _get_address_book(self):
+        '''return the snapshot of the address book saved on the last login
+        if enabled on the config (b_msn_address_book), None otherwise'''
+        if not self.session.config.get_or_set('b_msn_address_book', True):
+            return None
+
+        address_book = AddressBook(self.session.config_dir.join(
+            'addressbook'))
+        address_book.load()
+
+        return address_book
 
     def _on_initial_status_change(self, message):
         '''handle the first status change of the contacts, that means
@@ -618,7 +655,8 @@ class Worker(e3.Worker):
 
         if cid not in self.conversations:
             con = Conversation.Conversation(self.session, cid,
-                host, int(port), account, session_id, self.p2p, self.proxy)
+                host, int(port), account, session_id, self.p2p, self.proxy,
+                reactor=self._get_reactor())
             self.conversations[cid] = con
             con.send_presentation()
             con.invite(account)
@@ -661,7 +699,8 @@ class Worker(e3.Worker):
 
         cid = time.time()
         con = Conversation.Conversation(self.session, cid,
-            host, int(port), user, session_id, self.p2p, auth_id)
+            host, int(port), user, session_id, self.p2p, auth_id,
+            reactor=self._get_reactor())
         self.conversations[cid] = con
         con.answer()
         con.start()
@@ -22,23 +22,17 @@ import e3
 from Worker import Worker
 
 import extension
-
-AUTHOR_LIST = ['Riccardo (C10uD)', 'Orfeo (Otacon)', 'Stefano (cando)']
+import metadata
 
 @extension.implements('session')
 class Session(e3.Session):
     '''a specialization of e3.base.Session'''
-    NAME = 'Papyon session'
-    DESCRIPTION = 'MSN session (papyon)'
-    AUTHOR = ", ".join(AUTHOR_LIST)
-    WEBSITE = 'www.emesene.org'
-
-    SERVICES = {
-        "msn": {
-            "host": "messenger.hotmail.com",
-            "port": "1863"
-        }
-    }
+    NAME = metadata.NAME
+    DESCRIPTION = metadata.DESCRIPTION
+    AUTHOR = metadata.AUTHOR
+    WEBSITE = metadata.WEBSITE
+
+    SERVICES = metadata.SERVICES
 
     def __init__(self, id_=None, account=None):
         '''constructor'''
@@ -34,6 +34,7 @@ from e3.base import *
 import e3.base.Logger as Logger
 from e3.common import ConfigDir
 from e3.common import locations
+import extension
 
 import logging
 log = logging.getLogger('papylib.Worker')
@@ -62,13 +63,16 @@ except Exception, e:
 
 from PapyEvents import *
 from PapyConvert import *
-PAPY_HAS_AUDIOVIDEO = 1
-try:
-    import PapyConference
+# PapyConference pulls gstreamer and farsight, it's imported on the first call
+PAPY_HAS_AUDIOVIDEO = int(extension.is_available('pygst', 'farsight'))
+if not PAPY_HAS_AUDIOVIDEO:
+    log.warning("You need gstreamer to use the Audio/Video calls support")
+
+def _get_conference():
+    '''import and return the module that handles the call streams'''
     import papyon.media.constants
-except Exception, e:
-    PAPY_HAS_AUDIOVIDEO = 0
-    log.exception("You need gstreamer to use the Audio/Video calls support")
+    import PapyConference
+    return PapyConference
 
 class Worker(e3.base.Worker, papyon.Client):
     ''' papylib's worker - an emesene extension for papyon library '''
@@ -1143,7 +1147,7 @@ class Worker(e3.base.Worker, papyon.Client):
         papycontact = self.address_book.contacts.search_by('account', account)[0]
         papysession = self.call_manager.create_call(papycontact)
         call_handler = CallEvent(papysession, self)
-        session_handler = PapyConference.MediaSessionHandler(
+        session_handler = _get_conference().MediaSessionHandler(
             papysession.media_session, surface_other, surface_self)
         log.info("Call %s - %s" % (account, a_v_both))
         if a_v_both == 0: # see gui.base.Conversation.py 0=V,1=A,2=AV
@@ -1170,7 +1174,7 @@ class Worker(e3.base.Worker, papyon.Client):
         self.session.add_event(Event.EVENT_CALL_INVITATION, ca, cid)
 
     def _handle_action_call_accept(self, c):
-        session_handler = PapyConference.MediaSessionHandler(
+        session_handler = _get_conference().MediaSessionHandler(
             c.object.media_session, c.surface_buddy, c.surface_self)
 
         self.rcalls[c].accept()
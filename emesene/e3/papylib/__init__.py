@@ -18,6 +18,5 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 
-from Session import Session
-from Worker import Worker
-
+'''the papyon backend, its modules are imported when the session is used,
+importing the package only gives access to the metadata'''
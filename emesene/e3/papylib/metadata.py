@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# papylib - an emesene extension for papyon
+#
+# Copyright (C) 2009-2010 Riccardo (C10uD) <c10ud.dev@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+
+'''the metadata of the papyon session, it doesn't import anything so it
+can be read without loading papyon'''
+
+AUTHOR_LIST = ['Riccardo (C10uD)', 'Orfeo (Otacon)', 'Stefano (cando)']
+
+NAME = 'Papyon session'
+DESCRIPTION = 'MSN session (papyon)'
+AUTHOR = ", ".join(AUTHOR_LIST)
+WEBSITE = 'www.emesene.org'
+
+SERVICES = {
+    "msn": {
+        "host": "messenger.hotmail.com",
+        "port": "1863"
+    }
+}
@@ -24,6 +24,13 @@ from e3.common.utils import project_path
 os.chdir(os.path.abspath(project_path()))
 
 import sys
+
+import profiler
+
+# checked before the option parser exists to time the imports below
+if '--profile-startup' in sys.argv:
+    profiler.enable()
+
 import glib
 import gettext
 import optparse
@@ -36,27 +43,24 @@ import logging
 log = logging.getLogger('emesene')
 
 import e3
-#from e3 import msn
-from e3 import jabber
-from e3 import dummy
+# only the metadata of the backends, they are imported when used
+from e3.dummy import metadata as dummy_metadata
+from e3.jabber import metadata as jabber_metadata
+from e3.papylib import metadata as papylib_metadata
 
 try:
     from gui import gtkui
 except Exception, e:
     log.error('Cannot find/load (py)gtk: %s' % str(e))
 
-try:
-    from e3 import papylib
-except Exception, exc:
-    papylib = None
-    log.warning('Errors occurred on papyon importing: %s' % str(exc))
-
 from pluginmanager import get_pluginmanager
 import extension
 import interfaces
 
 import gui
 
+profiler.phase('imports')
+
 # fix for gstreamer --help
 argv = sys.argv
 sys.argv = [argv[0]]
@@ -95,6 +99,51 @@ class VerboseOption(object):
 extension.implements('option provider')(VerboseOption)
 extension.get_category('option provider').activate(VerboseOption)
 
+class ProfileSignalsOption(object):
+    '''option parser'''
+
+    def option_register(self):
+        '''register the options to parse by the command line option parser'''
+        option = optparse.Option("--profile-signals",
+            action="store_true", dest="profile_signals", default=False,
+            help="Time the signal handlers and log the slowest on exit")
+        return option
+
+extension.implements('option provider')(ProfileSignalsOption)
+extension.get_category('option provider').activate(ProfileSignalsOption)
+
+class ProfileStartupOption(object):
+    '''option parser'''
+
+    def option_register(self):
+        '''register the options to parse by the command line option parser'''
+        option = optparse.Option("--profile-startup",
+            action="store_true", dest="profile_startup", default=False,
+            help="Print the time spent on each import and startup phase")
+        return option
+
+extension.implements('option provider')(ProfileStartupOption)
+extension.get_category('option provider').activate(ProfileStartupOption)
+
+def lazy_session(module, metadata):
+    '''return a LazyExtension for the Session class on module that answers
+    the attributes defined on the metadata module without importing it'''
+    return extension.LazyExtension(module, 'Session', NAME=metadata.NAME,
+        DESCRIPTION=metadata.DESCRIPTION, AUTHOR=metadata.AUTHOR,
+        WEBSITE=metadata.WEBSITE, SERVICES=metadata.SERVICES)
+
+# the session backends, they are imported when they are used, papylib
+# pulls papyon, gobject and farsight
+DUMMY_SESSION = lazy_session('e3.dummy.Session', dummy_metadata)
+JABBER_SESSION = lazy_session('e3.jabber.Session', jabber_metadata)
+PAPYLIB_SESSION = lazy_session('e3.papylib.Session', papylib_metadata)
+
+def papyon_available():
+    '''return True if papyon is installed or on the papylib submodule,
+    without importing it'''
+    return extension.is_available('papyon') or os.path.isdir(
+        os.path.join('e3', 'papylib', 'papyon', 'papyon'))
+
 class Controller(object):
     '''class that handle the transition between states of the windows'''
 
@@ -115,25 +164,26 @@ class Controller(object):
             self.config.d_remembers = {}
 
         self.session = None
-        self.timeout_id = None
         self.cur_service = None
         self._parse_commandline()
         self._setup()
+        profiler.phase('controller setup')
 
     def _setup(self):
         '''register core extensions'''
-        extension.category_register('session', dummy.Session, single_instance=True)
+        extension.category_register('session', DUMMY_SESSION,
+                single_instance=True)
         #extension.category_register('session', msn.Session,
         #        single_instance=True)
-        extension.register('session', jabber.Session)
-        extension.register('session', dummy.Session)
+        extension.register('session', JABBER_SESSION)
+        extension.register('session', DUMMY_SESSION)
         #extension.register('session', msn.Session)
 
-        if papylib is not None:
-            extension.register('session', papylib.Session)
-            extension.set_default('session', papylib.Session)
+        if papyon_available():
+            extension.register('session', PAPYLIB_SESSION)
+            extension.set_default('session', PAPYLIB_SESSION)
         else:
-            extension.set_default('session', dummy.Session)
+            extension.set_default('session', DUMMY_SESSION)
 
         extension.category_register('sound', e3.common.play_sound.play)
         extension.category_register('notification',
@@ -155,6 +205,9 @@ class Controller(object):
 
         debugger.init(debuglevel=options.debuglevel)
 
+        if options.profile_signals:
+            e3.common.Signal.set_profiling(True)
+
         if options.single_instance:
             try:
                 import SingleInstance
@@ -185,6 +238,9 @@ class Controller(object):
         use_http = self.config.get_or_set('b_use_http', False)
         self.go_login(proxy, use_http)
 
+        profiler.phase('login window')
+        profiler.print_report()
+
     def go_login(self, proxy=None, use_http=None, cancel_clicked=False,
             no_autologin=False):
         '''shows the login GUI'''
@@ -233,11 +289,8 @@ class Controller(object):
             self.conversations.get_parent().hide()
             self._on_conversation_window_close()
 
-        if self.timeout_id:
-            glib.source_remove(self.timeout_id)
-            self.timeout_id = None
-
         if self.session is not None:
+            self.session.signals.set_notifier(None)
             self.session.quit()
 
         self.save_extensions_config()
@@ -248,6 +301,7 @@ class Controller(object):
             self.session = None
 
         self.config.save(self.config_path)
+        e3.common.Signal.log_stats()
 
         if do_exit:
             if self.tray_icon is not None:
@@ -421,7 +475,8 @@ class Controller(object):
         self._save_login_dimensions()
         self.config.save(self.config_path)
         plugin_manager = get_pluginmanager()
-        plugin_manager.scan_directory('plugins')
+        plugin_manager.scan_directory('plugins',
+            self.config_dir.join('plugins_index'))
 
         self.draw_main_screen()
 
@@ -448,8 +503,9 @@ class Controller(object):
 
         self._new_session()
 
-        self.timeout_id = glib.timeout_add(500,
-                self.session.signals._handle_events)
+        signals = self.session.signals
+        signals.set_notifier(
+            lambda: glib.idle_add(signals._dispatch_events))
         self.session.login(account.account, account.password, account.status,
             proxy, host, port, use_http)
         
@@ -676,13 +732,15 @@ def main():
     """
     the main method of emesene
     """
-    extension.category_register('session', dummy.Session, single_instance=True)
+    extension.category_register('session', DUMMY_SESSION,
+            single_instance=True)
     extension.category_register('option provider', None,
             interfaces=interfaces.IOptionProvider)
     extension.get_category('option provider').multi_extension = True
     extension.get_category('option provider').activate(ExtensionDefault)
     options = PluggableOptionParser(argv)
     options.read_options()
+    profiler.phase('options')
     main_method = extension.get_default('main')
     main_method(Controller)
 
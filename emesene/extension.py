@@ -48,6 +48,20 @@ Providing extensions
     You should also put a class attribute (tuple) called "implements" in your
     extension: each of its elements will be a reference to an interface you're
     implementing
+
+    Lazy extensions
+    ---------------
+        Importing an extension can be expensive (it may pull gstreamer or
+        webkit), if it's registered as a LazyExtension its module is only
+        imported the first time it's selected as default or used::
+
+            extensions.register("category name",
+                extensions.LazyExtension("package.module", "ClassName",
+                    requires=("webkit",), NAME="Foo"))
+
+        The keyword arguments are available as attributes without importing
+        the module, if one of the modules on requires can't be found the
+        extension isn't registered.
 '''
 # -*- coding: utf-8 -*-
 
@@ -68,6 +82,7 @@ Providing extensions
 #    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 import os
+import imp
 import sys
 import weakref
 import logging
@@ -153,6 +168,53 @@ class MultipleObjects(object):
         return MultipleObjects(result)
 
 
+class LazyExtension(object):
+    '''an extension that imports its module the first time it's used'''
+
+    def __init__(self, module, name, requires=(), **attrs):
+        '''constructor
+        @param module: the full name of the module that defines the extension
+        @param name: the name of the extension on that module
+        @param requires: names of modules that must be installed to use it
+        @param attrs: attributes available without importing the module
+        '''
+        self.module = module
+        self.__name__ = name
+        self.requires = tuple(requires)
+        self.attrs = attrs
+        self.cls = None
+
+    def is_available(self):
+        '''return True if the required modules are installed, it doesn't
+        import them'''
+        return is_available(*self.requires)
+
+    def load(self):
+        '''import the module and return the extension, ImportError is
+        raised if it can't be imported'''
+        if self.cls is None:
+            __import__(self.module)
+            self.cls = getattr(sys.modules[self.module], self.__name__)
+
+        return self.cls
+
+    def __getattr__(self, attr):
+        if attr in self.attrs:
+            return self.attrs[attr]
+
+        # don't import the module on introspection
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+
+        return getattr(self.load(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return '<LazyExtension %s.%s>' % (self.module, self.__name__)
+
+
 class Category(object):
     '''This completely handles a category'''
 
@@ -193,6 +255,9 @@ class Category(object):
         @param cls: A Class, NOT an instance
         @raise ValueError: if cls doesn't agree to the interfaces
         '''
+        if isinstance(cls, LazyExtension):
+            return self._register_lazy(cls)
+
         for interface in self.interfaces:
             if not is_implementation(cls, interface):
                 log.warning("cls doesn't agree to the interface: %s" %\
@@ -204,6 +269,56 @@ class Category(object):
         self.ids[cls] = class_name
         return True
 
+    def _register_lazy(self, lazy):
+        '''register a LazyExtension, the interfaces are checked when it's
+        loaded'''
+        if not lazy.is_available():
+            log.info('%s not registered on %s, missing %s' % (lazy.__name__,
+                self.name, ', '.join(lazy.requires)))
+            return False
+
+        class_name = _get_class_name(lazy)
+
+        # it was already imported and registered
+        if class_name in self.classes:
+            return True
+
+        self.classes[class_name] = lazy
+        self.ids[lazy] = class_name
+        return True
+
+    def _load(self, _id):
+        '''return the extension registered as _id, if it's lazy import it
+        and replace it, if it can't be imported or doesn't agree to the
+        interfaces remove it and return None'''
+        cls = self.classes[_id]
+
+        if not isinstance(cls, LazyExtension):
+            return cls
+
+        try:
+            loaded = cls.load()
+        except Exception, exception:
+            log.warning('cannot load %s on %s: %s' % (repr(cls), self.name,
+                str(exception)))
+            loaded = None
+        else:
+            for interface in self.interfaces:
+                if not is_implementation(loaded, interface):
+                    log.warning("cls doesn't agree to the interface: %s" %\
+                     str(interface))
+                    loaded = None
+                    break
+
+        if loaded is None:
+            del self.classes[_id]
+            self.ids.pop(cls, None)
+            return None
+
+        self.classes[_id] = loaded
+        self.ids[loaded] = _id
+        return loaded
+
     def activate(self, cls):
         '''This will make an extension "active", that means you can use it
         for your multi-extension'''
@@ -230,7 +345,10 @@ class Category(object):
         '''@return an id:class dict of the active extensions'''
         active = {}
         for _id in self.active:
-            active[_id] = self.classes[_id]
+            cls = self._load(_id)
+
+            if cls is not None:
+                active[_id] = cls
         return active
 
     def _set_default(self, cls):
@@ -249,15 +367,30 @@ class Category(object):
             self.instance = None
 
     def _get_default(self):
-        '''return the default extension for this category'''
-        if not self.default_id:
-            if not self.get_extensions():
-                return None
-            self.default = self.get_extensions().values()[0]
-            log.warning('Choosing a default extension for %s RANDOMLY! --> %s'\
-                    % (self.name, self.default))
+        '''return the default extension for this category, if it's lazy
+        it's imported here'''
+        if self.default_id in self.classes:
+            cls = self._load(self.default_id)
+
+            if cls is not None:
+                return cls
+
+            # it couldn't be loaded, fall back to the system default
+            self.instance = None
+            system_default = getattr(self, 'system_default', None)
 
-        return self.classes[self.default_id]
+            if system_default is not None and \
+                    _get_class_name(system_default) in self.classes:
+                self.default = system_default
+                return self._get_default()
+
+        if not self.get_extensions():
+            return None
+        self.default = self.get_extensions().values()[0]
+        log.warning('Choosing a default extension for %s RANDOMLY! --> %s'\
+                % (self.name, self.default_id))
+
+        return self._get_default()
 
     default = property(fget=_get_default, fset=_set_default)
 
@@ -337,6 +470,10 @@ class Category(object):
             self.interfaces = tuple(interfaces)
             #check if the current extensions satisfy the new interface
             for cls in self.classes.values():
+                # lazy extensions are checked when they are loaded
+                if isinstance(cls, LazyExtension):
+                    continue
+
                 for interface in self.interfaces:
                     if not is_implementation(cls, interface):
                         log.warning("Extension %s of category %s\
@@ -497,10 +634,60 @@ def is_implementation(cls, interface_cls):
     return True
 
 
+def is_available(*modules):
+    '''return True if all the modules can be imported, only the top level
+    package of each module is searched and nothing is imported'''
+    for module in modules:
+        name = module.split('.')[0]
+
+        if name in sys.modules:
+            continue
+
+        try:
+            handle = imp.find_module(name)[0]
+        except ImportError:
+            return False
+
+        if handle is not None:
+            handle.close()
+
+    return True
+
+
+def _find_module_file(module):
+    '''return the path of the file that defines module without importing
+    it, None if it isn't found'''
+    if module in sys.modules:
+        return getattr(sys.modules[module], '__file__', None)
+
+    path = None
+
+    for name in module.split('.'):
+        try:
+            (handle, path, description) = imp.find_module(name,
+                path and [path])
+        except ImportError:
+            return None
+
+        if handle is not None:
+            handle.close()
+
+    if description[2] == imp.PKG_DIRECTORY:
+        path = os.path.join(path, '__init__.py')
+
+    return path
+
+
 def _get_class_name(cls):
     '''Returns the full path of a class
     For instances, call get_full_name(self.__class__)'''
-    if hasattr(sys.modules[cls.__module__], "__file__"):
+    if isinstance(cls, LazyExtension):
+        path = _find_module_file(cls.module)
+        if path is not None:
+            path = os.path.abspath(path)
+        else:
+            path = cls.module
+    elif hasattr(sys.modules[cls.__module__], "__file__"):
         path = os.path.abspath(sys.modules[cls.__module__].__file__)
     else:
         path = ""
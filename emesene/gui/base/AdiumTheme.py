@@ -27,6 +27,12 @@ import parsers
 import gui
 import MarkupParser
 
+# the variables replaced on the message templates, %time{format}% is
+# matched with the name on the second group
+VARS_RE = re.compile('%(?:(sender|senderScreenName|senderDisplayName|'
+    'userIconPath|senderStatusIcon|messageDirection|message|time|shortTime|'
+    'service|messageClasses|status)|time{(.*?)})%')
+
 class AdiumTheme(object):
     '''a class that contains information of a adium theme
     '''
@@ -47,6 +53,8 @@ class AdiumTheme(object):
         self.outgoing       = None
         self.outgoing_next  = None
         self.info           = None
+        # template as key and the list returned by compile_template as value
+        self.compiled       = {}
 
         self.load_information(path)
 
@@ -72,6 +80,12 @@ class AdiumTheme(object):
         self.outgoing_next = read_file(self.outgoing_path,
                 'NextContent.html')
 
+        self.compiled = {}
+        for template in (self.content, self.incoming, self.incoming_next,
+                self.outgoing, self.outgoing_next):
+            if template is not None:
+                self.compiled[template] = compile_template(template)
+
     def format_incoming(self, msg, style=None, cedict={}, cedir=None):
         '''return a string containing the template for the incoming message
         with the vars replaced
@@ -128,37 +142,49 @@ class AdiumTheme(object):
         if style is not None:
             msgtext = style_message(msgtext, style)
 
-        template = template.replace('%sender%', escape(msg.alias))
-        template = template.replace('%senderScreenName%', escape(msg.sender))
-        template = template.replace('%senderDisplayName%',
-            escape(msg.display_name))
-        template = template.replace('%userIconPath%', escape(msg.image_path))
-        template = template.replace('%senderStatusIcon%',
-            escape(msg.status_path))
-        template = template.replace('%messageDirection%',
-            escape(msg.direction))
-        template = template.replace('%message%', msgtext)
+        segments = self.compiled.get(template, None)
+
+        if segments is None:
+            segments = compile_template(template)
+            self.compiled[template] = segments
+
+        values = {
+            'sender': escape(msg.alias),
+            'senderScreenName': escape(msg.sender),
+            'senderDisplayName': escape(msg.display_name),
+            'userIconPath': escape(msg.image_path),
+            'senderStatusIcon': escape(msg.status_path),
+            'messageDirection': escape(msg.direction),
+            'message': msgtext,
+            'shortTime': escape(time.strftime("%H:%M")),
+            'service': escape(msg.service),
+            'messageClasses': escape(msg.classes),
+            'status': escape(msg.status),
+        }
 
         if msg.timestamp is None:
-            template = template.replace('%time%',
-                escape(time.strftime(self.timefmt)))
+            values['time'] = escape(time.strftime(self.timefmt))
         else:
             def utc_to_local(t):
                 secs = calendar.timegm(t)
                 return time.localtime(secs)
             l_time = utc_to_local(msg.timestamp.timetuple()) #time.struct_time
             d_time = datetime.datetime.fromtimestamp(time.mktime(l_time))
-            template = template.replace('%time%', 
-                escape(d_time.strftime('%x %X')))
+            values['time'] = escape(d_time.strftime('%x %X'))
 
-        template = re.sub("%time{(.*?)}%", replace_time, template)
-        template = template.replace('%shortTime%',
-            escape(time.strftime("%H:%M")))
-        template = template.replace('%service%', escape(msg.service))
-        template = template.replace('%messageClasses%', escape(msg.classes))
-        template = template.replace('%status%', escape(msg.status))
+        result = []
+        for segment in segments:
+            if type(segment) == tuple:
+                name, time_format = segment
+
+                if name is None:
+                    result.append(time.strftime(time_format))
+                else:
+                    result.append(values[name])
+            else:
+                result.append(segment)
 
-        return template.replace('\n', '')
+        return ''.join(result)
 
     def replace_header_or_footer(self, template, source, target,
             target_display, source_img, target_img):
@@ -247,6 +273,26 @@ def unescape(string_):
     '''replace the values on dic_inv keys with the values'''
     return xml.sax.saxutils.unescape(string_, __dic_inv)
 
+def compile_template(template):
+    '''split a message template in a list of strings and tuples (name,
+    time format) where the variables are, name is None for %time{format}%
+    '''
+    template = template.replace('\n', '')
+    segments = []
+    start = 0
+
+    for match in VARS_RE.finditer(template):
+        if match.start() > start:
+            segments.append(template[start:match.start()])
+
+        segments.append(match.groups())
+        start = match.end()
+
+    if start < len(template):
+        segments.append(template[start:])
+
+    return segments
+
 def replace_time(match):
     '''replace the format of the time to it's value'''
     return time.strftime(match.groups()[0])
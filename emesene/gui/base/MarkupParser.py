@@ -23,6 +23,7 @@ import xml.sax.saxutils
 import re
 import base64
 
+import e3
 import gui
 
 dic = {
@@ -38,6 +39,12 @@ dic_inv = {
 URL_REGEX_STR = '(http[s]?://|www\..)(?:[a-zA-Z]|[0-9]|[$\-_@.&+]|[!*\"\'\(\),]|[=;/#?:]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
 URL_REGEX = re.compile(URL_REGEX_STR)
 
+# tags and entities are skipped when looking for emoticons
+SKIP_REGEX_STR = r'<[^>]+>|&(?:#\d{1,3}|[\d\w]+);'
+
+# compiled emoticon matchers by (escaped, shortcuts)
+_matchers = e3.common.LRUCache(32)
+
 def escape(string_):
     '''replace the values on dic keys with the values'''
     return xml.sax.saxutils.escape(string_, dic)
@@ -46,6 +53,62 @@ def unescape(string_):
     '''replace the values on dic_inv keys with the values'''
     return xml.sax.saxutils.unescape(string_, dic_inv)
 
+def get_emote_matcher(shortcuts, escaped=False):
+    '''return a tuple (regex, codes) to find all the shortcuts in one pass,
+    the emoticon found is on the group 'emote' of each match (None if the
+    match is a tag or an entity), codes has the text matched as key and the
+    shortcut as value, if escaped is True the regex looks for the escaped
+    shortcuts, return None if shortcuts is empty'''
+    key = (escaped, frozenset(shortcuts))
+    matcher = _matchers.get(key)
+
+    if matcher is not None:
+        return matcher
+
+    if not key[1]:
+        return None
+
+    codes = {}
+    for shortcut in key[1]:
+        if escaped:
+            codes[escape(shortcut)] = shortcut
+        else:
+            codes[shortcut] = shortcut
+
+    # the longest shortcuts first so ':-)' is not found as ':-' plus ')'
+    alternatives = sorted(codes.keys(), key=len, reverse=True)
+    regex = re.compile('(?P<emote>%s)|%s' % ('|'.join(
+        [re.escape(code) for code in alternatives]), SKIP_REGEX_STR))
+
+    matcher = (regex, codes)
+    _matchers.put(key, matcher)
+
+    return matcher
+
+def replace_emotes_with(text, matcher, get_tag):
+    '''replace the emoticons found by matcher in text with the value
+    returned by get_tag(shortcut, code), if it returns None the emoticon
+    is left as it is'''
+    if matcher is None:
+        return text
+
+    regex, codes = matcher
+
+    def replace(match):
+        code = match.group('emote')
+
+        if code is None:
+            return match.group()
+
+        tag = get_tag(codes[code], code)
+
+        if tag is None:
+            return code
+
+        return tag
+
+    return regex.sub(replace, text)
+
 def parse_emotes(message, cedict={}):
     '''parser the emotes in a message, return a string with img tags
     for the emotes acording to the theme'''
@@ -58,38 +121,25 @@ def parse_emotes(message, cedict={}):
     else:
         plain_text = ''
 
-    chunks = [plain_text]
-    shortcuts = gui.Theme.EMOTES.keys()
-    if cedict is not None:
-        shortcuts.extend(cedict.keys())
-    temp = []
-
-    while len(shortcuts) > 0:
-        shortcut = shortcuts.pop()
-        temp = []
-
-        for chunk in chunks:
-            parts = chunk.split(shortcut)
+    if cedict is None:
+        cedict = {}
 
-            if len(parts) > 1:
-                if shortcut in gui.Theme.EMOTES.keys():
-                    path = gui.theme.emote_to_path(shortcut)
-                else:
-                    path = cedict[shortcut]
-                tag = '<img src="%s" alt="%s"/>' % (path, shortcut)
+    def get_tag(shortcut, code):
+        if shortcut in gui.Theme.EMOTES:
+            path = gui.theme.emote_to_path(shortcut)
+        else:
+            path = cedict[shortcut]
 
-                for part in parts:
-                    temp.append(part)
-                    temp.append(tag)
+        if path is None:
+            return None
 
-                temp.pop()
-            else:
-                temp.append(chunk)
+        return '<img src="%s" alt="%s"/>' % (path, shortcut)
 
-        chunks = temp
+    matcher = get_emote_matcher(gui.Theme.EMOTES.keys() + cedict.keys())
 
     # return the markup with plan text
-    return message.replace(plain_text, ''.join(chunks))
+    return message.replace(plain_text,
+        replace_emotes_with(plain_text, matcher, get_tag))
 
 def replace_shortcut_with_tag(string, short, tag):
     token = '#IRREPLACEABLE#'
@@ -105,46 +155,50 @@ def replace_shortcut_with_tag(string, short, tag):
 
 def replace_emotes(msgtext, cedict={}, cedir=None, sender=''):
     '''replace emotes with img tags to the images'''
-    shortcuts = gui.Theme.EMOTES.keys()
-    if cedict is not None:
-        l_cedict = cedict.keys()
-        l_cedict.sort(key=lambda x: len(x), reverse=True)
-        shortcuts.extend(l_cedict)
-    for shortcut in shortcuts:
-        eshort = escape(shortcut)
-        if eshort in msgtext:
-            if shortcut in gui.Theme.EMOTES.keys():
-                path = gui.theme.emote_to_path(shortcut)
-            else:
-                path = os.path.join(cedir, cedict[shortcut])
-
-            if path is not None:
-                # creating sort of uid for image name since different users
-                # may have different images with the same shortcut
-                _id = base64.b64encode(sender+shortcut)
-                imgtag = '<img src="%s" alt="%s" name="%s"/>' % (path, eshort, _id)
-                #msgtext = msgtext.replace(eshort, imgtag)
-                msgtext = replace_shortcut_with_tag(msgtext, eshort, imgtag)
-
-    return msgtext
+    if cedict is None:
+        cedict = {}
+
+    def get_tag(shortcut, eshort):
+        # the theme emoticons have precedence over the custom ones
+        if shortcut in gui.Theme.EMOTES:
+            path = gui.theme.emote_to_path(shortcut)
+        else:
+            path = os.path.join(cedir, cedict[shortcut])
+
+        if path is None:
+            return None
+
+        # creating sort of uid for image name since different users
+        # may have different images with the same shortcut
+        _id = base64.b64encode(sender+shortcut)
+        return '<img src="%s" alt="%s" name="%s"/>' % (path, eshort, _id)
+
+    matcher = get_emote_matcher(gui.Theme.EMOTES.keys() + cedict.keys(),
+        True)
+
+    return replace_emotes_with(msgtext, matcher, get_tag)
 
 def get_custom_emotes(message, cedict={}):
     ''' returns a list with the shortcuts of the
         custom emoticons present in the message
         celist comes from cache '''
-    chunks = [message]
     l = []
     if cedict is None:
         return l
-    shortcuts = cedict.keys()
-    while len(shortcuts) > 0:
-        shortcut = shortcuts.pop()
 
-        for chunk in chunks:
-            parts = chunk.split(shortcut)
+    matcher = get_emote_matcher(cedict.keys())
+
+    if matcher is None:
+        return l
+
+    regex, codes = matcher
+
+    for match in regex.finditer(message):
+        code = match.group('emote')
+
+        if code is not None and code not in l:
+            l.append(code)
 
-            if len(parts) > 1:
-                l.append(shortcut)
     return l
 
 def replace_urls(match):
@@ -23,6 +23,7 @@ import re
 # you should jump to the used code somewhere down here.
 ################################################################################
 from e3.common.XmlParser import DictObj
+from e3.common.LRUCache import LRUCache
 
 import gui
 
@@ -37,6 +38,15 @@ COLOR_MAP = (
     '980299','01038C','01885F','389600','9A9E15','473400','4D0000','5F0162',
     '000047','06502F','1C5300','544D05')
 
+# parsed markup by (text, do_parse_emotes), nicks change rarely but are
+# rendered all the time
+MSNPLUS_CACHE_SIZE = 500
+_msnplus_cache = LRUCache(MSNPLUS_CACHE_SIZE)
+
+# markup nested deeper than this is shown as plain text, the helpers below
+# and the code that renders the result walk the tags recursively
+MAX_NESTING = 50
+
 open_tag_re = re.compile('''(.*?)\[\$?(/?)(\w+)(\=(\#?[0-9a-f]+))?\]''', re.IGNORECASE)
 
 def parse_emotes(markup):
@@ -53,52 +63,63 @@ def parse_emotes(markup):
     return accum
 
 def _msnplus_to_dict(msnplus, message_stack, do_parse_emotes=True):
-    '''convert it into a dict, as the one used by XmlParser'''
+    '''convert it into a dict, as the one used by XmlParser, return None if
+    the tags are nested deeper than MAX_NESTING'''
     #STATUS: seems to work! (with gradients too)
-    match = open_tag_re.match(msnplus)
+    # one tag is consumed on each iteration, it used to be recursive but
+    # long nicks reached the maximum recursion depth
+    first = True
+
+    while True:
+        match = open_tag_re.match(msnplus)
+
+        if not match: #only text
+            message_stack.append(msnplus)
+
+            if not first:
+                return {'tag': 'span', 'childs': message_stack}
 
-    if not match: #only text
-        if do_parse_emotes:
-            parsed_markup = parse_emotes(msnplus)
-        else:
-            parsed_markup = [msnplus]
-
-        message_stack.append(msnplus)
-        return {'tag': 'span', 'childs': parsed_markup}
-
-    text_before = match.group(1)
-    open_ = (match.group(2) == '') #and not '/'
-    tag = match.group(3)
-    arg = match.group(5)
-
-    if open_:
-        if text_before.strip(): #just to avoid useless items (we could put it anyway, if we like)
-            message_stack[-1]['childs'].append(text_before)
-
-        msgdict = {'tag': tag, tag: arg, 'childs':[]}
-        message_stack.append(msgdict)
-    else: #closing tags
-        if arg:
-            start_tag = message_stack[-1][tag]
-            message_stack[-1][tag] = (start_tag, arg)
-        if text_before.strip(): #just to avoid useless items (we could put it anyway, if we like)
             if do_parse_emotes:
-                text_before = parse_emotes(text_before)
-                message_stack[-1]['childs'] += text_before
+                parsed_markup = parse_emotes(msnplus)
             else:
+                parsed_markup = [msnplus]
+
+            return {'tag': 'span', 'childs': parsed_markup}
+
+        first = False
+        text_before = match.group(1)
+        open_ = (match.group(2) == '') #and not '/'
+        tag = match.group(3)
+        arg = match.group(5)
+
+        if open_:
+            if text_before.strip(): #just to avoid useless items (we could put it anyway, if we like)
                 message_stack[-1]['childs'].append(text_before)
 
-        tag_we_re_closing = message_stack.pop() #-1
+            msgdict = {'tag': tag, tag: arg, 'childs':[]}
+            message_stack.append(msgdict)
+
+            if len(message_stack) > MAX_NESTING:
+                return None
+        else: #closing tags
+            if arg:
+                start_tag = message_stack[-1][tag]
+                message_stack[-1][tag] = (start_tag, arg)
+            if text_before.strip(): #just to avoid useless items (we could put it anyway, if we like)
+                if do_parse_emotes:
+                    text_before = parse_emotes(text_before)
+                    message_stack[-1]['childs'] += text_before
+                else:
+                    message_stack[-1]['childs'].append(text_before)
 
-        if type(message_stack[-1]) == dict:
-            message_stack[-1]['childs'].append(tag_we_re_closing)
-        else:
-            message_stack.append(tag_we_re_closing)
+            tag_we_re_closing = message_stack.pop() #-1
 
-    #go recursive!
-    _msnplus_to_dict(msnplus[len(match.group(0)):], message_stack)
+            if type(message_stack[-1]) == dict:
+                message_stack[-1]['childs'].append(tag_we_re_closing)
+            else:
+                message_stack.append(tag_we_re_closing)
 
-    return {'tag': 'span', 'childs': message_stack}
+        msnplus = msnplus[len(match.group(0)):]
 
 def _nchars_dict(msgdict):
     '''count how many character are there'''
@@ -277,13 +298,31 @@ def _dict_translate_tags(msgdict):
 
 def msnplus(msnplus, do_parse_emotes=True):
     '''given a string with msn+ formatting, give a DictObj
-    representing its formatting.'''
+    representing its formatting. the result is cached and shared between
+    callers so it shouldn't be modified'''
+    key = (msnplus, do_parse_emotes)
+    result = _msnplus_cache.get(key)
+
+    if result is not None:
+        return result
+
     message_stack = [{'tag':'', 'childs':[]}]
     dictlike = _msnplus_to_dict(msnplus, message_stack, do_parse_emotes)
+
+    if dictlike is None:
+        text = msnplus_strip(msnplus)
+
+        if do_parse_emotes:
+            dictlike = {'tag': 'span', 'childs': parse_emotes(text)}
+        else:
+            dictlike = {'tag': 'span', 'childs': [text]}
+
     _hex_colors(dictlike)
     _dict_gradients(dictlike)
     _dict_translate_tags(dictlike)
-    return DictObj(dictlike)
+    result = DictObj(dictlike)
+    _msnplus_cache.put(key, result)
+    return result
 
 def msnplus_strip(msnplus, useless_arg=None):
     '''
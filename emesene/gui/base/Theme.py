@@ -371,7 +371,6 @@ class Theme(object):
         and the text as second item.
         example : [(False, "hi! "), (True, ":)")]
         '''
-        keys = Theme.EMOTES.keys()
-        return [(item in keys, item) for item in Theme.EMOTE_REGEX.split(text)
-                if item is not None]
+        return [(item in Theme.EMOTES, item)
+                for item in Theme.EMOTE_REGEX.split(text) if item is not None]
 
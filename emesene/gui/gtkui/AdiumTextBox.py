@@ -18,10 +18,12 @@
 
 import os
 import gtk
+import glib
 import logging
 log = logging.getLogger('gtkui.AdiumTextBox')
 import webkit
 import base64
+import collections
 import xml.sax.saxutils
 
 import webbrowser
@@ -33,6 +35,12 @@ class OutputView(webkit.WebView):
     '''a class that represents the output widget of a conversation
     '''
 
+    # number of removed messages added back each time the user scrolls to
+    # the top
+    RESTORE_COUNT = 50
+    # removed messages kept to add back are at most scrollback * this
+    TRIMMED_FACTOR = 10
+
     def __init__(self, theme, source, target, target_display, source_img,
             target_img):
         webkit.WebView.__init__(self)
@@ -46,6 +54,18 @@ class OutputView(webkit.WebView):
         self.last_incoming_account = None
         self.ready = False
         self.pending = []
+        self.flush_id = None
+        # maximum number of messages on the document, 0 for no limit
+        self.scrollback = 0
+        # the html of each message shown and its next messages, and the
+        # ones that were removed from the document because of scrollback
+        self.blocks = collections.deque()
+        self.trimmed = []
+        # blocks added back on top, they aren't removed until the user
+        # scrolls to the bottom again
+        self.restored = 0
+        # blocks removed from self.blocks that are still on the document
+        self.removing = 0
         self.connect('load-finished', self._loading_finished_cb)
         self.connect('populate-popup', self.on_populate_popup)
         self.connect("navigation-requested", self.on_navigation_requested)
@@ -55,12 +75,7 @@ class OutputView(webkit.WebView):
         '''callback called when the content finished loading
         '''
         self.ready = True
-
-        for function in self.pending:
-            self.execute_script(function)
-
-        self.execute_script("scrollToBottom()")
-        self.pending = []
+        self._flush()
 
     def clear(self, source="", target="", target_display="",
             source_img="", target_img=""):
@@ -71,6 +86,14 @@ class OutputView(webkit.WebView):
                 "text/html", "utf-8", "file://" + self.theme.path)
         self.pending = []
         self.ready = False
+        self.blocks.clear()
+        self.trimmed = []
+        self.restored = 0
+        self.removing = 0
+
+        if self.flush_id is not None:
+            glib.source_remove(self.flush_id)
+            self.flush_id = None
 
     def add_message(self, msg, style=None, cedict={}, cedir=None):
         '''add a message to the conversation'''
@@ -95,22 +118,100 @@ class OutputView(webkit.WebView):
             html = self.theme.format_outgoing(msg, style, cedict, cedir)
             self.last_incoming = False
 
-        if msg.first:
+        if msg.first or not self.blocks:
             function = "appendMessage('" + html + "')"
+            self.blocks.append([html])
         else:
             function = "appendNextMessage('" + html + "')"
+            self.blocks[-1].append(html)
 
         self.append(function)
+        self._trim()
 
     def append(self, function):
-        '''append a message if the renderer finished loading, append it to
-        pending if still loading
+        '''add function to the functions executed on the next iteration of
+        the main loop, or when the renderer finished loading, so a burst of
+        messages is added with one call
         '''
-        if self.ready:
-            self.execute_script(function)
+        self.pending.append(function)
+
+        if self.ready and self.flush_id is None:
+            self.flush_id = glib.idle_add(self._flush)
+
+    def _flush(self):
+        '''execute the pending functions'''
+        self.flush_id = None
+
+        if self.pending:
+            self.execute_script(';'.join(self.pending))
+            self.pending = []
+
+            if self.removing:
+                self._remove()
+
             self.execute_script("scrollToBottom()")
-        else:
-            self.pending.append(function)
+
+        return False
+
+    def _evaluate(self, expression):
+        '''return the value of a javascript expression as a string'''
+        self.execute_script('oldtitle=document.title;'
+            'document.title=String(%s);' % (expression,))
+        value = self.get_main_frame().get_title()
+        self.execute_script('document.title=oldtitle;')
+        return value
+
+    def _remove(self):
+        '''remove from the document the blocks trimmed, the ones that it
+        didn't remove are added back to self.blocks to keep the same count'''
+        count = self.removing
+        self.removing = 0
+
+        try:
+            removed = int(self._evaluate("removeFirstMessages(%d)" %
+                (count,)))
+        except (TypeError, ValueError):
+            removed = 0
+
+        if removed < count:
+            log.warning('%d of %d messages removed' % (removed, count))
+            kept = self.trimmed[removed - count:]
+            del self.trimmed[removed - count:]
+            self.blocks.extendleft(reversed(kept))
+
+    def _trim(self):
+        '''remove the oldest messages if there are more than scrollback plus
+        the ones added back'''
+        count = len(self.blocks) - self.scrollback - self.restored
+
+        if self.scrollback <= 0 or count <= 0:
+            return
+
+        for i in range(count):
+            self.trimmed.append(self.blocks.popleft())
+
+        self.removing += count
+        del self.trimmed[:-self.scrollback * OutputView.TRIMMED_FACTOR]
+
+    def restore_messages(self, count=RESTORE_COUNT):
+        '''add back on top up to count messages removed because of the
+        scrollback'''
+        if not self.trimmed or not self.ready or self.pending:
+            return
+
+        blocks = self.trimmed[-count:]
+        del self.trimmed[-count:]
+        self.blocks.extendleft(reversed(blocks))
+        self.restored += len(blocks)
+
+        self.execute_script("prependMessages([%s])" % (','.join(
+            ["[%s]" % (','.join(["'" + html + "'" for html in block]),)
+                for block in blocks]),))
+
+    def release_restored(self):
+        '''called when the user scrolls to the bottom, the messages added
+        back are removed with the next message'''
+        self.restored = 0
 
     def _set_text(self, text):
         '''set the text on the widget'''
@@ -163,8 +264,11 @@ class OutputText(gtk.ScrolledWindow):
         picture = os.path.abspath(gui.theme.user)
         self.view = OutputView(gui.theme.conv_theme, "", "", "", picture,
                 picture)
+        self.view.scrollback = self.config.get_or_set('i_adium_scrollback',
+                500)
         self.view.connect('load-finished', self._loading_stop_cb)
         self.view.connect('console-message', self._error_cb)
+        self.get_vadjustment().connect('value-changed', self._on_scroll)
         self.clear()
         self.view.show()
         self.add(self.view)
@@ -175,6 +279,16 @@ class OutputText(gtk.ScrolledWindow):
         self.loaded = False
         self.view.clear()
 
+    def _on_scroll(self, adjustment):
+        '''called when the view is scrolled, add back the oldest messages
+        when the top is reached'''
+        value = adjustment.get_value()
+
+        if value <= adjustment.get_lower():
+            self.view.restore_messages()
+        elif value + adjustment.get_page_size() >= adjustment.get_upper():
+            self.view.release_restored()
+
     def _error_cb(self, view, message, line, source_id):
         '''called when a message is sent to the console'''
         message = "Webkit message: %s %s %s" % (message, line, source_id)
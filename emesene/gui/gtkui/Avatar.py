@@ -148,11 +148,18 @@ class Avatar(gtk.Widget):
         if not gui.gtkui.utils.file_readable(filename):
             self.filename = gui.theme.logo
 
-        try:
-            animation = gtk.gdk.PixbufAnimation(filename)
-        except gobject.GError:
+        # use the cached thumbnail instead of decoding the full image
+        size = int(self._dimention)
+        animation = gui.gtkui.utils.load_avatar(self.filename, (size, size))
+
+        if animation is None:
             animation = gtk.gdk.PixbufAnimation(gui.theme.logo)
 
+        if isinstance(animation, gtk.gdk.Pixbuf):
+            self.__set_from_pixbuf(animation)
+            self.current_animation = None
+            return
+
         if animation.is_static_image():
             self.__set_from_pixbuf(animation.get_static_image())
             self.current_animation = None
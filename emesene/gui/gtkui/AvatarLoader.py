@@ -0,0 +1,122 @@
+'''a pool of threads that decode and scale avatars out of the main loop'''
+# -*- coding: utf-8 -*-
+
+#    This file is part of emesene.
+#
+#    emesene is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    emesene is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with emesene; if not, write to the Free Software
+#    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import Queue
+import threading
+
+import gobject
+
+import utils
+
+import logging
+log = logging.getLogger('gtkui.AvatarLoader')
+
+class AvatarLoader(object):
+    '''loads avatars on a pool of threads and calls callback on the main
+    loop with the key and the pixbuf (or animation, or None if it couldn't
+    be loaded) when each one is ready, urgent requests are loaded first'''
+
+    WORKERS = 2
+
+    (URGENT, NORMAL) = range(2)
+
+    def __init__(self, callback, size=32):
+        '''class constructor'''
+        self.callback = callback
+        self.size = size
+
+        # key as key and a tuple (path, urgent) as value
+        self.pending = {}
+        self.queue = Queue.PriorityQueue()
+        # keeps the order of the requests with the same priority
+        self.count = 0
+        self.workers = []
+
+    def request(self, key, path, urgent=False):
+        '''load the avatar on path for key, a new request for the same key
+        replaces the previous one'''
+        current = self.pending.get(key, None)
+
+        if current is not None and current[0] == path and \
+                (current[1] or not urgent):
+            return
+
+        if not self.workers:
+            self._start()
+
+        if urgent:
+            priority = AvatarLoader.URGENT
+        else:
+            priority = AvatarLoader.NORMAL
+
+        self.pending[key] = (path, urgent)
+        self.count += 1
+        self.queue.put((priority, self.count, key, path))
+
+    def cancel(self, key):
+        '''don't call callback for the pending request of key'''
+        self.pending.pop(key, None)
+
+    def quit(self):
+        '''stop the threads, the pending requests are dropped'''
+        self.pending.clear()
+
+        for worker in self.workers:
+            self.queue.put((-1, 0, None, None))
+
+        self.workers = []
+
+    def _start(self):
+        '''start the threads'''
+        for i in range(AvatarLoader.WORKERS):
+            worker = threading.Thread(target=self._work)
+            worker.setDaemon(True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _work(self):
+        '''main method of the threads'''
+        while True:
+            (priority, count, key, path) = self.queue.get()
+
+            if key is None:
+                break
+
+            # the request was replaced or already loaded
+            current = self.pending.get(key, None)
+            if current is None or current[0] != path:
+                continue
+
+            try:
+                pixbuf = utils.load_avatar(path, (self.size, self.size))
+            except Exception:
+                log.exception('error loading avatar ' + path)
+                pixbuf = None
+
+            gobject.idle_add(self._deliver, key, path, pixbuf)
+
+    def _deliver(self, key, path, pixbuf):
+        '''call callback on the main loop if the request is still pending'''
+        current = self.pending.get(key, None)
+
+        if current is not None and current[0] == path:
+            del self.pending[key]
+            self.callback(key, pixbuf)
+
+        return False
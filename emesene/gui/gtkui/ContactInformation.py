@@ -292,7 +292,9 @@ class ChatWidget(gtk.VBox):
         self.text.clear()
         self.request_chats_between(1000, self._on_chats_ready)
 
-    def request_chats_between(self, limit, callback):
+    def _get_time_range(self):
+        '''return a tuple (from_t, to_t) with the timestamps selected on the
+        calendars'''
         from_year, from_month, from_day = self.from_calendar.get_date()
         from_t = time.mktime(datetime.date(from_year, from_month + 1,
             from_day).timetuple())
@@ -301,22 +303,34 @@ class ChatWidget(gtk.VBox):
         to_t = time.mktime((datetime.date(to_year, to_month + 1,
             to_day) + datetime.timedelta(1)).timetuple())
 
+        return from_t, to_t
+
+    def request_chats_between(self, limit, callback):
+        from_t, to_t = self._get_time_range()
+
         self.session.logger.get_chats_between(self.account,
             self.session.account.account, from_t, to_t, limit, callback)
 
-    def save_chats(self, path, limit=1000):
-        '''request amount of messages between our account and the current
-        account, save it to path'''
+    def save_chats(self, path, page_size=1000):
+        '''save the messages between our account and the current account
+        on the selected range to path, they are requested and written one
+        page at a time so the size of the log doesn't matter'''
+        exporter = extension.get_default('history exporter')
+        handle = open(path, "w")
+
         def _on_save_chats_ready(results):
-            '''called when the chats requested are ready
+            '''called when a page of the chats requested is ready, an
+            empty page means there are no more chats
             '''
-            if not results:
-                return
-
-            exporter = extension.get_default('history exporter')
-            exporter(results, open(path, "w"))
+            if results:
+                exporter(results, handle)
+            else:
+                handle.close()
 
-        self.request_chats_between(limit, _on_save_chats_ready)
+        from_t, to_t = self._get_time_range()
+        self.session.logger.iter_chats(self.account,
+            self.session.account.account, page_size, False, from_t, to_t,
+            _on_save_chats_ready)
 
     def _on_chats_ready(self, results):
         '''called when the chat history is ready'''
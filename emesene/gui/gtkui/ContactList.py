@@ -29,6 +29,7 @@ import logging
 
 import Tooltips
 import Renderers
+from AvatarLoader import AvatarLoader
 
 log = logging.getLogger('gtkui.ContactList')
 
@@ -42,6 +43,7 @@ class ContactList(gui.ContactList, gtk.TreeView):
     def __init__(self, session):
         '''class constructor'''
         self._model = None
+        self.avatar_loader = AvatarLoader(self._on_avatar_loaded)
         dialog = extension.get_default('dialog')
         pbr = extension.get_default('avatar renderer')
         self.pbr = pbr()
@@ -55,6 +57,13 @@ class ContactList(gui.ContactList, gtk.TreeView):
         self.offline_group = None
         self.offline_group_iter = None
 
+        # (group type, group identifier) as key and the TreeRowReference of
+        # the group row as value
+        self._group_rows = {}
+        # account as key and a list of tuples (group key, TreeRowReference)
+        # as value, the group key is None for contacts at the root
+        self._contact_rows = {}
+
         if self.session.config.d_weights is None:
             self.session.config.d_weights = {}
 
@@ -115,6 +124,8 @@ class ContactList(gui.ContactList, gtk.TreeView):
         self.connect('button-release-event' , self._on_button_press_event)
         self.connect('row-expanded' , self._on_expand)
         self.connect('row-collapsed' , self._on_collapse)
+        self.connect('expose-event' , self._on_expose)
+        self.connect('destroy' , self._on_destroy)
 
     def _on_expand(self, treeview, iter_, path):
         group = self.model[path][1]
@@ -126,30 +137,93 @@ class ContactList(gui.ContactList, gtk.TreeView):
 
     def _get_contact_pixbuf_or_default(self, contact):
         '''try to return a pixbuf of the user picture or the default
-        picture
+        picture, if the user picture is not loaded yet return the default
+        one and load it on the background
         '''
         if contact.picture:
-            try:
-                animation = gtk.gdk.PixbufAnimation(contact.picture)
-            except gobject.GError:
-                pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
-                        (self.avatar_size, self.avatar_size))
-                picture = gtk.image_new_from_pixbuf(pix)
-                return picture
-
-            if animation.is_static_image():
-                pix = utils.safe_gtk_pixbuf_load(contact.picture,
-                        (self.avatar_size, self.avatar_size))
-                picture = gtk.image_new_from_pixbuf(pix)
-            else:
-                picture = gtk.image_new_from_animation(animation)
+            pixbuf = utils.get_cached_avatar(contact.picture,
+                (self.avatar_size, self.avatar_size))
+
+            if pixbuf is not None:
+                self.avatar_loader.cancel(contact.account)
+                return self._image_from_pixbuf(pixbuf)
 
+            self.avatar_loader.request(contact.account, contact.picture)
         else:
-            pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
-                        (self.avatar_size, self.avatar_size))
-            picture = gtk.image_new_from_pixbuf(pix)
+            self.avatar_loader.cancel(contact.account)
+
+        pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
+                    (self.avatar_size, self.avatar_size))
+        return gtk.image_new_from_pixbuf(pix)
+
+    def _image_from_pixbuf(self, pixbuf):
+        '''return a gtk.Image from a pixbuf or an animation'''
+        if isinstance(pixbuf, gtk.gdk.PixbufAnimation):
+            return gtk.image_new_from_animation(pixbuf)
+
+        return gtk.image_new_from_pixbuf(pixbuf)
+
+    def _on_avatar_loaded(self, account, pixbuf):
+        '''called when the avatar of account was loaded on the background,
+        replace the default picture on the rows of account'''
+        if pixbuf is None:
+            return
+
+        picture = self._image_from_pixbuf(pixbuf)
+
+        for (key, itr) in self._get_contact_iters(account):
+            self._model.set_value(itr, 0, picture)
+
+    def _iter_visible_rows(self):
+        '''yield the rows of self.model that are shown on the viewport'''
+        visible = self.get_visible_range()
 
-        return picture
+        if visible is None:
+            return
+
+        (start, end) = visible
+        itr = self.model.get_iter(start)
+
+        while itr is not None:
+            path = self.model.get_path(itr)
+            yield self.model[itr]
+
+            if path >= end:
+                return
+
+            if self.model.iter_has_child(itr) and self.row_expanded(path):
+                itr = self.model.iter_children(itr)
+                continue
+
+            next_itr = self.model.iter_next(itr)
+
+            while next_itr is None:
+                itr = self.model.iter_parent(itr)
+
+                if itr is None:
+                    return
+
+                next_itr = self.model.iter_next(itr)
+
+            itr = next_itr
+
+    def _on_expose(self, widget, event):
+        '''load first the pending avatars of the rows that are shown'''
+        if not self.avatar_loader.pending:
+            return False
+
+        for row in self._iter_visible_rows():
+            obj = row[1]
+
+            if type(obj) == e3.Contact and obj.picture and \
+                    obj.account in self.avatar_loader.pending:
+                self.avatar_loader.request(obj.account, obj.picture, True)
+
+        return False
+
+    def _on_destroy(self, widget):
+        '''stop the avatar loader'''
+        self.avatar_loader.quit()
 
     def _visible_func(self, model, _iter):
         '''return True if the row should be displayed according to the
@@ -257,6 +331,76 @@ class ContactList(gui.ContactList, gtk.TreeView):
             else:
                 log.debug('empty paths?')
 
+    def _group_key(self, group):
+        '''return the key of group on the row index, special groups share
+        the identifier so the type is part of the key'''
+        return (group.type, group.identifier)
+
+    def _get_row_iter(self, reference):
+        '''return the iter of the row referenced by reference or None if
+        the row was removed'''
+        if reference is None or not reference.valid():
+            return None
+
+        return self._model.get_iter(reference.get_path())
+
+    def _get_group_iter(self, group):
+        '''return the iter of the row of group or None if it's not on the
+        list'''
+        key = self._group_key(group)
+        itr = self._get_row_iter(self._group_rows.get(key, None))
+
+        if itr is None:
+            self._group_rows.pop(key, None)
+
+        return itr
+
+    def _get_contact_iters(self, account):
+        '''return a list of tuples (group key, iter) with the rows of
+        account, the references to removed rows are dropped here'''
+        rows = self._contact_rows.get(account, None)
+
+        if not rows:
+            return []
+
+        rows = [(key, ref) for (key, ref) in rows if ref.valid()]
+
+        if rows:
+            self._contact_rows[account] = rows
+        else:
+            del self._contact_rows[account]
+
+        return [(key, self._model.get_iter(ref.get_path()))
+            for (key, ref) in rows]
+
+    def _append_contact(self, parent, group, contact_data):
+        '''append a contact row under parent and add it to the index, group
+        is None if the row is at the root'''
+        itr = self._model.append(parent, contact_data)
+        ref = gtk.TreeRowReference(self._model, self._model.get_path(itr))
+
+        if group is None:
+            key = None
+        else:
+            key = self._group_key(group)
+
+        account = contact_data[1].account
+        self._contact_rows.setdefault(account, []).append((key, ref))
+
+        return itr
+
+    def _remove_contact_rows(self, account, key):
+        '''remove the rows of account under the group with key (None for
+        the root), return True if some row was removed'''
+        removed = False
+
+        for (row_key, itr) in self._get_contact_iters(account):
+            if row_key == key:
+                del self._model[itr]
+                removed = True
+
+        return removed
+
     # overrided methods
     def refilter(self):
         '''refilter the values according to the value of self.filter_text'''
@@ -324,23 +468,27 @@ class ContactList(gui.ContactList, gtk.TreeView):
         group_data = (None, group, self.format_group(group), False, None,
             False, weight, special)
 
-        for row in self._model:
-            obj = row[1]
-            if type(obj) == e3.Group:
-                if obj.name == group.name:
-                    log.debug('Trying to add an existing group! ' + obj.name)
-                    return row.iter
+        itr = self._get_group_iter(group)
+
+        if itr is not None:
+            log.debug('Trying to add an existing group! ' + group.name)
+            return itr
 
         itr = self._model.append(None, group_data)
+        self._group_rows[self._group_key(group)] = gtk.TreeRowReference(
+            self._model, self._model.get_path(itr))
 
         return itr
 
     def remove_group(self, group):
         '''remove a group from the contact list'''
-        for row in self._model:
-            obj = row[1]
-            if type(obj) == e3.Group and obj.name == group.name:
-                del self._model[row.iter]
+        itr = self._get_group_iter(group)
+
+        if itr is not None:
+            # the references to the contacts of the group become invalid
+            # and are dropped the next time they are used
+            del self._model[itr]
+            del self._group_rows[self._group_key(group)]
 
     def add_contact(self, contact, group=None):
         '''add a contact to the contact list, add it to the group if
@@ -368,7 +516,8 @@ class ContactList(gui.ContactList, gtk.TreeView):
 
             self.offline_group.contacts.append(contact.account)
             self.update_offline_group()
-            return self._model.append(self.offline_group_iter, contact_data)
+            return self._append_contact(self.offline_group_iter,
+                self.offline_group, contact_data)
 
         # if we are in order by status mode and contact is online,
         # we add online contacts to their online group :)
@@ -379,111 +528,68 @@ class ContactList(gui.ContactList, gtk.TreeView):
 
             self.online_group.contacts.append(contact.account)
             self.update_online_group()
-            return self._model.append(self.online_group_iter, contact_data)
+            return self._append_contact(self.online_group_iter,
+                self.online_group, contact_data)
 
 
         # if it has no group and we are in order by group then add it to the
         # special group "No group"
         if not group and not self.order_by_status:
-            if self.no_group:
-                self.no_group.contacts.append(contact.account)
-                self.update_no_group()
-                return self._model.append(self.no_group_iter, contact_data)
-            else:
+            if not self.no_group:
                 self.no_group = e3.Group(_("No group"), type_ = e3.Group.NONE)
                 self.no_group_iter = self.add_group(self.no_group, True)
-                self.no_group.contacts.append(contact.account)
-                self.update_no_group()
-                return self._model.append(self.no_group_iter, contact_data)
+
+            self.no_group.contacts.append(contact.account)
+            self.update_no_group()
+            return self._append_contact(self.no_group_iter, self.no_group,
+                contact_data)
+
+        rows = self._get_contact_iters(contact.account)
 
         # if no group add it to the root, but check that it's not on a group
         # or in the root already
         if not group or self.order_by_status:
-            for row in self._model:
-                obj = row[1]
-                # check on group
-                if type(obj) == e3.Group:
-                    for contact_row in row.iterchildren():
-                        con = contact_row[1]
-                        if con.account == contact.account:
-                            return contact_row.iter
-                # check on the root
-                elif type(obj) == e3.Contact and obj.account == contact.account:
-                    return row.iter
+            if rows:
+                return rows[0][1]
 
-            return self._model.append(None, contact_data)
+            return self._append_contact(None, None, contact_data)
 
-        for row in self._model:
-            obj = row[1]
-            if type(obj) == e3.Group and obj.name == group.name:
-                # if the contact is already on the group, then dont add it
-                for contact_row in row.iterchildren():
-                    con = contact_row[1]
-                    if con.account == contact.account:
-                        return contact_row.iter
-
-                return_iter = self._model.append(row.iter, contact_data)
-                self.update_group(group)
-
-                # search the use on the root to remove it if it's there
-                # since we added him to a group
-                for irow in self._model:
-                    iobj = irow[1]
-                    if type(iobj) == e3.Contact and \
-                            iobj.account == contact.account:
-                        del self._model[irow.iter]
-
-                return return_iter
-        else: #######WTF???
+        group_iter = self._get_group_iter(group)
+
+        if group_iter is None:
             self.add_group(group)
             result = self.add_contact(contact, group)
             self.update_group(group)
             return result
 
+        # if the contact is already on the group, then dont add it
+        key = self._group_key(group)
+        for (row_key, itr) in rows:
+            if row_key == key:
+                return itr
+
+        return_iter = self._append_contact(group_iter, group, contact_data)
+        self.update_group(group)
+
+        # remove the contact from the root since we added him to a group
+        self._remove_contact_rows(contact.account, None)
+
+        return return_iter
+
     def remove_contact(self, contact, group=None):
         '''remove a contact from the specified group, if group is None
         then remove him from all groups'''
         if not group:
-            # go though the groups and the contacts without group
-            for row in self._model:
-                obj = row[1]
-                # if we get a group we go through the contacts
-                if type(obj) == e3.Group:
-                    for contact_row in row.iterchildren():
-                        con = contact_row[1]
-                        # if we find it, we remove it
-                        if con.account == contact.account:
-                            # we remove it from tree and from group.
-                            del self._model[contact_row.iter]
-                            del con
-                            if contact or group is None:
-                                return
-                            if group.contacts.count(contact.account) > 0:
-                                group.contacts.remove(contact.account)
-                            self.update_group(obj)
-
-                # if it's a contact without group (at the root)
-                elif type(obj) == e3.Contact and obj.account == contact.account:
-                    # TODO: Is removing only the tree object?
-                    del self._model[row.iter]
-                    del obj # CHECK!!!!!
+            for (key, itr) in self._get_contact_iters(contact.account):
+                del self._model[itr]
 
             return
 
-        # go though the groups
-        for row in self._model:
-            obj = row[1]
-            # if it's the group we are searching
-            if type(obj) == e3.Group and obj.name == group.name:
-                # go through all the contacts
-                for contact_row in row.iterchildren():
-                    con = contact_row[1]
-                    # if we find it, we remove it, from group and model
-                    if con.account == contact.account:
-                        del self._model[contact_row.iter]
-                        if group.contacts.count(contact.account) > 0:
-                            group.contacts.remove(contact.account)
-                        self.update_group(group)
+        # if we find it, we remove it, from group and model
+        if self._remove_contact_rows(contact.account, self._group_key(group)):
+            if group.contacts.count(contact.account) > 0:
+                group.contacts.remove(contact.account)
+            self.update_group(group)
 
     def clear(self):
         '''clear the contact list, return True if the list was cleared
@@ -499,6 +605,9 @@ class ContactList(gui.ContactList, gtk.TreeView):
         self.offline_group = None
         self.offline_group_iter = None
 
+        self._group_rows = {}
+        self._contact_rows = {}
+        self.avatar_loader.pending.clear()
         self._model.clear()
 
         # this is the best place to put this code without putting gtk code
@@ -522,22 +631,17 @@ class ContactList(gui.ContactList, gtk.TreeView):
             utils.safe_gtk_pixbuf_load(gui.theme.status_icons[contact.status]),
             weight, False, offline)
 
-        found = False
+        rows = self._get_contact_iters(contact.account)
+        found = bool(rows)
 
         group_found = None
-        for row in self._model:
-            obj = row[1]
-            if type(obj) == e3.Group:
-                for contact_row in row.iterchildren():
-                    con = contact_row[1]
-                    if con.account == contact.account:
-                        found = True
-                        group_found = obj
-                        self._model[contact_row.iter] = contact_data
-                        self.update_group(obj)
-            elif type(obj) == e3.Contact and obj.account == contact.account:
-                found = True
-                self._model[row.iter] = contact_data
+        for (key, itr) in rows:
+            self._model[itr] = contact_data
+            parent = self._model.iter_parent(itr)
+
+            if parent is not None:
+                group_found = self._model[parent][1]
+                self.update_group(group_found)
 
         # if we are in order by status, the contact was found and now is offline/online
         # delete contact from offline/online group and add to the oposite.
@@ -604,23 +708,27 @@ class ContactList(gui.ContactList, gtk.TreeView):
 
         self.session.config.d_weights[group.identifier] = weight
 
-        for row in self._model:
-            obj = row[1]
-            if type(obj) == e3.Group and obj.name == group.name:
-                if group.name in self.group_state:
-                    state = self.group_state[group.name]
-                    childpath = self._model.get_path(row.iter)
-                    path = self.model.convert_child_path_to_path(childpath)
+        itr = self._get_group_iter(group)
+
+        if itr is None:
+            return
+
+        row = self._model[itr]
 
-                    if path:
-                        if state:
-                            self.expand_row(path, False)
-                        else:
-                            self.collapse_row(path)
+        if group.name in self.group_state:
+            state = self.group_state[group.name]
+            childpath = self._model.get_path(itr)
+            path = self.model.convert_child_path_to_path(childpath)
 
-                group_data = (None, group, self.format_group(group), False, None,
-                    weight, row[6], False)
-                self._model[row.iter] = group_data
+            if path:
+                if state:
+                    self.expand_row(path, False)
+                else:
+                    self.collapse_row(path)
+
+        group_data = (None, group, self.format_group(group), False, None,
+            weight, row[6], False)
+        self._model[itr] = group_data
 
 
     def format_nick(self, contact):
@@ -709,6 +817,7 @@ class ContactList(gui.ContactList, gtk.TreeView):
         """set the size of the avatars on the contact list
         """
         self.avatar_size = size
+        self.avatar_loader.size = size
         self.pbr.set_fixed_size(size, size)
 
     def compare_contacts(self, contact1, contact2, order1=0, order2=0):
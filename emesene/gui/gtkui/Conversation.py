@@ -54,7 +54,6 @@ class Conversation(gtk.VBox, gui.Conversation):
         ConversationToolbar = extension.get_default(
             'conversation toolbar')
         TransfersBar = extension.get_default('filetransfer pool')
-        CallWidget = extension.get_default('call widget')
         dialog = extension.get_default('dialog')
         Avatar = extension.get_default('avatar')
 
@@ -76,7 +75,8 @@ class Conversation(gtk.VBox, gui.Conversation):
         self.input.set_size_request(-1, 25)
         self.info = ContactInfo()
         self.transfers_bar = TransfersBar(self.session)
-        self.call_widget = CallWidget(self.session)
+        # created on the first call, it imports gstreamer
+        self._call_widget = None
 
         frame_input = gtk.Frame()
         frame_input.set_shadow_type(gtk.SHADOW_IN)
@@ -182,6 +182,16 @@ class Conversation(gtk.VBox, gui.Conversation):
         else:
             self.info.hide()
 
+    def _get_call_widget(self):
+        '''return the call widget, create it if it doesn't exist'''
+        if self._call_widget is None:
+            CallWidget = extension.get_default('call widget')
+            self._call_widget = CallWidget(self.session)
+
+        return self._call_widget
+
+    call_widget = property(fget=_get_call_widget)
+
     def on_close(self):
         '''called when the conversation is closed'''
         self.session.config.unsubscribe(self._on_show_toolbar_changed,
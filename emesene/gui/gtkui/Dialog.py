@@ -754,10 +754,11 @@ class Dialog(object):
         name_to_ext = {}
         session_found = False
         default_session_index = 0
-        default_session = extension.get_default('session')
+        # compare ids, getting the default session would import it
+        default_session_id = extension.get_category('session').default_id
 
         for ext_id, ext in extension.get_extensions('session').iteritems():
-            if default_session.NAME == ext.NAME:
+            if ext_id == default_session_id:
                 default_session_index = count
 
             for service_name, service_data in ext.SERVICES.iteritems():
@@ -42,6 +42,11 @@ class MainWindow(gtk.VBox):
         gtk.VBox.__init__(self)
         self.session = session
 
+        utils.set_pixbuf_cache_size(self.session.config.get_or_set(
+            'i_pixbuf_cache_size', utils.PIXBUF_CACHE_SIZE))
+        caches = e3.cache.CacheManager(self.session.config_dir.base_dir)
+        utils.set_thumbnail_cache(caches.get_thumbnail_cache())
+
         UserPanel = extension.get_default('user panel')
         ContactList = extension.get_default('contact list')
 
@@ -17,6 +17,7 @@
 #    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 import gtk
+import gobject
 
 import gui
 import utils
@@ -28,11 +29,12 @@ class PluginListView(gtk.TreeView):
         gtk.TreeView.__init__(self, store)
         self.append_column(gtk.TreeViewColumn(_('Status'), gtk.CellRendererToggle(), active=0))
         self.append_column(gtk.TreeViewColumn(_('Name'), gtk.CellRendererText(), text=1))
+        self.set_tooltip_column(3)
         self.set_rules_hint(True)
 
 class PluginListStore(gtk.ListStore):
     def __init__(self):
-        gtk.ListStore.__init__(self, bool, str, str)
+        gtk.ListStore.__init__(self, bool, str, str, str)
 
     def update_list(self):
         pluginmanager = get_pluginmanager()
@@ -40,7 +42,19 @@ class PluginListStore(gtk.ListStore):
 
         for name in pluginmanager.get_plugins():
             self.append((pluginmanager.plugin_is_active(name),
-                self.prettify_name(name), name))
+                self.prettify_name(name), name,
+                self.get_tooltip(pluginmanager.get_metadata(name))))
+
+    def get_tooltip(self, metadata):
+        '''return the markup of the tooltip with the description and the
+        requirements of a plugin, read without importing it'''
+        lines = [gobject.markup_escape_text(metadata['description'])]
+
+        if metadata['requires']:
+            lines.append(_('Requires: %s') % gobject.markup_escape_text(
+                ', '.join(metadata['requires'])))
+
+        return '\n'.join([line for line in lines if line]) or None
 
     def prettify_name(self, name):
         '''return a prettier name for the plugin'''
@@ -25,6 +25,7 @@ import gobject
 
 import gui
 from gui.base import Plus
+from e3.common.LRUCache import LRUCache
 import extension
 import utils
 import Parser
@@ -163,6 +164,12 @@ bigparser = Parser.UnifiedParser()
 mohrtutchy_plus_parser = Plus.MsnPlusMarkupMohrtutchy()
 plus_or_noplus = 1 # 1 means plus, 0 means noplus
 
+# the result of the parsers for the last used texts, the rows of the
+# contact list are rendered much more often than the nicks change
+PARSED_CACHE_SIZE = 500
+_list_cache = LRUCache(PARSED_CACHE_SIZE)
+_plain_cache = LRUCache(PARSED_CACHE_SIZE)
+
 def plus_parse(obj, parser, filterdata):
     global plus_or_noplus
     # get a plain string with objects
@@ -190,6 +197,13 @@ def msnplus_to_list(txt, do_parse_emotes=True):
     '''parte text to a DictObj and return a list of strings and
     gtk.gdk.Pixbufs'''
 
+    # the smileys depend on the emoticon theme
+    key = (txt, do_parse_emotes, plus_or_noplus, gui.theme.emote_path)
+    list_stuff = _list_cache.get(key)
+
+    if list_stuff is not None:
+        return list(list_stuff)
+
     ########################################
     # Mohrtutchy hax, it works (not sure how)
     parser = bigparser.getParser(Parser.unescape(txt), Parser.PangoDataType)
@@ -201,6 +215,8 @@ def msnplus_to_list(txt, do_parse_emotes=True):
             list_stuff.append(item.pixbuf)
         else:
             list_stuff.append(replace_markup(item))
+
+    _list_cache.put(key, tuple(list_stuff))
     return list_stuff
 
     ########################################
@@ -230,7 +246,13 @@ def msnplus_to_list(txt, do_parse_emotes=True):
 def msnplus_to_plain_text(txt):
     ''' from a nasty string, returns a nice plain text string without
     bells and whistles, just text '''
-    return bigparser.getParser(txt).get(escaped=False)
+    text = _plain_cache.get(txt)
+
+    if text is None:
+        text = bigparser.getParser(txt).get(escaped=False)
+        _plain_cache.put(txt, text)
+
+    return text
 
 def flatten_tree(dct, accum, parents):
     '''convert the tree of markup into a list of string that contain pango
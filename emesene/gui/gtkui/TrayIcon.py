@@ -297,25 +297,17 @@ class ContactsMenu(gtk.Menu):
         picture
         '''
         if contact.picture:
-            try:
-                animation = gtk.gdk.PixbufAnimation(contact.picture)
-            except gobject.GError:
-                pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
-                        (self.avatar_size, self.avatar_size))
-                picture = gtk.image_new_from_pixbuf(pix)
-                return picture
-
-            if animation.is_static_image():
-                pix = utils.safe_gtk_pixbuf_load(contact.picture,
-                        (self.avatar_size, self.avatar_size))
-                picture = gtk.image_new_from_pixbuf(pix)
-            else:
-                picture = gtk.image_new_from_animation(animation)
+            pixbuf = utils.load_avatar(contact.picture,
+                    (self.avatar_size, self.avatar_size))
 
-        else:
-            pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
-                        (self.avatar_size, self.avatar_size))
-            picture = gtk.image_new_from_pixbuf(pix)
+            if isinstance(pixbuf, gtk.gdk.PixbufAnimation):
+                return gtk.image_new_from_animation(pixbuf)
+            elif pixbuf is not None:
+                return gtk.image_new_from_pixbuf(pixbuf)
+
+        pix = utils.safe_gtk_pixbuf_load(gui.theme.user,
+                    (self.avatar_size, self.avatar_size))
+        picture = gtk.image_new_from_pixbuf(pix)
 
         return picture
 
@@ -33,7 +33,6 @@ def gtk_main(Controller):
     import AccountMenu
     import Avatar
     import AvatarChooser
-    import CallWidget
     import config_gtk
     import ContactMenu
     import ContactList
@@ -77,11 +76,9 @@ def gtk_main(Controller):
     import UserPanel
     import Window
 
-    try:
-        import AdiumTextBox
-    except ImportError:
-        WEBKITERROR = True
-    
+    # AdiumTextBox is imported when the first conversation is opened
+    WEBKITERROR = not extension.is_available('webkit')
+
     import PictureHandler
 
     setup()
@@ -156,7 +153,8 @@ def setup():
     extension.category_register('below panel', EmptyWidget.EmptyWidget)
     extension.category_register('below userlist', EmptyWidget.EmptyWidget)
 
-    extension.category_register('call widget', CallWidget.CallWindow)
+    extension.category_register('call widget', extension.LazyExtension(
+        'gui.gtkui.CallWidget', 'CallWindow'))
     extension.category_register('conversation window', \
         ConversationManager.ConversationManager)
     extension.category_register('conversation', Conversation.Conversation)
@@ -174,7 +172,11 @@ def setup():
     extension.category_register('filetransfer widget', FileTransferWidget.FileTransferWidget)
 
     if not WEBKITERROR:
-        extension.category_register('conversation output', AdiumTextBox.OutputText)
+        extension.category_register('conversation output',
+            extension.LazyExtension('gui.gtkui.AdiumTextBox', 'OutputText',
+                requires=('webkit',), NAME='Adium Output',
+                DESCRIPTION=_('A widget to display conversation messages '
+                    'using adium style')))
         extension.register('conversation output', TextBox.OutputText)
     else:
         extension.category_register('conversation output', TextBox.OutputText)
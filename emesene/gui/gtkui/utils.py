@@ -20,10 +20,38 @@
 import os
 import gtk
 import pango
+import gobject
 
 import e3
 
-pixbufs = {}
+# maximum number of bytes used by the decoded pixbufs on the cache
+PIXBUF_CACHE_SIZE = 16 * 1024 * 1024
+
+def _pixbuf_size(item):
+    '''return the number of bytes used by a cached (pixbuf, mtime, size)
+    item'''
+    pixbuf = item[0]
+
+    if isinstance(pixbuf, gtk.gdk.PixbufAnimation):
+        pixbuf = pixbuf.get_static_image()
+
+    return pixbuf.get_rowstride() * pixbuf.get_height()
+
+# (path, size, animated) as key and (pixbuf, mtime, file size) as value
+pixbufs = e3.common.LRUCache(PIXBUF_CACHE_SIZE, _pixbuf_size)
+
+def set_pixbuf_cache_size(size):
+    '''set the maximum number of bytes used by the pixbuf cache'''
+    pixbufs.set_max_size(size)
+
+# an e3.cache.ThumbnailCache where the scaled avatars are stored between
+# sessions, None to always decode the full avatars
+thumbnails = None
+
+def set_thumbnail_cache(cache):
+    '''set the e3.cache.ThumbnailCache used by load_avatar'''
+    global thumbnails
+    thumbnails = cache
 
 def safe_gtk_image_load(path, size=None):
     '''try to return a gtk image from path, if fails, return a broken image'''
@@ -34,6 +62,20 @@ def safe_gtk_image_load(path, size=None):
         return gtk.image_new_from_stock(gtk.STOCK_MISSING_IMAGE,
             gtk.ICON_SIZE_DIALOG)
 
+def _get_cached_pixbuf(path, size, animated, stat):
+    '''return the cached pixbuf of path if the file didn't change on disk
+    since it was cached, None otherwise'''
+    item = pixbufs.get((path, size, animated))
+
+    if item is not None and item[1:] == (stat.st_mtime, stat.st_size):
+        return item[0]
+
+    return None
+
+def _put_cached_pixbuf(path, size, animated, stat, pixbuf):
+    '''add pixbuf to the cache'''
+    pixbufs.put((path, size, animated), (pixbuf, stat.st_mtime, stat.st_size))
+
 def safe_gtk_pixbuf_load(path, size=None, animated=False):
     '''try to return a gtk pixbuf from path, if fails, return None'''
     path = os.path.abspath(path)
@@ -43,22 +85,123 @@ def safe_gtk_pixbuf_load(path, size=None, animated=False):
     else:
         creator = gtk.gdk.pixbuf_new_from_file
 
-    if file_readable(path):
-        if (path, size) in pixbufs:
-            return pixbufs[(path, size)]
-        else:
-            pixbuf = creator(path)
-
-            if size is not None:
-                width, height = size
-                pixbuf = pixbuf.scale_simple(width, height,
-                        gtk.gdk.INTERP_BILINEAR)
-
-            pixbufs[(path, size)] = pixbuf
-            return pixbuf
-    else:
+    if not file_readable(path):
         return None
 
+    # if the file changed on disk since it was cached load it again
+    stat = os.stat(path)
+    pixbuf = _get_cached_pixbuf(path, size, animated, stat)
+
+    if pixbuf is not None:
+        return pixbuf
+
+    pixbuf = creator(path)
+
+    if size is not None and not animated:
+        width, height = size
+        pixbuf = pixbuf.scale_simple(width, height,
+                gtk.gdk.INTERP_BILINEAR)
+
+    _put_cached_pixbuf(path, size, animated, stat, pixbuf)
+    return pixbuf
+
+def get_cached_avatar(path, size):
+    '''return the avatar on path scaled to size, or an animation if it's
+    animated, only if it's already on the cache, None otherwise'''
+    path = os.path.abspath(path)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    pixbuf = _get_cached_pixbuf(path, size, False, stat)
+
+    if pixbuf is None:
+        pixbuf = _get_cached_pixbuf(path, None, True, stat)
+
+    return pixbuf
+
+def load_avatar(path, size):
+    '''return the avatar on path scaled down to fit on size keeping the
+    aspect ratio, or an animation if it's animated, None if it can't be
+    loaded, the file is decoded only once, static avatars are read from the
+    thumbnail cache after the first time, it doesn't touch any widget so it
+    can be called from any thread'''
+    pixbuf = get_cached_avatar(path, size)
+
+    if pixbuf is not None:
+        return pixbuf
+
+    path = os.path.abspath(path)
+
+    if not file_readable(path):
+        return None
+
+    stat = os.stat(path)
+    hash_ = None
+
+    # the thumbnails are only stored for static images
+    if thumbnails is not None:
+        hash_, thumbnail = thumbnails.lookup(path, size)
+
+        if thumbnail is not None:
+            try:
+                pixbuf = gtk.gdk.pixbuf_new_from_file(thumbnail)
+            except gobject.GError:
+                pass
+            else:
+                _put_cached_pixbuf(path, size, False, stat, pixbuf)
+                return pixbuf
+
+    try:
+        animation = gtk.gdk.PixbufAnimation(path)
+    except gobject.GError:
+        return None
+
+    if animation.is_static_image():
+        pixbuf = animation.get_static_image()
+        width, height = fit_size(pixbuf.get_width(), pixbuf.get_height(),
+                size)
+
+        if (width, height) != (pixbuf.get_width(), pixbuf.get_height()):
+            pixbuf = pixbuf.scale_simple(width, height,
+                    gtk.gdk.INTERP_BILINEAR)
+
+        _put_cached_pixbuf(path, size, False, stat, pixbuf)
+
+        if hash_ is not None:
+            _save_thumbnail(hash_, size, pixbuf)
+
+        return pixbuf
+
+    _put_cached_pixbuf(path, None, True, stat, animation)
+    return animation
+
+def fit_size(width, height, size):
+    '''return the (width, height) of an image of width x height scaled
+    down to fit on size keeping the aspect ratio, smaller images keep
+    their size'''
+    box_width, box_height = size
+
+    if width <= box_width and height <= box_height:
+        return width, height
+
+    factor = min(float(box_width) / width, float(box_height) / height)
+
+    return (max(1, int(round(width * factor))),
+            max(1, int(round(height * factor))))
+
+def _save_thumbnail(hash_, size, pixbuf):
+    '''store pixbuf as the thumbnail of hash_ with size'''
+    data = []
+
+    try:
+        pixbuf.save_to_callback(lambda buf, *args: data.append(buf), 'png')
+        thumbnails.insert((hash_, size, ''.join(data)))
+    except (gobject.GError, OSError, IOError):
+        pass
+
 def scale_nicely(pixbuf):
     '''scale a pixbuf'''
     return pixbuf.scale_simple(20, 20, gtk.gdk.INTERP_BILINEAR)
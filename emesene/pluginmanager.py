@@ -20,12 +20,87 @@
 
 import os
 import sys
+import ast
 import logging
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+import extension
 
 log = logging.getLogger('pluginmanager')
 
 BLACKLIST = ["lint.py", "__init__.py"]
 
+# the optional file inside a package with the metadata of the plugin
+MANIFEST = "manifest.json"
+# the attributes of the Plugin class read as metadata
+METADATA_ATTRS = {'_description': 'description', '_authors': 'authors'}
+
+def get_mtime(base_dir, name, is_package):
+    '''return the modification time of a plugin, the newest of the
+    directory, the manifest and the plugin module'''
+    path = os.path.join(base_dir, name)
+    paths = [path]
+
+    if is_package:
+        paths += [os.path.join(path, MANIFEST), os.path.join(path, 'plugin.py')]
+
+    return max([os.path.getmtime(path) for path in paths
+        if os.path.exists(path)])
+
+def read_metadata(base_dir, name, is_package):
+    '''return a dict with the name, description, authors, requirements and
+    entry point of a plugin without importing it, from the manifest if the
+    package has one or parsing the source otherwise'''
+    path = os.path.join(base_dir, name)
+    metadata = dict(name=os.path.basename(name.rstrip("/")).split(".")[0],
+        description='', authors={}, requires=[], module='plugin')
+
+    if is_package and os.path.isfile(os.path.join(path, MANIFEST)):
+        handle = open(os.path.join(path, MANIFEST))
+
+        try:
+            manifest = json.load(handle)
+        finally:
+            handle.close()
+
+        for key in metadata:
+            if key in manifest:
+                metadata[key] = manifest[key]
+
+        return metadata
+
+    if is_package:
+        path = os.path.join(path, 'plugin.py')
+
+    handle = open(path)
+
+    try:
+        tree = ast.parse(handle.read(), path)
+    finally:
+        handle.close()
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or node.name != 'Plugin':
+            continue
+
+        for item in node.body:
+            if not isinstance(item, ast.Assign):
+                continue
+
+            for target in item.targets:
+                if isinstance(target, ast.Name) and \
+                        target.id in METADATA_ATTRS:
+                    try:
+                        metadata[METADATA_ATTRS[target.id]] = \
+                            ast.literal_eval(item.value)
+                    except ValueError:
+                        pass
+
+    return metadata
+
 class PackageResource(object):
     '''Handle various files that could be put in the package'''
     def __init__(self, base_dir, directory):
@@ -57,10 +132,14 @@ class PluginHandler(object):
 
     Given a directory, will import the plugin.py file inside it and allows to control it.
     It will provide the plugin several utilities to work on the package
+    The plugin is imported the first time it's started, until then only its
+    metadata is known.
 
     '''
-    def __init__(self, base_dir, name, is_package=False):
-        '''@param directory The directory containing the package'''
+    def __init__(self, base_dir, name, is_package=False, metadata=None):
+        '''@param directory The directory containing the package
+        @param metadata The dict returned by read_metadata, if None it's read
+        '''
         self.name = os.path.basename(name.rstrip("/"))
         if not is_package:
             self.name = self.name.split(".")[0]
@@ -70,17 +149,25 @@ class PluginHandler(object):
 
         self.is_package = is_package
 
+        if metadata is None:
+            metadata = read_metadata(base_dir, name, is_package)
+
+        self.metadata = metadata
         self.module = None
-        self._do_import()
+
+    def is_available(self):
+        '''return True if the modules the plugin requires are installed'''
+        return extension.is_available(*self.metadata['requires'])
 
     def _do_import(self):
         '''Does the dirty stuff with __import__'''
         old_syspath = sys.path[:]
+        entry = str(self.metadata['module'])
         try:
             sys.path += ['.', self.base_dir]
-            self.module = __import__(self.name, globals(), None, ['plugin'])
-            if hasattr(self.module, 'plugin'):
-                self.module = self.module.plugin
+            self.module = __import__(self.name, globals(), None, [entry])
+            if hasattr(self.module, entry):
+                self.module = getattr(self.module, entry)
         except Exception, reason:
             log.warning('error importing "%s": %s' % (self.name, reason))
             self.module = None
@@ -91,6 +178,12 @@ class PluginHandler(object):
         '''Instanciate (if not already done).'''
         if self._instance is not None:
             return self._instance
+        if self.module is None:
+            if not self.is_available():
+                log.warning('"%s" requires %s' % (self.name,
+                    ', '.join(self.metadata['requires'])))
+                return None
+            self._do_import()
         try:
             self._instance = self.module.Plugin()
         except Exception, reason:
@@ -150,8 +243,13 @@ class PluginManager(object):
     def __init__(self):
         self._plugins = {} #'name': Plugin/Package
 
-    def scan_directory(self, dir_):
-        '''Find plugins and packages inside dir_'''
+    def scan_directory(self, dir_, index_path=None):
+        '''Find plugins and packages inside dir_, nothing is imported.
+        If index_path is given the metadata of the plugins is cached there
+        and only read again for the plugins modified since'''
+        index = self._load_index(index_path)
+        changed = False
+
         for filename in os.listdir(dir_):
             path = os.path.join(dir_, filename)
             if filename.startswith(".") or \
@@ -159,14 +257,70 @@ class PluginManager(object):
                filename in BLACKLIST:
                 continue
 
+            is_package = os.path.isdir(path)
+            key = os.path.abspath(path)
+
             try:
-                mod = PluginHandler(dir_, filename, os.path.isdir(path))
-                self._plugins[mod.name] = mod
+                mtime = get_mtime(dir_, filename, is_package)
+                cached = index.get(key, None)
+
+                if cached is None or cached['mtime'] != mtime:
+                    cached = dict(mtime=mtime,
+                        metadata=read_metadata(dir_, filename, is_package))
+                    index[key] = cached
+                    changed = True
+
+                mod = PluginHandler(dir_, filename, is_package,
+                    cached['metadata'])
             except Exception, reason:
-                log.warning('Exception while importing %s:\n%s' % (
+                log.warning('Exception while reading %s:\n%s' % (
                     filename, reason))
+                continue
+
+            # keep the handler of a plugin that was already found, it may
+            # be running, but use the new metadata
+            if mod.name in self._plugins:
+                self._plugins[mod.name].metadata = mod.metadata
+            else:
+                self._plugins[mod.name] = mod
+
+        if changed:
+            self._save_index(index_path, index)
+
+        log.debug('Found plugins: %s' % ', '.join(self._plugins.keys()))
 
-        log.debug('Imported plugins: %s' % ', '.join(self._plugins.keys()))
+    def _load_index(self, index_path):
+        '''return the cached metadata stored on index_path'''
+        if index_path is None or not os.path.isfile(index_path):
+            return {}
+
+        try:
+            handle = open(index_path)
+
+            try:
+                return json.load(handle)
+            finally:
+                handle.close()
+        except (IOError, ValueError), reason:
+            log.warning('error reading plugin index %s: %s' % (index_path,
+                reason))
+            return {}
+
+    def _save_index(self, index_path, index):
+        '''store the metadata of the plugins on index_path'''
+        if index_path is None:
+            return
+
+        try:
+            handle = open(index_path, 'w')
+
+            try:
+                json.dump(index, handle)
+            finally:
+                handle.close()
+        except IOError, reason:
+            log.warning('error writing plugin index %s: %s' % (index_path,
+                reason))
 
     def plugin_start(self, name, session):
         '''Starts a plugin.
@@ -176,8 +330,7 @@ class PluginManager(object):
             return False
 
         log.info('starting plugin "%s"' % name)
-        self._plugins[name].start(session)
-        return True
+        return self._plugins[name].start(session)
 
     def plugin_stop(self, name):
         '''Stops a plugin.
@@ -213,6 +366,13 @@ class PluginManager(object):
         '''return the list of plugin names'''
         return self._plugins.keys()
 
+    def get_metadata(self, name):
+        '''return the metadata of a plugin without importing it, None if
+        the plugin doesn't exist'''
+        if name not in self._plugins:
+            return None
+        return self._plugins[name].metadata
+
 _instance = None
 def get_pluginmanager():
     '''instance the pluginmanager, if needed. otherwise, return it'''
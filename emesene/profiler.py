@@ -0,0 +1,109 @@
+'''measures the time spent importing each module and on each phase of the
+startup to know what delays the login window'''
+# -*- coding: utf-8 -*-
+
+#    This file is part of emesene.
+#
+#    emesene is free software; you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation; either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    emesene is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with emesene; if not, write to the Free Software
+#    Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import sys
+import time
+import __builtin__
+
+class StartupProfiler(object):
+    '''replaces the import function to time the imports that load new
+    modules and keeps the time when each phase of the startup ends'''
+
+    def __init__(self):
+        '''class constructor'''
+        self.start = time.time()
+        self.enabled = False
+        self.reported = False
+        # module name as key and a list [total, self time] as value
+        self.imports = {}
+        # a list of (phase name, seconds since start)
+        self.phases = []
+        # the time spent on the imports done by the imports being timed
+        self._children = []
+        self._import = __builtin__.__import__
+
+    def enable(self):
+        '''start timing the imports'''
+        if not self.enabled:
+            self.enabled = True
+            __builtin__.__import__ = self._timed_import
+
+    def disable(self):
+        '''stop timing the imports'''
+        if self.enabled:
+            self.enabled = False
+            __builtin__.__import__ = self._import
+
+    def _timed_import(self, name, *args, **kwargs):
+        '''import name and record the time if it loaded new modules'''
+        loaded = len(sys.modules)
+        self._children.append(0.0)
+        start = time.time()
+
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            children = self._children.pop()
+
+            if self._children:
+                self._children[-1] += elapsed
+
+            # the module was already imported, it was only a lookup
+            if len(sys.modules) != loaded:
+                times = self.imports.setdefault(name, [0.0, 0.0])
+                times[0] += elapsed
+                times[1] += elapsed - children
+
+    def phase(self, name):
+        '''mark the end of a phase of the startup'''
+        if self.enabled:
+            self.phases.append((name, time.time() - self.start))
+
+    def report(self, limit=20):
+        '''return a list of lines with the phases and the slowest imports'''
+        lines = ['startup phases (seconds since start):']
+        last = 0.0
+
+        for (name, end) in self.phases:
+            lines.append('  %-30s %8.3f %+8.3f' % (name, end, end - last))
+            last = end
+
+        lines.append('slowest imports (total, self):')
+        imports = sorted(self.imports.iteritems(),
+            key=lambda item: item[1][0], reverse=True)
+
+        for (name, (total, own)) in imports[:limit]:
+            lines.append('  %-30s %8.3f %8.3f' % (name, total, own))
+
+        return lines
+
+    def print_report(self, limit=20):
+        '''print the report once and stop timing the imports'''
+        if self.enabled and not self.reported:
+            self.reported = True
+            print '\n'.join(self.report(limit))
+            self.disable()
+
+profiler = StartupProfiler()
+
+enable = profiler.enable
+phase = profiler.phase
+print_report = profiler.print_report
@@ -3,7 +3,24 @@ import unittest
 from test_avatar_cache import AvatarCacheTestCase
 from test_cache_manager import CacheManagerTestCase
 from test_emoticon_cache import EmoticonCacheTestCase
+from test_thumbnail_cache import ThumbnailCacheTestCase
 from test_ring_buffer import RingBufferTestCase
 from test_logger import LoggerTestCase
+from test_command_parser import CommandParserTestCase
+from test_signal import SignalTestCase
+from test_signals import SignalsTestCase
+from test_lru_cache import LRUCacheTestCase
+from test_markup_parser import MarkupParserTestCase
+from test_adium_theme import AdiumThemeTestCase
+from test_plus import PlusTestCase
+from test_http_pool import HttpPoolTestCase
+from test_request_pool import RequestPoolTestCase
+from test_address_book import AddressBookTestCase
+from test_memory import MemoryTestCase
+from test_contact_manager import ContactManagerTestCase
+from test_extension import ExtensionTestCase
+from test_profiler import ProfilerTestCase
+from test_plugin_manager import PluginManagerTestCase
+from test_reactor import ReactorTestCase
 
 unittest.main()
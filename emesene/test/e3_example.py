@@ -45,7 +45,8 @@ class Example(object):
 
         self.session.login(account, password, status,
             proxy, use_http_method)
-        gobject.timeout_add(500, self.session.signals._handle_events)
+        signals.set_notifier(
+            lambda: gobject.idle_add(signals._dispatch_events))
 
         self.first_contact_list_ready = True
 
@@ -0,0 +1,118 @@
+import os
+import re
+import sys
+import shutil
+import unittest
+import tempfile
+sys.path.append(os.path.abspath('.'))
+
+from e3.msn import XmlParser
+from e3.msn.AddressBook import AddressBook, get_last_change
+
+MEMBERSHIP = '''<Services><Service><Memberships>
+<Membership><MemberRole>Allow</MemberRole><Members>
+%s
+</Members></Membership>
+</Memberships><LastChange>%s</LastChange></Service></Services>'''
+
+MEMBER = '''<Member><PassportName>%s</PassportName><Deleted>%s</Deleted>
+<CID>%s</CID></Member>'''
+
+DYNAMIC = '''<ab><groups>%s</groups><contacts>%s</contacts>
+<lastChange>%s</lastChange></ab>'''
+
+GROUP = '''<Group><groupId>%s</groupId><groupInfo><name>%s</name>
+</groupInfo><fDeleted>%s</fDeleted></Group>'''
+
+CONTACT = '''<Contact><contactId>%s</contactId><contactInfo>
+<contactType>%s</contactType><passportName>%s</passportName>
+<isMessengerUser>true</isMessengerUser><displayName>%s</displayName>
+<CID>%s</CID><groupIds>%s</groupIds></contactInfo>
+<fDeleted>%s</fDeleted></Contact>'''
+
+def compact(body):
+    '''remove the spaces between tags like on the server responses'''
+    return re.sub('>\s+<', '><', body)
+
+class AddressBookTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.address_book = AddressBook(os.path.join(self.path, 'ab'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def update_memberships(self, members, last_change, delta):
+        body = compact(MEMBERSHIP % (''.join(MEMBER % member
+            for member in members), last_change))
+        parser = XmlParser.MembershipParser(body)
+        self.address_book.update_memberships(parser.memberships,
+            get_last_change(body, 'LastChange'), delta)
+
+    def update_contacts(self, groups, contacts, last_change, delta):
+        body = compact(DYNAMIC % (''.join(GROUP % group for group in groups),
+            ''.join(CONTACT % contact for contact in contacts), last_change))
+        parser = XmlParser.DynamicParser(body)
+        self.address_book.update_contacts(parser.groups, parser.contacts,
+            get_last_change(body, 'lastChange'), delta)
+
+    def test_memberships(self):
+        self.update_memberships([('a@b.com', 'false', '1'),
+            ('c@d.com', 'false', '2')], '2010-01-01T00:00:00', False)
+        self.update_memberships([('a@b.com', 'true', '1'),
+            ('e@f.com', 'false', '3')], '2010-02-01T00:00:00', True)
+
+        self.assertEquals(self.address_book.membership_change,
+            '2010-02-01T00:00:00')
+
+        memberships = self.address_book.get_memberships()
+        self.assertEquals(len(memberships), 1)
+        self.assertEquals(memberships[0]['MemberRole'], 'Allow')
+        self.assertEquals(sorted(member['PassportName']
+            for member in memberships[0]['Members']), ['c@d.com', 'e@f.com'])
+
+    def test_contacts(self):
+        self.update_contacts([('g1', 'friends', 'false')],
+            [('1', 'Me', 'me@b.com', 'me', '10', '', 'false'),
+             ('2', 'Regular', 'a@b.com', 'a', '11', 'g1', 'false'),
+             ('3', 'Regular', 'c@d.com', 'c', '12', '', 'false')],
+            '2010-01-01T00:00:00', False)
+        self.update_contacts([('g1', 'friends', 'true'),
+            ('g2', 'work', 'false')],
+            [('3', 'Regular', 'c@d.com', 'c', '12', '', 'true'),
+             ('2', 'Regular', 'a@b.com', 'a2', '11', 'g2', 'false')],
+            '2010-02-01T00:00:00', True)
+
+        self.assertEquals(self.address_book.groups, {'g2': 'work'})
+        self.assertEquals(self.address_book.me, ('10', 'me'))
+        self.assertEquals(self.address_book.contacts_change,
+            '2010-02-01T00:00:00')
+
+        contacts = dict((contact['passportName'], contact)
+            for contact in self.address_book.get_contacts())
+        self.assertEquals(sorted(contacts.keys()), ['a@b.com', 'me@b.com'])
+        self.assertEquals(contacts['a@b.com']['displayName'], 'a2')
+        self.assertEquals(contacts['a@b.com']['groupIds'], ['g2'])
+
+    def test_save_load(self):
+        self.update_memberships([('a@b.com', 'false', '1')],
+            '2010-01-01T00:00:00', False)
+        self.update_contacts([('g1', 'friends', 'false')],
+            [('2', 'Regular', 'a@b.com', 'a', '11', 'g1', 'false')],
+            '2010-01-01T00:00:00', False)
+        self.address_book.save()
+
+        loaded = AddressBook(self.address_book.path)
+        self.assertTrue(loaded.load())
+        self.assertEquals(loaded.get_memberships(),
+            self.address_book.get_memberships())
+        self.assertEquals(loaded.get_contacts(),
+            self.address_book.get_contacts())
+        self.assertEquals(loaded.groups, {'g1': 'friends'})
+        self.assertEquals(type(loaded.membership_change), str)
+
+    def test_load_missing(self):
+        self.assertFalse(self.address_book.load())
+        self.assertEquals(self.address_book.membership_change, None)
+
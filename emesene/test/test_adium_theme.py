@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+import gui
+from gui.base import AdiumTheme
+
+class AdiumThemeTestCase(unittest.TestCase):
+
+    def test_compile_template(self):
+        segments = AdiumTheme.compile_template(
+            '<div class="%messageClasses%">\n%sender%: %message%'
+            '<span>%time{%H}%</span></div>\n')
+
+        self.assertEquals(segments, ['<div class="',
+            ('messageClasses', None), '">', ('sender', None), ': ',
+            ('message', None), '<span>', (None, '%H'), '</span></div>'])
+
+    def test_unknown_variables_are_kept(self):
+        self.assertEquals(AdiumTheme.compile_template('100% %foo% %time%'),
+            ['100% %foo% ', ('time', None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+from e3.msn.CommandParser import CommandParser
+
+class CommandParserTestCase(unittest.TestCase):
+
+    def test_lines(self):
+        parser = CommandParser()
+        commands = parser.feed('VER 1 MSNP15 CVR0\r\nCVR 2 8.5\r\n')
+
+        self.assertEquals(len(commands), 2)
+        self.assertEquals(commands[0].command, 'VER')
+        self.assertEquals(commands[1].command, 'CVR')
+        self.assertEquals(commands[1].payload, None)
+
+    def test_split_line(self):
+        parser = CommandParser()
+
+        self.assertEquals(parser.feed('CHG 5 N'), [])
+        commands = parser.feed('LN 0\r\n')
+
+        self.assertEquals(len(commands), 1)
+        self.assertEquals(commands[0].command, 'CHG')
+        self.assertEquals(commands[0].tid, '5')
+
+    def test_payload(self):
+        parser = CommandParser()
+        payload = 'MIME-Version: 1.0\r\n\r\nhello'
+        data = 'MSG foo@bar.com Foo %d\r\n%sQNG 50\r\n' % (len(payload), payload)
+
+        # feed it byte by byte to check that partial payloads are kept
+        commands = []
+
+        for char in data:
+            commands += parser.feed(char)
+
+        self.assertEquals(len(commands), 2)
+        self.assertEquals(commands[0].command, 'MSG')
+        self.assertEquals(commands[0].payload, payload)
+        self.assertEquals(commands[1].command, 'QNG')
+
+    def test_payload_position(self):
+        parser = CommandParser()
+        commands = parser.feed('NOT 4\r\n<NO>ADL 3 OK\r\n')
+
+        self.assertEquals(len(commands), 2)
+        self.assertEquals(commands[0].payload, '<NO>')
+        self.assertEquals(commands[1].command, 'ADL')
+        self.assertEquals(commands[1].payload, None)
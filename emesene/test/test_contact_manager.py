@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+import e3
+from e3 import status
+from e3.base.ContactManager import ContactManager
+
+class ContactManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ContactManager('me@b.com')
+        self.contacts = self.manager.contacts
+
+        for (account, nick, stat) in (('a@b.com', 'zed', status.ONLINE),
+                ('c@d.com', 'amy', status.ONLINE),
+                ('e@f.com', 'bob', status.OFFLINE)):
+            self.contacts[account] = e3.Contact(account, nick=nick,
+                _status=stat)
+
+    def test_by_status(self):
+        self.contacts['e@f.com'].status = status.BUSY
+        self.contacts['a@b.com'].status = status.OFFLINE
+        result = self.manager.get_sorted_list_by_status()
+
+        self.assertEquals(sorted(result.keys()), sorted(status.ORDERED))
+        self.assertEquals([contact.nick for contact in result[status.ONLINE]],
+            ['amy'])
+        self.assertEquals([contact.nick for contact in result[status.BUSY]],
+            ['bob'])
+        self.assertEquals(self.manager.get_online_total_count(), (2, 3))
+
+    def test_by_group(self):
+        self.contacts['a@b.com'].groups.append('1')
+        self.contacts['c@d.com'].groups = ['1', '2']
+        self.contacts['c@d.com'].groups.remove('2')
+        result = self.manager.get_sorted_list_by_group(['1', '2'])
+
+        self.assertEquals([contact.nick for contact in result['1']],
+            ['amy', 'zed'])
+        self.assertEquals(result['2'], [])
+        self.assertEquals(self.manager.get_no_group(),
+            [self.contacts['e@f.com']])
+
+        by_status = self.manager.get_sorted_list_by_group(['1'], True)
+        self.assertEquals(len(by_status['1'][status.ONLINE]), 2)
+
+    def test_remove_and_replace(self):
+        old = self.contacts['a@b.com']
+        del self.contacts['a@b.com']
+        old.status = status.BUSY
+        self.contacts.pop('c@d.com')
+        self.contacts['e@f.com'] = e3.Contact('e@f.com',
+            _status=status.ONLINE)
+
+        self.assertEquals(self.manager.get_online_list(),
+            [self.contacts['e@f.com']])
+        self.assertEquals(self.manager.get_sorted_list_by_status()[
+            status.BUSY], [])
+        self.assertEquals(self.manager.get_online_total_count(), (1, 1))
+
+    def test_given_contacts(self):
+        contacts = [self.contacts['a@b.com'], self.contacts['e@f.com']]
+
+        self.assertEquals(self.manager.get_online_total_count(contacts),
+            (1, 2))
+        self.assertEquals(self.manager.get_online_list(contacts),
+            [self.contacts['a@b.com']])
+
+
+    def test_group_type(self):
+        # ONLINE is 0, it must not become STANDARD
+        online = e3.Group('online', type_=e3.Group.ONLINE)
+        self.assertEquals(online.type, e3.Group.ONLINE)
+        self.assertEquals(e3.Group('group', '0').type, e3.Group.STANDARD)
@@ -0,0 +1,89 @@
+import os
+import sys
+import shutil
+import unittest
+import tempfile
+sys.path.append(os.path.abspath('.'))
+
+import extension
+
+MODULE = '''
+class Output(object):
+    NAME = 'Output'
+
+    def write(self):
+        pass
+'''
+
+class IOutput(object):
+    def write(self):
+        raise NotImplementedError()
+
+class Plain(object):
+    NAME = 'Plain'
+
+    def write(self):
+        pass
+
+class ExtensionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.module = 'lazy_output_%d' % id(self)
+        handle = file(os.path.join(self.path, self.module + '.py'), 'w')
+        handle.write(MODULE)
+        handle.close()
+        sys.path.insert(0, self.path)
+
+        self.lazy = extension.LazyExtension(self.module, 'Output',
+            NAME='Lazy output')
+        self.category = extension.Category('output', None, (IOutput,))
+
+    def tearDown(self):
+        sys.path.remove(self.path)
+        sys.modules.pop(self.module, None)
+        shutil.rmtree(self.path)
+
+    def test_not_imported_until_used(self):
+        self.assertTrue(self.category.register(self.lazy))
+        self.assertTrue(self.category.register(Plain))
+        self.category.default = self.lazy
+
+        ext_id = self.category.default_id
+        self.assertTrue(ext_id.endswith(self.module + '.py:Output'))
+        self.assertEquals(self.category.get_extensions()[ext_id].NAME,
+            'Lazy output')
+        self.assertFalse(self.module in sys.modules)
+
+        cls = self.category.default
+        self.assertTrue(self.module in sys.modules)
+        self.assertEquals(cls.NAME, 'Output')
+        self.assertEquals(extension._get_class_name(cls), ext_id)
+        self.assertTrue(self.category.get_extensions()[ext_id] is cls)
+
+    def test_missing_requirement(self):
+        lazy = extension.LazyExtension(self.module, 'Output',
+            requires=('no_such_module_here',))
+        self.assertFalse(self.category.register(lazy))
+        self.assertEquals(self.category.get_extensions(), {})
+
+    def test_fallback_when_import_fails(self):
+        self.category.register(Plain)
+        missing = extension.LazyExtension(self.module, 'Missing')
+        self.category.default = missing
+
+        self.assertTrue(self.category.default is Plain)
+        self.assertEquals(self.category.get_extensions().values(), [Plain])
+        self.assertFalse(missing in self.category.ids)
+
+    def test_backend_metadata(self):
+        from e3.jabber import metadata
+        self.assertFalse('e3.jabber.Worker' in sys.modules)
+
+        import e3.dummy.Session
+        from e3.dummy import metadata
+        self.assertTrue(e3.dummy.Session.Session.SERVICES is
+            metadata.SERVICES)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import socket
+import httplib
+import unittest
+import threading
+import BaseHTTPServer
+sys.path.append(os.path.abspath('.'))
+
+from e3.msn.HttpPool import HttpPool
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.ports.append(self.client_address[1])
+
+        if self.path == '/drop':
+            # processed but the connection is closed before answering
+            self.close_connection = 1
+            return
+        elif self.path == '/slow':
+            time.sleep(0.5)
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class Server(BaseHTTPServer.HTTPServer):
+
+    def handle_error(self, request, client_address):
+        # the client gave up waiting for the slow responses
+        pass
+
+class HttpPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.server.ports = []
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+        self.pool = HttpPool(0.2)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, body, path='/'):
+        return self.pool.request('POST', '127.0.0.1', self.port, path, body,
+            {'Content-Length': str(len(body))})
+
+    def test_reuse(self):
+        self.assertEquals(self.post('first'), (200, 'OK', 'first'))
+        self.assertEquals(self.post('second'), (200, 'OK', 'second'))
+
+        self.assertEquals(self.pool.stats()['created'], 1)
+        self.assertEquals(self.pool.stats()['reused'], 1)
+        self.assertEquals(len(set(self.server.ports)), 1)
+
+    def test_stale(self):
+        self.post('first')
+
+        # the server closes the idle connection
+        for (conn, last_use) in self.pool.idle.values()[0]:
+            conn.sock.close()
+
+        self.assertEquals(self.post('second'), (200, 'OK', 'second'))
+        self.assertEquals(self.pool.stats()['created'], 2)
+
+    def test_idle_timeout(self):
+        self.post('first')
+        key = ('127.0.0.1', self.port)
+        (conn, last_use) = self.pool.idle[key][0]
+        self.pool.idle[key][0] = (conn, last_use - HttpPool.IDLE_TIMEOUT - 1)
+
+        self.post('second')
+        self.assertEquals(self.pool.stats()['created'], 2)
+        self.assertEquals(self.pool.stats()['reused'], 0)
+        self.assertEquals(self.pool.stats()['idle'], 1)
+
+    def test_not_sent_again(self):
+        self.post('first')
+
+        self.assertRaises(httplib.BadStatusLine, self.post, 'add', '/drop')
+        self.assertEquals(len(self.server.ports), 2)
+        self.assertEquals(self.pool.stats()['idle'], 0)
+
+    def test_timeout(self):
+        self.assertRaises(socket.timeout, self.post, 'add', '/slow')
+        self.assertEquals(len(self.server.ports), 1)
+        self.assertEquals(self.pool.stats()['idle'], 0)
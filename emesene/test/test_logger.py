@@ -143,6 +143,110 @@ class LoggerTestCase(unittest.TestCase):
         self.assertTrue(len(log.events) > 0)
         log.close()
 
+    def test_indexes_created(self):
+        log = e3.Logger.Logger("test")
+        log.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        names = [row[0] for row in log.cursor.fetchall()]
+        log.close()
+
+        self.assertTrue("idx_fact_event_src_dest" in names)
+        self.assertTrue("idx_fact_event_dest_src" in names)
+
+    def test_chats_pages(self):
+        src = self.build_dx()
+        dest = self.build_me()
+        messages = [str(i) for i in range(5)]
+        pages = []
+
+        for message in messages:
+            logger.log('message', src.status, message, src, dest)
+
+        def page_callback(result):
+            rows, cursor = result
+            self.assertEquals([row[2] for row in rows], messages[3:])
+            self.assertTrue(cursor is not None)
+
+            logger.get_chats_page(src.account, dest.account, 2, cursor, True,
+                None, None, older_page_callback)
+
+        def older_page_callback(result):
+            rows, cursor = result
+            self.assertEquals([row[2] for row in rows], messages[1:3])
+
+        def iter_callback(rows):
+            # the next page isn't queried until this one is consumed
+            self.assertEquals(logger.output.qsize(), 0)
+            pages.append(rows)
+
+        logger.get_chats_page(src.account, dest.account, 2, None, True, None,
+            None, page_callback)
+        logger.check(True)
+        logger.check(True)
+
+        logger.iter_chats(src.account, dest.account, 2, False, None, None,
+            iter_callback)
+
+        while not pages or pages[-1]:
+            logger.check(True)
+
+        self.assertEquals([len(page) for page in pages], [2, 2, 1, 0])
+        self.assertEquals([row[2] for page in pages for row in page],
+            messages)
+
+    def test_search_messages(self):
+        src = self.build_cloud()
+        dest = self.build_dx()
+
+        def callback(result):
+            self.assertEquals(len(result), 1)
+            self.assertEquals(result[0][2], "the quick brown fox")
+
+        def callback_none(result):
+            self.assertFalse(result)
+
+        logger.log('message', src.status, "the quick brown fox", src, dest)
+        logger.log('message', src.status, "the lazy dog", src, dest)
+        logger.search_messages(dest.account, "fox quick", 10, callback)
+        logger.check(True)
+        logger.search_messages(dest.account, "cat", 10, callback_none)
+        logger.check(True)
+
+    def test_search_backfill(self):
+        log = e3.Logger.Logger("test")
+        self.assertTrue(log.fts)
+        log.execute("DROP TABLE fact_event_fts;")
+        log.close()
+
+        log = e3.Logger.Logger("test")
+        log.execute("SELECT count(*) FROM fact_event_fts_docsize;")
+        indexed = log.cursor.fetchone()[0]
+        log.execute("SELECT count(*) FROM fact_event WHERE id_event=?;",
+            (log.events['message'],))
+        messages = log.cursor.fetchone()[0]
+        log.close()
+
+        self.assertEquals(indexed, messages)
+
+    def test_wal_mode(self):
+        log = e3.Logger.Logger("test")
+        log.execute("PRAGMA journal_mode;")
+        mode = log.cursor.fetchone()[0]
+        log.close()
+
+        self.assertEquals(mode.lower(), "wal")
+
+    def test_batched_log(self):
+        def callback(result):
+            self.assertEquals(len(result), 5)
+
+        dx = self.build_dx()
+
+        for i in range(5):
+            logger.log('message change', e3.status.ONLINE, str(i), dx)
+
+        logger.get_messages(dx.account, 10, callback)
+        logger.check(True)
+
     def test_get_chats_invalid_src(self):
         def callback(result):
             self.assertFalse(result)
@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+from e3.common import LRUCache
+from e3.common.LRUCache import _OrderedDict
+
+class LRUCacheTestCase(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(2)
+
+        self.assertEquals(cache.get('a'), None)
+        self.assertEquals(cache.get('a', 1), 1)
+
+        cache.put('a', 'A')
+
+        self.assertEquals(cache.get('a'), 'A')
+        self.assertEquals(len(cache), 1)
+        self.assertEquals(cache.hits, 1)
+        self.assertEquals(cache.misses, 2)
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        cache.get('a')
+        cache.put('c', 'C')
+
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertTrue('c' in cache)
+        self.assertEquals(cache.evictions, 1)
+
+    def test_size_budget(self):
+        cache = LRUCache(10, len)
+        cache.put('a', 'xxxx')
+        cache.put('b', 'xxxx')
+
+        self.assertEquals(cache.size, 8)
+
+        cache.put('c', 'xxxx')
+
+        self.assertEquals(cache.size, 8)
+        self.assertFalse('a' in cache)
+
+        # replacing a value updates the size
+        cache.put('b', 'x')
+        self.assertEquals(cache.size, 5)
+
+        # values bigger than the cache are not stored
+        cache.put('d', 'x' * 11)
+        self.assertFalse('d' in cache)
+
+        # b was used after c
+        cache.set_max_size(4)
+        self.assertEquals(cache.size, 1)
+        self.assertEquals(cache.get('b'), 'x')
+
+        cache.remove('b')
+        self.assertEquals(cache.size, 0)
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+        self.assertEquals(cache.size, 0)
+
+    def test_ordered_dict_fallback(self):
+        # used when collections.OrderedDict is not available
+        cache = LRUCache(2)
+        cache.items = _OrderedDict()
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        cache.get('a')
+        cache.put('c', 'C')
+
+        self.assertEquals(cache.get('a'), 'A')
+        self.assertFalse('b' in cache)
+        self.assertEquals(cache.get('c'), 'C')
+        self.assertEquals(cache.items.popitem(False), ('a', ('A', 1)))
+        self.assertEquals(cache.items.popitem(), ('c', ('C', 1)))
+        self.assertEquals(len(cache), 0)
+        self.assertRaises(KeyError, cache.items.popitem)
+
+        cache.put('d', 'D')
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+import gui
+from gui.base import MarkupParser
+
+class MarkupParserTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.smile = gui.theme.emote_to_path(':)')
+        self.wink = gui.theme.emote_to_path(';)')
+
+    def test_replace_emotes(self):
+        result = MarkupParser.replace_emotes(':) hi :-) ;)')
+
+        self.assertEquals(result.count('<img'), 3)
+        self.assertEquals(result.count(self.smile), 2)
+        self.assertTrue('alt=":-)"' in result)
+
+    def test_replace_emotes_skips_entities(self):
+        text = MarkupParser.escape('"quoted";)')
+        result = MarkupParser.replace_emotes(text)
+
+        self.assertEquals(result.count('<img'), 1)
+        self.assertTrue(result.startswith('&quot;quoted&quot;<img'))
+
+    def test_replace_custom_emotes(self):
+        cedict = {'(cat)': 'cat.png', '(cats)': 'cats.png'}
+        result = MarkupParser.replace_emotes('(cats) (cat)', cedict, 'dir')
+
+        self.assertTrue(os.path.join('dir', 'cats.png') in result)
+        self.assertTrue(os.path.join('dir', 'cat.png') in result)
+        self.assertEquals(result.count('<img'), 2)
+
+    def test_parse_emotes(self):
+        message = '<span style="color: #000">hi :)</span>'
+        result = MarkupParser.parse_emotes(message)
+
+        self.assertEquals(result,
+            '<span style="color: #000">hi <img src="%s" alt=":)"/></span>' %
+            self.smile)
+
+    def test_get_custom_emotes(self):
+        cedict = {'(cat)': 'cat.png', '(dog)': 'dog.png'}
+
+        self.assertEquals(MarkupParser.get_custom_emotes(
+            'a (dog) and a (dog)', cedict), ['(dog)'])
+        self.assertEquals(MarkupParser.get_custom_emotes('nothing', cedict),
+            [])
+        self.assertEquals(MarkupParser.get_custom_emotes('(dog)', None), [])
+
+    def test_matcher_cache(self):
+        first = MarkupParser.get_emote_matcher([':)', ';)'])
+        second = MarkupParser.get_emote_matcher([';)', ':)'])
+
+        self.assertTrue(first is second)
+        self.assertEquals(MarkupParser.get_emote_matcher([]), None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+import e3
+from e3.base.Logger import Account
+
+class Plain(object):
+    '''an object with a __dict__ like the classes before using slots'''
+    pass
+
+def footprint(obj):
+    '''return the bytes used by obj, its __dict__ and its containers'''
+    total = sys.getsizeof(obj)
+    names = getattr(obj, '__slots__', ())
+
+    if hasattr(obj, '__dict__'):
+        total += sys.getsizeof(obj.__dict__)
+        names = obj.__dict__.keys()
+
+    for name in names:
+        value = getattr(obj, name, None)
+
+        if isinstance(value, (dict, list)):
+            total += sys.getsizeof(value)
+
+    return total
+
+def as_plain(obj, **extra):
+    '''return a Plain object with the same attributes than obj'''
+    plain = Plain()
+
+    for name in obj.__slots__:
+        setattr(plain, name.lstrip('_'), getattr(obj, name))
+
+    plain.__dict__.update(extra)
+    return plain
+
+class MemoryTestCase(unittest.TestCase):
+
+    def test_no_dict(self):
+        contact = e3.Contact('a@b.com')
+        objects = [contact, e3.Group('group', '1'), e3.Event(1, 'a'),
+            e3.Action(1, ('a',)), e3.Message(0, 'hi', 'a@b.com'),
+            e3.Style(), Account.from_contact(contact),
+            e3.base.Logger.Group(1, 'group', '1', True)]
+
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj))
+
+    def test_attrs_created_when_used(self):
+        contact = e3.Contact('a@b.com')
+        self.assertEquals(contact._attrs, None)
+
+        contact.attrs['mobile'] = True
+        self.assertEquals(contact.attrs, {'mobile': True})
+
+    def test_contact_footprint(self):
+        contact = e3.Contact('a@b.com')
+        before = footprint(as_plain(contact, attrs={}))
+        after = footprint(contact)
+
+        self.assertTrue(after * 3 < before, (before, after))
+
+    def test_account_footprint(self):
+        account = Account.from_contact(e3.Contact('a@b.com'))
+        before = footprint(as_plain(account))
+        after = footprint(account)
+
+        self.assertTrue(after * 3 < before, (before, after))
+
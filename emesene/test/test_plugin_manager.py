@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+sys.path.append(os.path.abspath('.'))
+
+from pluginmanager import PluginManager, read_metadata
+
+PLUGIN = '''
+import sys
+from plugin_base import PluginBase
+
+sys.imported_plugins.append(__name__)
+
+class Plugin(PluginBase):
+    _description = 'A plugin'
+    _authors = {'someone': 'someone@b.com'}
+
+    def start(self, session):
+        pass
+
+    def stop(self):
+        pass
+'''
+
+class PluginManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.plugins = os.path.join(self.path, 'plugins')
+        self.index = os.path.join(self.path, 'index')
+        sys.imported_plugins = []
+
+        self.write('lazy_package/__init__.py', '')
+        self.write('lazy_package/plugin.py', PLUGIN)
+        self.write('lazy_single.py', PLUGIN)
+        self.write('lazy_missing/__init__.py', '')
+        self.write('lazy_missing/plugin.py', PLUGIN)
+        self.write('lazy_missing/manifest.json', json.dumps(dict(
+            description='Needs a module', requires=['no_such_module_here'])))
+
+        self.manager = PluginManager()
+        self.manager.scan_directory(self.plugins, self.index)
+
+    def tearDown(self):
+        for name in ('lazy_package', 'lazy_package.plugin', 'lazy_single',
+                'lazy_missing', 'lazy_missing.plugin'):
+            sys.modules.pop(name, None)
+
+        del sys.imported_plugins
+        shutil.rmtree(self.path)
+
+    def write(self, name, content):
+        path = os.path.join(self.plugins, name)
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        handle = open(path, 'w')
+        handle.write(content)
+        handle.close()
+
+    def test_scan_doesnt_import(self):
+        self.assertEquals(sorted(self.manager.get_plugins()),
+            ['lazy_missing', 'lazy_package', 'lazy_single'])
+        self.assertEquals(sys.imported_plugins, [])
+
+        metadata = self.manager.get_metadata('lazy_package')
+        self.assertEquals(metadata['description'], 'A plugin')
+        self.assertEquals(metadata['authors'], {'someone': 'someone@b.com'})
+        self.assertEquals(self.manager.get_metadata('lazy_missing')[
+            'requires'], ['no_such_module_here'])
+
+    def test_start_imports(self):
+        self.assertTrue(self.manager.plugin_start('lazy_package', None))
+        self.assertTrue(self.manager.plugin_is_active('lazy_package'))
+        self.assertEquals(sys.imported_plugins, ['lazy_package.plugin'])
+
+        self.assertFalse(self.manager.plugin_start('lazy_missing', None))
+        self.assertEquals(sys.imported_plugins, ['lazy_package.plugin'])
+
+    def test_index(self):
+        handle = open(self.index)
+        index = json.load(handle)
+        handle.close()
+
+        # change the cached metadata to know if it's used
+        for entry in index.values():
+            entry['metadata']['description'] = 'cached'
+
+        handle = open(self.index, 'w')
+        json.dump(index, handle)
+        handle.close()
+
+        manager = PluginManager()
+        manager.scan_directory(self.plugins, self.index)
+        self.assertEquals(manager.get_metadata('lazy_single')['description'],
+            'cached')
+
+        path = os.path.join(self.plugins, 'lazy_single.py')
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+
+        manager = PluginManager()
+        manager.scan_directory(self.plugins, self.index)
+        self.assertEquals(manager.get_metadata('lazy_single')['description'],
+            'A plugin')
+        self.assertEquals(manager.get_metadata('lazy_package')['description'],
+            'cached')
+
+    def test_rescan_refreshes_metadata(self):
+        self.write('lazy_single.py', PLUGIN.replace('A plugin', 'Changed'))
+        path = os.path.join(self.plugins, 'lazy_single.py')
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+
+        self.manager.scan_directory(self.plugins, self.index)
+        self.assertEquals(self.manager.get_metadata('lazy_single')[
+            'description'], 'Changed')
+
+    def test_bundled_manifests(self):
+        metadata = read_metadata('plugins', 'music', True)
+        self.assertTrue('dbus' in metadata['requires'])
+        self.assertEquals(metadata['module'], 'plugin')
+
+        metadata = read_metadata('plugins', 'ye_old_status_combo', True)
+        self.assertTrue('gtk' in metadata['requires'])
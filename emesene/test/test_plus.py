@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+from gui.base import Plus
+
+class PlusTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Plus._msnplus_cache.clear()
+
+    def test_msnplus_cached(self):
+        hits = Plus._msnplus_cache.hits
+        first = Plus.msnplus('[b]hi[/b] there', False)
+        second = Plus.msnplus('[b]hi[/b] there', False)
+
+        self.assertTrue(first is second)
+        self.assertEquals(Plus._msnplus_cache.hits, hits + 1)
+        self.assertFalse(Plus.msnplus('[b]hi[/b] there', True) is first)
+
+    def test_msnplus_strip(self):
+        self.assertEquals(Plus.msnplus_strip('[b]hi[/b] [c=4]there[/c]'),
+            'hi there')
+
+    def test_msnplus_deep_nesting(self):
+        text = '[b]' * 3000 + 'deep' + '[/b]' * 3000
+        result = Plus.msnplus(text, False)
+
+        self.assertEquals(result.to_xml(), '<span>deep</span>')
+
+    def test_msnplus_nesting_limit(self):
+        depth = Plus.MAX_NESTING - 1
+        text = '[i]' * depth + 'deep' + '[/i]' * depth
+        result = Plus.msnplus(text, False)
+
+        self.assertEquals(result.to_xml(),
+            '<span>' + '<i>' * depth + 'deep' + '</i>' * depth + '</span>')
+
+    def test_msnplus_long_sequence(self):
+        text = '[b]x[/b] ' * 3000
+        result = Plus.msnplus(text, False)
+
+        self.assertEquals(result.to_xml().count('<b>x</b>'), 3000)
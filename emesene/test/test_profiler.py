@@ -0,0 +1,52 @@
+import os
+import sys
+import shutil
+import unittest
+import tempfile
+sys.path.append(os.path.abspath('.'))
+
+from profiler import StartupProfiler
+
+class ProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.module = 'profiled_%d' % id(self)
+        handle = file(os.path.join(self.path, self.module + '.py'), 'w')
+        handle.write('import time\ntime.sleep(0.05)\n')
+        handle.close()
+        sys.path.insert(0, self.path)
+        self.profiler = StartupProfiler()
+
+    def tearDown(self):
+        self.profiler.disable()
+        sys.path.remove(self.path)
+        sys.modules.pop(self.module, None)
+        shutil.rmtree(self.path)
+
+    def test_imports(self):
+        self.profiler.enable()
+        __import__(self.module)
+        __import__(self.module)
+        self.profiler.phase('imports')
+        self.profiler.disable()
+
+        total, own = self.profiler.imports[self.module]
+        self.assertTrue(total >= 0.05)
+        self.assertTrue(own <= total)
+        self.assertEquals([name for (name, end) in self.profiler.phases],
+            ['imports'])
+
+        report = self.profiler.report()
+        self.assertTrue(any(line.strip().startswith(self.module)
+            for line in report))
+
+    def test_disabled(self):
+        self.profiler.phase('imports')
+        __import__(self.module)
+
+        self.assertEquals(self.profiler.phases, [])
+        self.assertEquals(self.profiler.imports, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import socket
+import unittest
+import threading
+sys.path.append(os.path.abspath('.'))
+
+from e3.msn.Socket import Socket
+from e3.msn.Reactor import Reactor
+
+class Server(threading.Thread):
+    '''accept one connection, answer the first line received with the same
+    line and keep all the data received'''
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.received = ''
+        self.closed = threading.Event()
+
+    def run(self):
+        connection = self.listener.accept()[0]
+        self.listener.close()
+
+        while True:
+            data = connection.recv(1024)
+
+            if not data:
+                break
+
+            if not self.received:
+                connection.sendall(data)
+
+            self.received += data
+
+        connection.close()
+        self.closed.set()
+
+class ReactorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server()
+        self.server.start()
+        self.reactor = Reactor()
+        self.reactor.start()
+
+    def tearDown(self):
+        self.reactor.quit()
+
+    def test_send_before_start(self):
+        sock = Socket('127.0.0.1', self.server.port, self.reactor)
+        sock.send('USR 1 a@b.com\r\n')
+        sock.start()
+
+        self.assertEquals(sock.output.get(True, 5), 'USR 1 a@b.com\r\n')
+
+        sock.send('MSG 2 N 3\r\n')
+        sock.quit()
+
+        self.server.closed.wait(5)
+        self.assertEquals(self.server.received,
+            'USR 1 a@b.com\r\nMSG 2 N 3\r\n')
+
+    def test_thread_mode(self):
+        sock = Socket('127.0.0.1', self.server.port)
+        sock.send('ANS 1 a@b.com\r\n')
+        sock.start()
+
+        self.assertEquals(sock.output.get(True, 5), 'ANS 1 a@b.com\r\n')
+        sock.quit()
+        self.server.closed.wait(5)
+        self.assertEquals(self.server.received, 'ANS 1 a@b.com\r\n')
+
+    def test_connection_refused(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+        listener.close()
+
+        sock = Socket('127.0.0.1', port, self.reactor)
+        sock.start()
+
+        self.assertEquals(sock.output.get(True, 5), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import unittest
+import threading
+sys.path.append(os.path.abspath('.'))
+
+from e3.msn.RequestPool import RequestPool
+
+class RequestPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = RequestPool(1)
+        self.done = []
+        self.finished = threading.Event()
+
+    def tearDown(self):
+        self.pool.set_max_workers(0)
+
+        # let the threads exit before the interpreter does
+        for i in range(100):
+            if self.pool.stats()['workers'] == 0:
+                break
+
+            time.sleep(0.01)
+
+    def block(self):
+        '''submit a task that blocks the only thread until release is set'''
+        self.release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            self.release.wait()
+
+        self.pool.submit(block, RequestPool.INTERACTIVE)
+        started.wait(5)
+
+    def add(self, name):
+        self.done.append(name)
+
+    def wait(self):
+        '''release the blocked thread and wait for the tasks submitted'''
+        self.pool.submit(self.finished.set, RequestPool.BULK + 1)
+        self.release.set()
+        self.finished.wait(5)
+
+    def test_priority(self):
+        self.block()
+        self.pool.submit(lambda: self.add('bulk'), RequestPool.BULK, 'bulk')
+        self.pool.submit(lambda: self.add('normal'), RequestPool.NORMAL)
+        self.pool.submit(lambda: self.add('user'), RequestPool.INTERACTIVE)
+        self.assertEquals(self.pool.queue_depth(), 3)
+
+        self.wait()
+
+        self.assertEquals(self.done, ['user', 'normal', 'bulk'])
+
+    def test_max_workers(self):
+        self.block()
+
+        for i in range(3):
+            self.pool.submit(lambda: self.add('task'), RequestPool.NORMAL,
+                'task')
+
+        self.assertEquals(self.pool.stats()['workers'], 1)
+
+        self.wait()
+
+        stats = self.pool.stats()
+        self.assertEquals(stats['queued'], 0)
+        self.assertEquals(stats['requests']['task']['count'], 3)
+        self.assertTrue(stats['requests']['task']['max_wait'] > 0)
+
+
+    def test_expired(self):
+        self.pool.max_wait = 0.1
+        self.block()
+        self.pool.submit(lambda: self.add('late'), RequestPool.NORMAL,
+            'late', lambda: self.add('expired'))
+        self.pool.submit(lambda: self.add('task'), RequestPool.NORMAL,
+            'task')
+
+        # the only thread is blocked past the deadline of the queued tasks
+        self.release.wait(0.3)
+        self.wait()
+
+        self.assertEquals(self.done, ['expired', 'task'])
+        stats = self.pool.stats()
+        self.assertEquals(stats['requests']['late']['expired'], 1)
+        self.assertEquals(stats['requests']['task']['expired'], 0)
+
+    def test_burst(self):
+        self.pool.set_max_workers(4)
+        self.pool.submit(self.finished.set)
+        self.finished.wait(5)
+
+        # wait for the thread to be idle again
+        for i in range(100):
+            if self.pool.stats()['idle'] == 1:
+                break
+
+            time.sleep(0.01)
+
+        self.release = threading.Event()
+        started = []
+
+        for i in range(4):
+            event = threading.Event()
+            started.append(event)
+            self.pool.submit(lambda event=event: (event.set(),
+                self.release.wait()), RequestPool.NORMAL, 'burst')
+
+        # all the tasks of the burst run at the same time
+        for event in started:
+            self.assertTrue(event.wait(5))
+
+        self.assertEquals(self.pool.stats()['workers'], 4)
+        self.release.set()
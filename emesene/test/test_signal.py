@@ -0,0 +1,83 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+from e3.common import Signal
+
+class Handler(object):
+
+    def __init__(self):
+        self.received = []
+
+    def on_signal(self, *args, **kwargs):
+        self.received.append((args, kwargs))
+
+class SignalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.signal = Signal()
+        self.first = Handler()
+        self.second = Handler()
+
+    def tearDown(self):
+        Signal.set_profiling(False)
+        Signal.stats.clear()
+
+    def test_args_not_accumulated(self):
+        self.signal.subscribe(self.first.on_signal, 'a', key=1)
+        self.signal.subscribe(self.second.on_signal, 'b')
+        self.signal.emit(0, other=2)
+
+        self.assertEquals(self.first.received, [((0, 'a'),
+            {'key': 1, 'other': 2})])
+        self.assertEquals(self.second.received, [((0, 'b'), {'other': 2})])
+
+    def test_unsubscribe(self):
+        self.signal.subscribe(self.first.on_signal)
+        self.signal.subscribe(self.first.on_signal)
+        self.signal.emit(1)
+        self.signal.unsubscribe(self.first.on_signal)
+        self.signal.emit(2)
+
+        self.assertEquals(self.first.received, [((1,), {})])
+
+    def test_dead_subscribers_pruned(self):
+        self.signal.subscribe(self.first.on_signal)
+        self.signal.subscribe(self.second.on_signal)
+        del self.first
+        self.signal.emit(1)
+
+        self.assertEquals(len(self.signal._subscribers), 1)
+        self.assertEquals(self.second.received, [((1,), {})])
+
+    def test_errors_dont_stop_emit(self):
+        def fail(*args):
+            raise TypeError('fail')
+
+        self.signal.subscribe(fail)
+        self.signal.subscribe(self.first.on_signal)
+        sys.stderr, stderr = open(os.devnull, 'w'), sys.stderr
+
+        try:
+            self.signal.emit(1)
+            self.signal.emit(2)
+        finally:
+            sys.stderr = stderr
+
+        self.assertEquals(len(self.first.received), 2)
+        self.assertEquals(len(self.signal._subscribers), 2)
+
+    def test_profiling(self):
+        self.signal.subscribe(self.first.on_signal)
+        self.signal.emit(1)
+        self.assertEquals(Signal.get_stats(), [])
+
+        Signal.set_profiling(True)
+        self.signal.emit(2)
+        self.signal.emit(3)
+
+        stats = Signal.get_stats()
+        self.assertEquals(len(stats), 1)
+        self.assertEquals(stats[0][:2], ('Handler.on_signal', 2))
+
@@ -0,0 +1,73 @@
+import os
+import sys
+import Queue
+import unittest
+sys.path.append(os.path.abspath('.'))
+
+import e3
+from e3.base.Session import EVENTS
+from e3.common import Signals
+
+class SignalsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = Queue.Queue()
+        self.signals = Signals(EVENTS, self.queue)
+        self.scheduled = []
+        self.received = []
+
+        self.signals.set_notifier(lambda: self.scheduled.append(True))
+        self.signals.user_typing.subscribe(self._on_user_typing)
+
+    def _on_user_typing(self, value):
+        self.received.append(value)
+
+    def _on_contact_attr_changed(self, account, attr, old_value):
+        self.received.append((account, attr, old_value))
+
+    def add_event(self, *args):
+        self.queue.put(e3.Event(e3.Event.EVENT_USER_TYPING, *args))
+        self.signals.notify()
+
+    def test_notify_once(self):
+        self.add_event(1)
+        self.add_event(2)
+
+        self.assertEquals(len(self.scheduled), 1)
+        self.assertFalse(self.signals._dispatch_events())
+        self.assertEquals(self.received, [1, 2])
+
+        self.add_event(3)
+        self.assertEquals(len(self.scheduled), 2)
+
+    def test_dispatch_in_batches(self):
+        for i in range(Signals.BATCH_SIZE + 1):
+            self.add_event(i)
+
+        self.assertTrue(self.signals._dispatch_events())
+        self.assertEquals(len(self.received), Signals.BATCH_SIZE)
+        self.assertFalse(self.signals._dispatch_events())
+        self.assertEquals(len(self.received), Signals.BATCH_SIZE + 1)
+        self.assertEquals(len(self.scheduled), 1)
+
+    def test_poll(self):
+        self.signals.set_notifier(None)
+        self.add_event(1)
+
+        self.assertEquals(len(self.scheduled), 0)
+        self.assertTrue(self.signals._handle_events())
+        self.assertEquals(self.received, [1])
+
+    def test_coalesce(self):
+        self.signals.contact_attr_changed.subscribe(
+            self._on_contact_attr_changed)
+        event = e3.Event.EVENT_CONTACT_ATTR_CHANGED
+
+        self.queue.put(e3.Event(event, 'a@b.c', 'status', 1))
+        self.queue.put(e3.Event(event, 'a@b.c', 'nick', 'foo'))
+        self.queue.put(e3.Event(event, 'a@b.c', 'status', 2))
+        self.queue.put(e3.Event(event, 'd@e.f', 'status', 3))
+        self.signals._handle_events()
+
+        self.assertEquals(self.received, [('a@b.c', 'status', 1),
+            ('a@b.c', 'nick', 'foo'), ('d@e.f', 'status', 3)])
@@ -0,0 +1,86 @@
+import unittest
+
+import os
+import sys
+sys.path.append(os.path.abspath('.'))
+
+from e3 import cache
+import testutils
+
+class ThumbnailCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = cache.ThumbnailCache('tmp')
+        self.avatars = cache.AvatarCache('tmp', 'user@host.com')
+        self.image_path = testutils.create_binary_file(self.avatars.path)
+
+    def test_lookup(self):
+        stamp, hash_ = self.avatars.insert(self.image_path)
+        avatar_path = os.path.join(self.avatars.path, hash_)
+
+        self.assertEqual(self.cache.lookup(avatar_path, (32, 32)),
+                (hash_, None))
+
+        path = self.cache.insert((hash_, (32, 32), 'thumbnail'))
+        self.assertEqual(self.cache.lookup(avatar_path, (32, 32)),
+                (hash_, path))
+        self.assertEqual(file(path).read(), 'thumbnail')
+        self.assertTrue(hash_ in self.cache, hash_ + ' should be in cache')
+        self.assertTrue((hash_, (32, 32)) in self.cache.list())
+
+        # other sizes are not found
+        self.assertEqual(self.cache.lookup(avatar_path, (64, 64)),
+                (hash_, None))
+
+    def test_hash_from_content(self):
+        stamp, hash_ = self.avatars.insert(self.image_path)
+        last_path = os.path.join(self.avatars.path, 'last')
+
+        self.assertEqual(self.cache.get_hash(last_path), hash_)
+
+    def test_remove(self):
+        stamp, hash_ = self.avatars.insert(self.image_path)
+        self.cache.insert((hash_, (32, 32), 'small'))
+        self.cache.insert((hash_, (64, 64), 'big'))
+
+        self.assertTrue(self.cache.remove(hash_), 'remove should return True')
+        self.assertFalse(hash_ in self.cache, hash_ + ' should not be in cache')
+        self.assertFalse(self.cache.remove(hash_),
+                'remove should return False')
+
+    def test_prune_least_recently_used(self):
+        thumbnails = cache.ThumbnailCache('tmp', 5)
+        thumbnails.prune(0)
+        hashes = ['%040x' % i for i in range(5)]
+
+        for i, hash_ in enumerate(hashes):
+            path = thumbnails.insert((hash_, (32, 32), 'thumbnail'))
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # a lookup counts as a use
+        thumbnails.lookup(hashes[0], (32, 32))
+        thumbnails.insert(('f' * 40, (32, 32), 'thumbnail'))
+
+        names = [hash_ for hash_, size in thumbnails.list()]
+        self.assertEqual(len(names), 4)
+        self.assertTrue(hashes[0] in names)
+        self.assertTrue('f' * 40 in names)
+        self.assertFalse(hashes[1] in names)
+        self.assertFalse(hashes[2] in names)
+
+    def test_insert_failed(self):
+        stamp, hash_ = self.avatars.insert(self.image_path)
+        before = os.listdir(self.cache.path)
+
+        # a directory where the thumbnail should be makes the rename fail
+        os.mkdir(self.cache.get_path(hash_, (48, 48)))
+
+        try:
+            self.assertRaises(OSError, self.cache.insert,
+                (hash_, (48, 48), 'thumbnail'))
+            self.assertEqual(len(os.listdir(self.cache.path)),
+                len(before) + 1)
+        finally:
+            os.rmdir(self.cache.get_path(hash_, (48, 48)))
+
+if __name__ == '__main__':
+    unittest.main()